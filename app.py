@@ -1,26 +1,13 @@
 import streamlit as st
 import os
-from pathlib import Path
+from services.bootstrap import ERROR_ADVICE, bootstrap, bootstrap_errors, print_progress
+from services.api import start_api
+from services.warmup import start_warmup
 
 # Initialize session state
 if 'current_invoice' not in st.session_state:
     st.session_state.current_invoice = None
 
-# Create data directory if it doesn't exist
-data_dir = Path("data")
-data_dir.mkdir(exist_ok=True)
-
-# Initialize empty data files if they don't exist
-for filename in ["company.json", "clients.json", "products.json", "invoices.json"]:
-    filepath = data_dir / filename
-    if not filepath.exists():
-        if filename == "company.json":
-            content = "{}"
-        else:
-            content = "[]"
-        with open(filepath, 'w') as f:
-            f.write(content)
-
 st.set_page_config(
     page_title="Irish Steel Billing System",
     page_icon="🏗️",
@@ -28,6 +15,27 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Create missing data files and migrate old ones; only the first run in a process does any work
+migration_status = st.empty()
+
+
+def show_migration_progress(kind, done, total):
+    print_progress(kind, done, total)
+    migration_status.progress(done / total if total else 1.0, text=f"Upgrading {kind} data: {done:,}/{total:,} records")
+
+
+bootstrap(show_migration_progress)
+migration_status.empty()
+if bootstrap_errors():
+    st.error("\n\n".join([ERROR_ADVICE, *bootstrap_errors()]))
+    st.stop()
+
+# Load pandas and the PDF layer in the background once the page is up
+start_warmup()
+
+# Serve the local JSON API from this process
+start_api()
+
 st.title("🏗️ Irish Steel Billing System")
 st.markdown("### Professional Billing Solution for Steel Suppliers")
 
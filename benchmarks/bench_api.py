@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Load test for the local JSON API.
+
+Seeds a scratch data directory with clients, products and invoices,
+serves the API from a background thread as the Streamlit process does,
+and drives it with keep-alive connections from an asyncio client. Reports
+requests per second and latency for reads, single and batch invoice
+creation, and cached PDF downloads.
+
+Run from the repository root:
+    python benchmarks/bench_api.py
+    python benchmarks/bench_api.py --requests 5000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import make_company
+from models.client import Client, ClientManager
+from models.invoice import Invoice, InvoiceItem, InvoiceManager
+from models.product import Product, ProductManager
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client for JSON requests"""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method: str, path: str, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        status = int(head[0].split(" ", 2)[1])
+        headers = {name.lower(): value.strip() for name, _, value in (line.partition(":") for line in head[1:] if line)}
+        payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def load(host: str, port: int, make_request, total: int, concurrency: int):
+    """Send ``total`` requests over ``concurrency`` connections; returns (seconds, latencies, failures)"""
+    latencies, failures = [], []
+    issued = iter(range(total))
+
+    async def worker():
+        connection = Connection(host, port)
+        try:
+            for number in issued:
+                method, path, body, expected = make_request(number)
+                start = time.perf_counter()
+                status, payload = await connection.request(method, path, body)
+                latencies.append(time.perf_counter() - start)
+                if status != expected:
+                    failures.append((status, payload[:200]))
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, failures
+
+
+def seed(clients: int, products: int, invoices: int):
+    """Write the scratch data files and return (client ids, product ids, invoice ids)"""
+    make_company().save()
+    client_manager = ClientManager()
+    client_manager.clients = [Client(id=f"client-{i}", name=f"Client {i:05d} Ltd", city="Cork",
+                                     vat_number="IE1234567T") for i in range(clients)]
+    client_manager.save_clients()
+    product_manager = ProductManager()
+    product_manager.products = [Product(id=f"product-{i}", name=f"Bar {i}", grade="S355", dimensions="20mm x 6000mm",
+                                        base_price=10.0 + i % 50, cutting_charge=1.5, weight_per_unit=18.8,
+                                        stock_quantity=1e9) for i in range(products)]
+    product_manager.save_products()
+    invoice_manager = InvoiceManager()
+    for i in range(invoices):
+        invoice = Invoice(id=f"invoice-{i}", invoice_number=f"INV-2025-{i + 1:05d}", client_id=f"client-{i % clients}",
+                          client_name=f"Client {i % clients:05d} Ltd", status=("Sent", "Paid", "Draft")[i % 3])
+        for j in range(4):
+            invoice.items.append(InvoiceItem(f"product-{(i + j) % products}", f"Bar {(i + j) % products}",
+                                             "", 2, 12.5, 1, 1.5))
+        invoice_manager.invoices.append(invoice)
+    invoice_manager.save_invoices()
+
+    from services.stock_ledger import get_stock_ledger
+    get_stock_ledger().adjust_many({product.id: product.stock_quantity for product in product_manager.products})
+    return ([client.id for client in client_manager.clients], [product.id for product in product_manager.products],
+            [invoice.id for invoice in invoice_manager.invoices])
+
+
+def new_invoice(number: int, client_ids, product_ids) -> dict:
+    return {"client_id": client_ids[number % len(client_ids)], "status": "Sent",
+            "items": [{"product_id": product_ids[(number + j) % len(product_ids)], "quantity": 1 + j,
+                       "cuts_required": j} for j in range(3)]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON API load test")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per read scenario")
+    parser.add_argument("--writes", type=int, default=200, help="Requests per write scenario")
+    parser.add_argument("--batch-size", type=int, default=50, help="Invoices per batch request")
+    parser.add_argument("--concurrency", type=int, default=16, help="Open connections")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--invoices", type=int, default=5000, help="Invoices on file before the run")
+    parser.add_argument("--port", type=int, default=8599)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("data")
+        client_ids, product_ids, invoice_ids = seed(args.clients, args.products, args.invoices)
+
+        from services.api import get_api
+        api = get_api()
+        ready = threading.Event()
+
+        async def serve():
+            server = await api.serve("127.0.0.1", args.port)
+            ready.set()
+            async with server:
+                await server.serve_forever()
+
+        threading.Thread(target=asyncio.run, args=(serve(),), name="billing-api", daemon=True).start()
+        ready.wait(10)
+
+        scenarios = [
+            ("health", args.requests, lambda n: ("GET", "/api/health", None, 200)),
+            ("list clients (50)", args.requests,
+             lambda n: ("GET", f"/api/clients?offset={n * 50 % args.clients}&limit=50", None, 200)),
+            ("search clients", args.requests,
+             lambda n: ("GET", f"/api/clients?q=client+{n % 100:03d}&limit=20", None, 200)),
+            ("client balance", args.requests,
+             lambda n: ("GET", f"/api/clients/{client_ids[n % len(client_ids)]}/balance", None, 200)),
+            ("get product", args.requests,
+             lambda n: ("GET", f"/api/products/{product_ids[n % len(product_ids)]}", None, 200)),
+            ("list invoices (50)", args.requests,
+             lambda n: ("GET", f"/api/invoices?status=Sent&offset={n * 50 % 1000}&limit=50", None, 200)),
+            ("get invoice", args.requests,
+             lambda n: ("GET", f"/api/invoices/{invoice_ids[n % len(invoice_ids)]}", None, 200)),
+            ("create invoice", args.writes,
+             lambda n: ("POST", "/api/invoices", new_invoice(n, client_ids, product_ids), 201)),
+            (f"create batch ({args.batch_size})", max(args.writes // 10, 1),
+             lambda n: ("POST", "/api/invoices/batch", {"invoices": [
+                 new_invoice(n * args.batch_size + i, client_ids, product_ids) for i in range(args.batch_size)]}, 200)),
+            ("invoice pdf (cached)", args.requests,
+             lambda n: ("GET", f"/api/invoices/{invoice_ids[n % 20]}/pdf", None, 200)),
+        ]
+
+        print(f"{args.clients} clients, {args.products} products, {args.invoices} invoices on file, "
+              f"{args.concurrency} connections\n")
+        print(f"{'scenario':<22} {'requests':>8} {'req/sec':>9} {'p50 ms':>8} {'p95 ms':>8} {'failed':>6}")
+        failed = False
+        for name, total, make_request in scenarios:
+            if name.startswith("invoice pdf"):
+                # Render the PDFs once so the scenario measures serving from the cache
+                asyncio.run(load("127.0.0.1", args.port, make_request, 20, 4))
+            seconds, latencies, failures = asyncio.run(
+                load("127.0.0.1", args.port, make_request, total, args.concurrency))
+            latencies.sort()
+            p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+            print(f"{name:<22} {total:>8} {total / seconds:>9.0f} {statistics.median(latencies) * 1000:>8.1f} "
+                  f"{p95 * 1000:>8.1f} {len(failures):>6}")
+            for status, payload in failures[:3]:
+                print(f"    {status}: {payload.decode('utf-8', 'replace')}")
+            failed = failed or bool(failures)
+
+        saved = len(InvoiceManager().invoices) - args.invoices
+        expected = args.writes + max(args.writes // 10, 1) * args.batch_size
+        print(f"\n{saved} invoices created through the API (expected {expected})")
+        os.chdir("/")
+    sys.exit(1 if failed or saved != expected else 0)
+
+
+if __name__ == "__main__":
+    main()
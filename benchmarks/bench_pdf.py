@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+PDF rendering benchmark and regression check.
+
+Renders every scenario from benchmarks/fixtures.py with each renderer and
+reports latency percentiles, peak memory and output size. Each render is
+also checked structurally, so a faster renderer cannot silently change the
+figures on the invoice.
+
+Run from the repository root:
+    python benchmarks/bench_pdf.py                 # compare with the stored baseline
+    python benchmarks/bench_pdf.py --save-baseline # record a new baseline
+    python benchmarks/bench_pdf.py --profile compact --logo logo.png
+
+Exits with status 1 on a structural failure or a regression beyond the
+tolerance.
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import SCENARIOS, make_client, make_company
+from benchmarks.pdf_text import check_invoice_text, extract_text
+from services.pdf_canvas_renderer import CanvasPDFGenerator
+from services.pdf_generator import PDFGenerator
+from services.pdf_output import DEFAULT_PROFILE, PROFILES
+
+RENDERERS = {
+    "platypus": PDFGenerator,
+    "canvas": CanvasPDFGenerator,
+}
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Large scenarios get fewer timed repeats so the suite stays quick
+MAX_REPEAT_BY_ITEMS = [(1000, 3)]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_scenario(renderer_cls, profile, invoice, company, client, repeat):
+    generator = renderer_cls(profile)
+
+    # Warm-up render doubles as the structural check; subset fonts re-encode
+    # the text, so only base-font profiles can be read back
+    pdf = generator.generate_invoice_pdf(invoice, company, client).getvalue()
+    problems = [] if profile.embed_fonts else check_invoice_text(extract_text(pdf), invoice)
+
+    for threshold, max_repeat in MAX_REPEAT_BY_ITEMS:
+        if len(invoice.items) >= threshold:
+            repeat = min(repeat, max_repeat)
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        generator.generate_invoice_pdf(invoice, company, client)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    generator.generate_invoice_pdf(invoice, company, client)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p90_ms": percentile(timings, 90) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "peak_kb": peak / 1024,
+        "size_kb": len(pdf) / 1024,
+        "problems": problems,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Return the metrics that regressed beyond the tolerance"""
+    regressions = []
+    for metric in ("p50_ms", "peak_kb", "size_kb"):
+        previous = baseline.get(metric)
+        if previous and result[metric] > previous * (1 + tolerance):
+            regressions.append(f"{metric} {previous:.1f} -> {result[metric]:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF rendering benchmark and regression check")
+    parser.add_argument("--renderer", choices=["all"] + list(RENDERERS), default="all")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--profile", choices=list(PROFILES), default=DEFAULT_PROFILE,
+                        help="PDF output profile to render with")
+    parser.add_argument("--logo", help="Logo image to put on the benchmark company")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed renders per scenario")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown/growth before flagging a regression")
+    args = parser.parse_args()
+
+    renderers = RENDERERS if args.renderer == "all" else {args.renderer: RENDERERS[args.renderer]}
+    scenarios = args.scenario or list(SCENARIOS)
+    profile = PROFILES[args.profile]
+    company = make_company()
+    company.logo_path = args.logo or ""
+    client = make_client()
+
+    baseline = {}
+    if args.baseline.exists() and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.\n")
+
+    results = {}
+    failed = False
+    print(f"{'renderer':<9} {'scenario':<12} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'peak KB':>9} {'size KB':>8}  status")
+
+    for renderer_name, renderer_cls in renderers.items():
+        for scenario in scenarios:
+            invoice = SCENARIOS[scenario]()
+            result = run_scenario(renderer_cls, profile, invoice, company, client, args.repeat)
+            key = f"{renderer_name}/{scenario}"
+            if profile.name != DEFAULT_PROFILE or args.logo:
+                key += f" [{profile.name}{', logo' if args.logo else ''}]"
+            results[key] = {k: round(v, 2) for k, v in result.items() if k != "problems"}
+
+            status = []
+            if result["problems"]:
+                status.append("TEXT MISMATCH: " + "; ".join(result["problems"][:3]))
+            if key in baseline:
+                status.extend(compare(result, baseline[key], args.tolerance))
+            failed = failed or bool(status)
+
+            print(f"{renderer_name:<9} {scenario:<12} {result['p50_ms']:>8.1f} {result['p90_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['peak_kb']:>9.0f} {result['size_kb']:>8.1f}  "
+                  f"{', '.join(status) or 'ok'}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Compare the platypus and canvas invoice renderers.
+
+Run from the repository root:
+    python benchmarks/bench_renderers.py [--repeat N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import make_client, make_company, make_invoice
+from services.pdf_canvas_renderer import CanvasPDFGenerator
+from services.pdf_generator import PDFGenerator
+
+LINE_COUNTS = [1, 20, 500]
+
+
+def time_renderer(generator, invoice, company, client, repeat):
+    generator.generate_invoice_pdf(invoice, company, client)  # warm-up
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(generator.generate_invoice_pdf(invoice, company, client).getvalue())
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed renders per scenario")
+    args = parser.parse_args()
+
+    company = make_company()
+    client = make_client()
+    renderers = [("platypus", PDFGenerator()), ("canvas", CanvasPDFGenerator())]
+
+    print(f"{'lines':>6} {'renderer':>9} {'median ms':>10} {'size KB':>8} {'speed-up':>9}")
+    for line_count in LINE_COUNTS:
+        invoice = make_invoice(line_count)
+        baseline = None
+        for name, generator in renderers:
+            median, size = time_renderer(generator, invoice, company, client, args.repeat)
+            baseline = baseline or median
+            print(f"{line_count:>6} {name:>9} {median * 1000:>10.1f} {size / 1024:>8.1f} "
+                  f"{baseline / median:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
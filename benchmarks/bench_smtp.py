@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+SMTP batch delivery benchmark.
+
+Sends a month-end run of invoices through InvoiceDelivery to a local
+aiosmtpd server and reports throughput for several worker counts, with and
+without connection reuse. PDFs are rendered once up front so the numbers
+measure delivery, not rendering.
+
+Requires aiosmtpd (pip install aiosmtpd). Run from the repository root:
+    python benchmarks/bench_smtp.py
+    python benchmarks/bench_smtp.py --invoices 500 --workers 1 --workers 4
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fixtures import make_client, make_company, make_invoice
+from services.invoice_delivery import DeliveryLog, InvoiceDelivery, SMTPSettings
+from services.pdf_cache import PDFCache
+from services.pdf_canvas_renderer import CanvasPDFGenerator
+from services.pdf_jobs import render_variant
+
+
+class CountingHandler:
+    """aiosmtpd handler that accepts and counts every message"""
+
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 Message accepted for delivery"
+
+
+def make_month_end_run(count: int):
+    invoices = []
+    for i in range(count):
+        invoice = make_invoice(5 + i % 20)
+        invoice.id = f"bench-{i}"
+        invoice.invoice_number = f"INV-2026-{i + 1:04d}"
+        invoices.append(invoice)
+    return invoices
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMTP batch delivery benchmark")
+    parser.add_argument("--invoices", type=int, default=500)
+    parser.add_argument("--workers", type=int, action="append",
+                        help="Worker count to measure (repeatable, default: 1, 4 and 8)")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        print("aiosmtpd is not installed; run: pip install aiosmtpd")
+        sys.exit(2)
+
+    company = make_company()
+    client = make_client()
+    clients = {client.id: client}
+    invoices = make_month_end_run(args.invoices)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = PDFCache(cache_dir=Path(workdir) / "pdf")
+        renderer = CanvasPDFGenerator()
+        for invoice in invoices:
+            cache.get_or_render(invoice, company, client, renderer.generate_invoice_pdf,
+                                variant=render_variant(company))
+        log = DeliveryLog(str(Path(workdir) / "delivery_log.jsonl"))
+
+        handler = CountingHandler()
+        controller = Controller(handler, hostname="127.0.0.1", port=args.port)
+        controller.start()
+        failed = False
+        try:
+            print(f"{args.invoices} invoices\n")
+            print(f"{'workers':>7} {'connections':<12} {'sent':>5} {'failed':>6} {'seconds':>8} {'msgs/sec':>9}")
+            for workers in args.workers or [1, 4, 8]:
+                for label, per_connection in (("reused", 100), ("per message", 1)):
+                    settings = SMTPSettings(host="127.0.0.1", port=args.port, use_tls=False,
+                                            workers=workers, max_per_connection=per_connection)
+                    handler.messages = 0
+                    report = InvoiceDelivery(settings, log=log, cache=cache).deliver(invoices, company, clients)
+                    failed = failed or report.failed > 0 or handler.messages != report.sent
+                    print(f"{workers:>7} {label:<12} {report.sent:>5} {report.failed:>6} "
+                          f"{report.elapsed:>8.2f} {report.messages_per_second:>9.1f}")
+        finally:
+            controller.stop()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
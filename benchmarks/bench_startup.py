@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Measure time to first render for every page in a fresh interpreter.
+
+Each page is run once through Streamlit's AppTest in its own process, on a
+scratch copy of the repository and its data, so module imports are paid
+the way a newly started server pays them. Streamlit itself is imported
+before the clock starts. The report also shows whether pandas and
+reportlab were loaded by the render.
+
+Run from the repository root:
+    python benchmarks/bench_startup.py [--repeat N] [--repo PATH]
+
+Point --repo at another checkout (e.g. a `git worktree` of an older
+commit) to compare before and after a change.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+HEAVY_MODULES = ("pandas", "reportlab")
+
+CHILD = r"""
+import json, os, sys, time
+sys.path.insert(0, os.getcwd())
+from streamlit.testing.v1 import AppTest
+heavy = {heavy!r}
+start = time.perf_counter()
+at = AppTest.from_file(os.path.join(os.getcwd(), {page!r}), default_timeout=120).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "error": bool(at.exception),
+                  "loaded": [name for name in heavy if name in sys.modules]}}))
+"""
+
+
+def measure(workdir: Path, page: str) -> dict:
+    result = subprocess.run([sys.executable, "-c", CHILD.format(page=page, heavy=HEAVY_MODULES)],
+                            cwd=workdir, capture_output=True, text=True)
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if not lines:
+        raise RuntimeError(f"{page} failed:\n{result.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per page")
+    parser.add_argument("--repo", type=Path, default=Path(__file__).resolve().parent.parent,
+                        help="Checkout to measure")
+    args = parser.parse_args()
+
+    repo = args.repo.resolve()
+    pages = ["app.py"] + sorted(f"pages/{path.name}" for path in (repo / "pages").glob("*.py"))
+    with tempfile.TemporaryDirectory() as scratch:
+        workdir = Path(scratch) / "app"
+        shutil.copytree(repo, workdir, ignore=shutil.ignore_patterns(".git", "cache", "__pycache__", "logs"))
+        # Compile once so the first measured process doesn't pay for it
+        subprocess.run([sys.executable, "-m", "compileall", "-q", "."], cwd=workdir, check=True)
+
+        print(f"{'page':<30} {'median s':>9} {'min s':>7}  loaded")
+        total = 0.0
+        for page in pages:
+            runs = [measure(workdir, page) for _ in range(args.repeat)]
+            seconds = [run["seconds"] for run in runs]
+            total += statistics.median(seconds)
+            loaded = ", ".join(runs[-1]["loaded"]) or "-"
+            flag = "  (error)" if any(run["error"] for run in runs) else ""
+            print(f"{page:<30} {statistics.median(seconds):>9.3f} {min(seconds):>7.3f}  {loaded}{flag}")
+        print(f"{'total':<30} {total:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
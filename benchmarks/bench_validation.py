@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Measure batch validation throughput for client records.
+
+Run from the repository root:
+    python benchmarks/bench_validation.py [--records N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.validators import CLIENT_VALIDATOR, COMPANY_VALIDATOR
+
+
+def make_records(count: int):
+    records = []
+    for i in range(count):
+        records.append({
+            "name": f"Client {i}",
+            "email": f"accounts{i}@client{i % 97}.ie" if i % 50 else "not-an-email",
+            "phone": "+353 21 456 7890" if i % 3 else "021-456789",
+            "vat_number": "IE1234567T" if i % 40 else "IE9876543P",
+            "credit_limit": float(i % 20 * 500),
+            "address": "1 Quay Street", "city": "Cork", "postal_code": "T12 X5F3",
+            "iban": "IE29 AIBK 9311 5212 3456 78",
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    print(f"{'validator':>10} {'records':>8} {'errors':>7} {'seconds':>8} {'records/sec':>12}")
+    for name, validator in (("client", CLIENT_VALIDATOR), ("company", COMPANY_VALIDATOR)):
+        start = time.perf_counter()
+        errors = validator.validate_batch(records)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10} {len(records):>8} {len(errors):>7} {elapsed:>8.2f} {len(records) / elapsed:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Synthetic Company, Client and Invoice fixtures for the benchmarks.
+
+Fixtures are deterministic so renders can be compared between runs.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.client import Client
+from models.company import Company
+from models.invoice import Invoice, InvoiceItem
+
+LONG_NOTES = (
+    "Delivery to site gate 3 between 07:00 and 15:00 only. Crane offload required; "
+    "driver to call the site foreman 30 minutes before arrival. "
+) * 40
+
+
+def make_company() -> Company:
+    return Company(
+        name="Benchmark Steel Ltd",
+        address="Unit 1, Test Industrial Estate",
+        city="Dublin",
+        county="Dublin",
+        postal_code="D17 K9X3",
+        phone="+353 1 555 2468",
+        email="accounts@example.ie",
+        website="www.example.ie",
+        vat_number="IE1234567T",
+        company_registration="598732",
+        bank_name="Bank of Ireland",
+        bank_account="12345678",
+        bank_sort_code="931152",
+        iban="IE29AIBK93115212345678",
+    )
+
+
+def make_client() -> Client:
+    return Client(
+        id="bench-client",
+        name="Shannon Construction Ltd",
+        contact_person="Patrick O'Sullivan",
+        address="43 Limerick Road",
+        city="Ennis",
+        county="Clare",
+        postal_code="V95 H2X3",
+        phone="+353 65 123 4567",
+        email="accounts@shannon.example.ie",
+        vat_number="IE9876543H",
+        credit_limit=50000.0,
+        created_date="2026-01-01T00:00:00",
+    )
+
+
+def make_item(i: int) -> InvoiceItem:
+    return InvoiceItem(
+        product_id=f"product-{i % 40}",
+        product_name=f"Steel Bar {i % 40 + 10}mm",
+        description="S355 hot rolled, 6m lengths",
+        quantity=1 + i % 7,
+        unit_price=12.5 + i % 5,
+        cuts_required=i % 3,
+        cutting_charge_per_cut=1.5,
+        discount_percentage=2.0 if i % 4 == 0 else 0.0,
+        discount_amount=1.0 if i % 9 == 0 else 0.0,
+    )
+
+
+def make_invoice(line_count: int, notes: str = "Deliver to site gate 3.",
+                 all_charges: bool = False) -> Invoice:
+    invoice = Invoice(
+        id=f"bench-{line_count}",
+        invoice_number="INV-2026-001",
+        client_id="bench-client",
+        client_name="Shannon Construction Ltd",
+        issue_date="2026-01-15",
+        due_date="2026-02-14",
+        notes=notes,
+        created_date="2026-01-15T09:00:00",
+    )
+    if all_charges:
+        invoice.shipping_cost = 85.0
+        invoice.handling_cost = 25.0
+        invoice.other_charges = 40.0
+        invoice.other_charges_description = "Crane hire"
+        invoice.global_discount_percentage = 2.5
+        invoice.global_discount_amount = 50.0
+    invoice.items = [make_item(i) for i in range(line_count)]
+    return invoice
+
+
+# name -> invoice factory
+SCENARIOS = {
+    "1 item": lambda: make_invoice(1),
+    "20 items": lambda: make_invoice(20),
+    "500 items": lambda: make_invoice(500),
+    "5000 items": lambda: make_invoice(5000),
+    "long notes": lambda: make_invoice(20, notes=LONG_NOTES),
+    "all charges": lambda: make_invoice(20, all_charges=True),
+}
@@ -0,0 +1,124 @@
+"""
+Minimal text extraction for reportlab-generated PDFs.
+
+Only understands what reportlab writes (Flate encoded content streams,
+optionally ASCII85 armoured, and literal strings shown with Tj/TJ), which is enough to check
+that the figures on an invoice survive changes to the renderers.
+"""
+
+import base64
+import re
+import zlib
+
+STREAM_RE = re.compile(rb"\bobj\s*(.*?)stream\r?\n", re.S)
+LENGTH_RE = re.compile(rb"/Length\s+(\d+)")
+STRING_RE = re.compile(rb"\((?:\\.|[^\\)])*\)")
+ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _decode_stream(header: bytes, data: bytes) -> bytes:
+    if b"/ASCII85Decode" in header:
+        data = data.strip()
+        if data.endswith(b"~>"):
+            data = data[:-2]
+        data = base64.a85decode(data)
+    if b"/FlateDecode" in header:
+        data = zlib.decompress(data)
+    return data
+
+
+def _unescape(literal: bytes) -> bytes:
+    out = bytearray()
+    i = 1
+    end = len(literal) - 1
+    while i < end:
+        ch = literal[i:i + 1]
+        if ch != b"\\":
+            out += ch
+            i += 1
+            continue
+        nxt = literal[i + 1:i + 2]
+        if nxt in ESCAPES:
+            out += ESCAPES[nxt]
+            i += 2
+        elif nxt.isdigit():
+            digits = re.match(rb"[0-7]{1,3}", literal[i + 1:i + 4]).group(0)
+            out.append(int(digits, 8))
+            i += 1 + len(digits)
+        else:
+            out += nxt
+            i += 2
+    return bytes(out)
+
+
+def _streams(pdf: bytes):
+    """Yield (header, data) for every stream object, sliced by its /Length"""
+    pos = 0
+    while True:
+        match = STREAM_RE.search(pdf, pos)
+        if match is None:
+            return
+        header = match.group(1)
+        length = LENGTH_RE.search(header)
+        start = match.end()
+        if length is None:
+            end = pdf.index(b"endstream", start)
+        else:
+            end = start + int(length.group(1))
+        yield header, pdf[start:end]
+        pos = end
+
+
+def extract_text(pdf: bytes) -> str:
+    """Return every literal string drawn in the PDF, one per line"""
+    strings = []
+    for header, data in _streams(pdf):
+        if b"/Subtype /Image" in header or b"/Length1" in header:
+            continue
+        try:
+            content = _decode_stream(header, data)
+        except (ValueError, zlib.error):
+            continue
+        for literal in STRING_RE.findall(content):
+            strings.append(_unescape(literal).decode("cp1252", errors="replace"))
+    return "\n".join(strings)
+
+
+AMOUNT_RE = re.compile(r"-?€[\d,]+\.\d{2}")
+
+
+def check_invoice_text(text: str, invoice) -> list:
+    """Compare the figures drawn on a PDF with the invoice model.
+
+    Returns a list of problems; empty when every expected figure is present.
+    """
+    from collections import Counter
+
+    problems = []
+    for expected in (invoice.invoice_number, invoice.issue_date, invoice.due_date):
+        if expected and expected not in text:
+            problems.append(f"missing {expected!r}")
+
+    expected_amounts = Counter(f"€{item.line_total:.2f}" for item in invoice.items)
+    expected_amounts.update([
+        f"€{invoice.subtotal:.2f}",
+        f"€{invoice.total_before_vat:.2f}",
+        f"€{invoice.vat_amount:.2f}",
+        f"€{invoice.total_amount:.2f}",
+    ])
+    if invoice.global_discount_total > 0:
+        expected_amounts[f"-€{invoice.global_discount_total:.2f}"] += 1
+    for charge in (invoice.shipping_cost, invoice.handling_cost, invoice.other_charges):
+        if charge > 0:
+            expected_amounts[f"€{charge:.2f}"] += 1
+
+    found_amounts = Counter(AMOUNT_RE.findall(text))
+    for amount, count in expected_amounts.items():
+        if found_amounts[amount] < count:
+            problems.append(f"expected {amount} {count}x, found {found_amounts[amount]}x")
+
+    if f"VAT ({invoice.vat_rate}%):" not in text:
+        problems.append("missing VAT rate label")
+    if invoice.notes and invoice.notes.split()[0] not in text:
+        problems.append("missing notes")
+    return problems
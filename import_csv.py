@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Bulk CSV import for the Irish Steel Billing System.
+
+Loads clients, products or historic invoices from a CSV file into the data
+files, reporting rejected rows with their line numbers. Run from the
+repository root:
+    python import_csv.py clients customers.csv
+    python import_csv.py products catalogue.csv --dry-run
+    python import_csv.py invoices history.csv --encoding cp1252
+"""
+
+import sys
+
+from services.csv_import import main
+
+if __name__ == "__main__":
+    sys.exit(main())
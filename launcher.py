@@ -4,50 +4,180 @@ Launcher script for Irish Steel Billing System
 This script starts the Streamlit application and opens it in the default browser.
 """
 
+import argparse
+import logging
 import subprocess
 import sys
 import os
 import time
+import urllib.request
 import webbrowser
 import threading
+from collections import defaultdict
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 
-def start_streamlit():
+PORT = 8501
+URL = f"http://localhost:{PORT}"
+HEALTH_URL = f"{URL}/_stcore/health"
+STARTUP_TIMEOUT = 120  # Seconds to wait for the server before giving up
+LOG_FILE = Path("logs") / "server.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+IMPORT_TIME_PREFIX = "import time:"
+
+
+class ServerOutput:
+    """Drains the server's output so it can never block on a full pipe.
+
+    Ordinary lines go to a rotating log file. ``-X importtime`` lines are
+    collected for the startup profile until ``collect_imports`` is cleared.
+    """
+
+    def __init__(self, stream, log_file: Path):
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger("billing.server")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        handler = RotatingFileHandler(log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self.logger.addHandler(handler)
+        self.import_lines = []
+        self.collect_imports = True
+        self.recent = []  # Last lines, shown if the server fails to start
+        self.thread = threading.Thread(target=self._drain, args=(stream,), name="server-output", daemon=True)
+        self.thread.start()
+
+    def report(self, lines):
+        """Print startup figures and keep them in the log, so launches can be compared"""
+        for line in lines:
+            print(line)
+            self.logger.info(line)
+
+    def _drain(self, stream):
+        for raw in iter(stream.readline, b""):
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            if line.startswith(IMPORT_TIME_PREFIX):
+                if self.collect_imports:
+                    self.import_lines.append(line)
+                continue
+            self.logger.info(line)
+            self.recent = (self.recent + [line])[-20:]
+        stream.close()
+
+
+def report_first_page_imports(output: ServerOutput, start: int, quiet=2.0, timeout=STARTUP_TIMEOUT):
+    """Once the first page has loaded and its imports have settled, print their profile"""
+    deadline = time.monotonic() + timeout
+    seen, last_change = start, time.monotonic()
+    while time.monotonic() < deadline:
+        time.sleep(0.25)
+        if len(output.import_lines) != seen:
+            seen, last_change = len(output.import_lines), time.monotonic()
+        elif seen > start and time.monotonic() - last_change >= quiet:
+            break
+    output.collect_imports = False
+    if seen > start:
+        output.report(summarise_import_times(output.import_lines[start:seen], "First page load imports"))
+
+
+def wait_until_ready(process, timeout=STARTUP_TIMEOUT) -> bool:
+    """Poll the health endpoint with backoff until it answers, the server exits or time runs out"""
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(HEALTH_URL, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(delay)
+        delay = min(delay * 1.5, 1.0)
+    return False
+
+
+def summarise_import_times(lines, title="Startup imports", top=10):
+    """Total import time, the slowest top-level packages and the slowest modules from -X importtime output"""
+    packages = defaultdict(int)
+    modules = []
+    count = 0
+    for line in lines:
+        # import time: self [us] | cumulative | imported package
+        try:
+            self_us, cumulative_us, name = line[len(IMPORT_TIME_PREFIX):].split("|", 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # Header line
+        count += 1
+        module = name.strip()
+        packages[module.split(".")[0]] += self_us
+        if name.startswith(" ") and not name.startswith("  "):
+            modules.append((cumulative_us, module))  # Imported directly, not as a dependency
+    total = sum(packages.values())
+    report = [f"{title}: {total / 1e6:.2f}s across {count} modules"]
+    report.append("  Slowest packages: " + ", ".join(
+        f"{name} {us / 1e6:.2f}s" for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]))
+    report.append("  Slowest top-level imports: " + ", ".join(
+        f"{name} {us / 1e6:.2f}s" for us, name in sorted(modules, reverse=True)[:top]))
+    return report
+
+
+def start_streamlit(profile_imports=True):
     """Start the Streamlit application"""
     # Get the directory where this script is located
     script_dir = Path(__file__).parent.absolute()
     os.chdir(script_dir)
-    
+
     # Start Streamlit with specific configuration
     cmd = [
-        sys.executable, "-m", "streamlit", "run", "app.py",
+        sys.executable, *(["-X", "importtime"] if profile_imports else []),
+        "-m", "streamlit", "run", "app.py",
         "--server.headless", "true",
-        "--server.port", "8501",
+        "--server.port", str(PORT),
         "--server.address", "localhost",
         "--browser.serverAddress", "localhost"
     ]
-    
+
     print("Starting Irish Steel Billing System...")
     print("Please wait while the application loads...")
-    
-    # Start Streamlit process
-    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    
-    # Wait a moment for the server to start
-    time.sleep(3)
-    
+
+    # Start Streamlit process; its output is streamed to the log file
+    started = time.monotonic()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = ServerOutput(process.stdout, LOG_FILE)
+
+    # Open the browser as soon as the server answers
+    if not wait_until_ready(process):
+        print("The application did not start. Last server output:")
+        print("\n".join(output.recent) or "(none)")
+        print(f"Full log: {LOG_FILE.absolute()}")
+        if process.poll() is None:
+            process.terminate()
+        raise RuntimeError("Streamlit server did not become ready")
+    output.report([f"Server ready in {time.monotonic() - started:.1f}s"])
+    if profile_imports:
+        server_imports = len(output.import_lines)
+        output.report(summarise_import_times(output.import_lines[:server_imports]))
+        threading.Thread(target=report_first_page_imports, args=(output, server_imports),
+                         name="import-profile", daemon=True).start()
+    else:
+        output.collect_imports = False
+
     # Open browser
-    url = "http://localhost:8501"
-    print(f"Opening application in browser: {url}")
-    webbrowser.open(url)
-    
+    print(f"Opening application in browser: {URL}")
+    webbrowser.open(URL)
+
     print("\n" + "="*50)
     print("Irish Steel Billing System is now running!")
     print("If the browser didn't open automatically, go to:")
-    print(f"  {url}")
+    print(f"  {URL}")
+    print(f"Server log: {LOG_FILE.absolute()}")
     print("\nTo stop the application, close this window or press Ctrl+C")
     print("="*50 + "\n")
-    
+
     # Wait for the process to complete
     try:
         process.wait()
@@ -57,9 +187,13 @@ def start_streamlit():
         process.wait()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Start the Irish Steel Billing System")
+    parser.add_argument("--no-import-profile", action="store_true",
+                        help="Skip the -X importtime startup profile")
+    args = parser.parse_args()
     try:
-        start_streamlit()
+        start_streamlit(profile_imports=not args.no_import_profile)
     except Exception as e:
         print(f"Error starting application: {e}")
         input("Press Enter to exit...")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -1,8 +1,8 @@
 from dataclasses import dataclass, asdict
 from typing import List, Optional
-import json
 from datetime import datetime
 import uuid
+from models.schema import read_records, write_records
 
 @dataclass
 class Client:
@@ -39,16 +39,10 @@ class ClientManager:
         self.clients = self.load_clients()
     
     def load_clients(self) -> List[Client]:
-        try:
-            with open(self.filepath, 'r') as f:
-                data = json.load(f)
-                return [Client.from_dict(client_data) for client_data in data]
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return [Client.from_dict(client_data) for client_data in read_records(self.filepath, "clients")]
     
     def save_clients(self):
-        with open(self.filepath, 'w') as f:
-            json.dump([client.to_dict() for client in self.clients], f, indent=2)
+        write_records(self.filepath, "clients", [client.to_dict() for client in self.clients])
     
     def add_client(self, client: Client):
         client.id = str(uuid.uuid4())
@@ -70,6 +64,13 @@ class ClientManager:
         self.clients = [client for client in self.clients if client.id != client_id]
         self.save_clients()
     
+    def merge_clients(self, kept: Client, duplicate_ids: List[str]):
+        """Save the merged client and drop its duplicates in one write"""
+        duplicates = set(duplicate_ids) - {kept.id}
+        self.clients = [kept if client.id == kept.id else client
+                        for client in self.clients if client.id not in duplicates]
+        self.save_clients()
+    
     def get_client(self, client_id: str) -> Optional[Client]:
         for client in self.clients:
             if client.id == client_id:
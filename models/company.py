@@ -1,6 +1,8 @@
 from dataclasses import dataclass, asdict
+from pathlib import Path
 from typing import Optional
-import json
+import hashlib
+from models.schema import read_records, write_records
 
 @dataclass
 class Company:
@@ -19,6 +21,8 @@ class Company:
     bank_account: str = ""
     bank_sort_code: str = ""
     iban: str = ""
+    logo_path: str = ""
+    pdf_profile: str = "standard"  # Output profile for invoice PDFs: standard, compact or archive
     
     def to_dict(self):
         return asdict(self)
@@ -27,18 +31,30 @@ class Company:
     def from_dict(cls, data):
         return cls(**data)
     
+    def store_logo(self, data: bytes, suffix: str, directory="data/logos"):
+        """Save logo bytes under a content-addressed name and point logo_path at it.
+
+        A new logo gets a new path, so anything keyed on the company fields
+        (PDF templates, rendered PDF cache) picks up the change.
+        """
+        logo_dir = Path(directory)
+        logo_dir.mkdir(parents=True, exist_ok=True)
+        path = logo_dir / f"logo_{hashlib.sha256(data).hexdigest()[:12]}{suffix.lower()}"
+        if not path.exists():
+            path.write_bytes(data)
+        self.remove_logo(keep=path)
+        self.logo_path = path.as_posix()
+    
+    def remove_logo(self, keep: Optional[Path] = None):
+        """Delete the stored logo file, unless it is the one being kept"""
+        if self.logo_path and (keep is None or Path(self.logo_path) != keep):
+            Path(self.logo_path).unlink(missing_ok=True)
+        self.logo_path = ""
+    
     def save(self, filepath="data/company.json"):
-        with open(filepath, 'w') as f:
-            json.dump(self.to_dict(), f, indent=2)
+        write_records(filepath, "company", [self.to_dict()])
     
     @classmethod
     def load(cls, filepath="data/company.json"):
-        try:
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-                if data:  # If file has data
-                    return cls.from_dict(data)
-                else:  # If file is empty
-                    return cls()
-        except (FileNotFoundError, json.JSONDecodeError):
-            return cls()
+        records = read_records(filepath, "company")
+        return cls.from_dict(records[0]) if records else cls()
@@ -1,9 +1,9 @@
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field
 from typing import List, Optional
-import json
 import uuid
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
+from models.schema import read_records, write_records
 
 @dataclass
 class InvoiceItem:
@@ -16,6 +16,11 @@ class InvoiceItem:
     cutting_charge_per_cut: float = 0.0
     discount_percentage: float = 0.0
     discount_amount: float = 0.0
+    unit_weight_kg: float = 0.0  # Recorded when the item is added
+    
+    @property
+    def weight_kg(self) -> float:
+        return self.quantity * self.unit_weight_kg
     
     @property
     def line_total_before_discount(self) -> float:
@@ -113,6 +118,11 @@ class Invoice:
         """Final total including VAT"""
         return self.total_before_vat + self.vat_amount
     
+    @property
+    def total_weight_kg(self) -> float:
+        """Sum of the weights recorded on the items"""
+        return sum(item.weight_kg for item in self.items)
+    
     def add_item(self, item: InvoiceItem):
         self.items.append(item)
         self.last_modified = datetime.now().isoformat()
@@ -123,8 +133,8 @@ class Invoice:
             self.last_modified = datetime.now().isoformat()
     
     def to_dict(self):
-        data = asdict(self)
-        return data
+        # Items hold only plain values, so a copy per item is enough; asdict would deep-copy every value
+        return {**vars(self), "items": [dict(vars(item)) for item in self.items]}
     
     @classmethod
     def from_dict(cls, data):
@@ -140,16 +150,10 @@ class InvoiceManager:
         self.invoices = self.load_invoices()
     
     def load_invoices(self) -> List[Invoice]:
-        try:
-            with open(self.filepath, 'r') as f:
-                data = json.load(f)
-                return [Invoice.from_dict(invoice_data) for invoice_data in data]
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return [Invoice.from_dict(invoice_data) for invoice_data in read_records(self.filepath, "invoices")]
     
     def save_invoices(self):
-        with open(self.filepath, 'w') as f:
-            json.dump([invoice.to_dict() for invoice in self.invoices], f, indent=2)
+        write_records(self.filepath, "invoices", [invoice.to_dict() for invoice in self.invoices])
     
     def add_invoice(self, invoice: Invoice):
         if not invoice.invoice_number:
@@ -172,6 +176,109 @@ class InvoiceManager:
         self.invoices = [invoice for invoice in self.invoices if invoice.id != invoice_id]
         self.save_invoices()
     
+    def set_status(self, invoice_ids, status: str, only_from=None) -> int:
+        """Set the status of several invoices with a single write.
+
+        With ``only_from``, invoices whose current status is not listed are
+        left alone. Returns the number of invoices changed.
+        """
+        ids = set(invoice_ids)
+        changed = 0
+        for invoice in self.invoices:
+            if invoice.id in ids and invoice.status != status and (only_from is None or invoice.status in only_from):
+                invoice.status = status
+                invoice.last_modified = datetime.now().isoformat()
+                changed += 1
+        if changed:
+            self.save_invoices()
+        return changed
+    
+    def reassign_client(self, from_client_ids, to_client_id: str) -> int:
+        """Move every invoice of the given clients to another client in one write.
+
+        The client name printed on each invoice is left as it was issued.
+        Returns the number of invoices moved.
+        """
+        ids = set(from_client_ids) - {to_client_id}
+        now = datetime.now().isoformat()
+        moved = 0
+        for invoice in self.invoices:
+            if invoice.client_id in ids:
+                invoice.client_id = to_client_id
+                invoice.last_modified = now
+                moved += 1
+        if moved:
+            self.save_invoices()
+        return moved
+    
+    def find_invoices(self, statuses=None, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      client_ids=None) -> List[Invoice]:
+        """Invoices matching every given filter; issue dates are inclusive"""
+        start = date_from.isoformat() if date_from else ""
+        end = date_to.isoformat() if date_to else ""
+        return [
+            invoice for invoice in self.invoices
+            if (not statuses or invoice.status in statuses)
+            and (not client_ids or invoice.client_id in client_ids)
+            and (not start or invoice.issue_date >= start)
+            and (not end or invoice.issue_date <= end)
+        ]
+    
+    @staticmethod
+    def repriced(invoice: Invoice, vat_rate: Optional[float] = None, price_change_percentage: float = 0.0,
+                 price_change_amount: float = 0.0) -> Invoice:
+        """Copy of the invoice with a new VAT rate and/or adjusted unit prices.
+
+        Unit prices change by the percentage first, then by the fixed amount
+        per unit, and never go below zero.
+        """
+        updated = Invoice.from_dict(invoice.to_dict())
+        if vat_rate is not None:
+            updated.vat_rate = vat_rate
+        if price_change_percentage or price_change_amount:
+            factor = 1 + price_change_percentage / 100
+            for item in updated.items:
+                price = item.unit_price * factor + price_change_amount
+                item.unit_price = float(Decimal(str(max(price, 0.0))).quantize(Decimal("0.01"), ROUND_HALF_UP))
+        return updated
+    
+    def preview_bulk_update(self, invoices: List[Invoice], **changes) -> List[dict]:
+        """Before/after totals for a bulk update, without changing anything"""
+        rows = []
+        for invoice in invoices:
+            updated = self.repriced(invoice, **changes)
+            rows.append({
+                "id": invoice.id,
+                "invoice_number": invoice.invoice_number,
+                "client_name": invoice.client_name,
+                "status": invoice.status,
+                "vat_rate_before": invoice.vat_rate,
+                "vat_rate_after": updated.vat_rate,
+                "total_before": invoice.total_amount,
+                "total_after": updated.total_amount,
+                "difference": updated.total_amount - invoice.total_amount,
+            })
+        return rows
+    
+    def apply_bulk_update(self, invoice_ids, **changes) -> int:
+        """Apply a VAT/price change to several invoices and save them in one write.
+
+        Takes the same keyword arguments as ``repriced``. Returns the number
+        of invoices updated.
+        """
+        ids = set(invoice_ids)
+        now = datetime.now().isoformat()
+        changed = 0
+        for i, invoice in enumerate(self.invoices):
+            if invoice.id in ids:
+                updated = self.repriced(invoice, **changes)
+                updated.last_modified = now
+                self.invoices[i] = updated
+                changed += 1
+        if changed:
+            self.save_invoices()
+        return changed
+    
     def get_invoice(self, invoice_id: str) -> Optional[Invoice]:
         for invoice in self.invoices:
             if invoice.id == invoice_id:
@@ -1,7 +1,17 @@
 from dataclasses import dataclass, asdict
-from typing import List, Optional
-import json
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Tuple
+import csv
 import uuid
+from models.schema import read_records, write_records
+
+PRICE_FIELDS = ("base_price", "cutting_charge")
+
+
+def _adjust_price(price: float, percentage: float, amount: float) -> float:
+    """Apply a percentage then a fixed change, rounded to cents and never negative"""
+    adjusted = max(price * (1 + percentage / 100) + amount, 0.0)
+    return float(Decimal(str(adjusted)).quantize(Decimal("0.01"), ROUND_HALF_UP))
 
 @dataclass
 class Product:
@@ -16,7 +26,7 @@ class Product:
     cutting_charge: float = 0.0  # EUR per cut
     unit_of_measure: str = "length"  # length, weight, piece
     finish: str = "Hot Rolled"  # Hot Rolled, Cold Rolled, Galvanized
-    stock_quantity: int = 0
+    stock_quantity: float = 0  # Kept in step with the stock ledger
     min_order_quantity: int = 1
     is_cuttable: bool = True
     is_active: bool = True
@@ -34,16 +44,10 @@ class ProductManager:
         self.products = self.load_products()
     
     def load_products(self) -> List[Product]:
-        try:
-            with open(self.filepath, 'r') as f:
-                data = json.load(f)
-                return [Product.from_dict(product_data) for product_data in data]
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return [Product.from_dict(product_data) for product_data in read_records(self.filepath, "products")]
     
     def save_products(self):
-        with open(self.filepath, 'w') as f:
-            json.dump([product.to_dict() for product in self.products], f, indent=2)
+        write_records(self.filepath, "products", [product.to_dict() for product in self.products])
     
     def add_product(self, product: Product):
         product.id = str(uuid.uuid4())
@@ -75,3 +79,108 @@ class ProductManager:
     
     def get_all_products(self) -> List[Product]:
         return self.products
+    
+    def find_products(self, categories=None, grades=None, finishes=None, active_only: bool = False) -> List[Product]:
+        """Products matching every given filter"""
+        return [
+            product for product in self.products
+            if (not categories or product.category in categories)
+            and (not grades or product.grade in grades)
+            and (not finishes or product.finish in finishes)
+            and (not active_only or product.is_active)
+        ]
+    
+    @staticmethod
+    def plan_price_change(products: Iterable[Product], base_percentage: float = 0.0, base_amount: float = 0.0,
+                          cutting_percentage: float = 0.0, cutting_amount: float = 0.0) -> Dict[str, dict]:
+        """New prices for a percentage and/or absolute change, as {product_id: {field: price}}"""
+        updates = {}
+        for product in products:
+            updates[product.id] = {
+                "base_price": _adjust_price(product.base_price, base_percentage, base_amount),
+                "cutting_charge": _adjust_price(product.cutting_charge, cutting_percentage, cutting_amount),
+            }
+        return updates
+    
+    def read_price_list(self, stream) -> Tuple[Dict[str, dict], List[str]]:
+        """Parse a supplier price CSV into {product_id: {field: price}}.
+
+        Rows are matched on an ``id`` column, or on ``name`` (case-insensitive)
+        when there is no id. ``base_price`` and/or ``cutting_charge`` columns
+        supply the new prices; empty cells keep the current price. Returns the
+        updates and a list of row errors.
+        """
+        by_id = {product.id: product for product in self.products}
+        by_name = {product.name.strip().lower(): product for product in self.products}
+        updates, errors = {}, []
+        
+        reader = csv.DictReader(stream)
+        fields = {name.strip().lower() for name in reader.fieldnames or []}
+        if not fields & {"id", "name"} or not fields & set(PRICE_FIELDS):
+            return {}, ["CSV needs an id or name column and a base_price or cutting_charge column"]
+        
+        for line, row in enumerate(reader, start=2):
+            row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+            product = by_id.get(row.get("id", "")) or by_name.get(row.get("name", "").lower())
+            if product is None:
+                errors.append(f"Line {line}: no product matches '{row.get('id') or row.get('name')}'")
+                continue
+            
+            prices = {}
+            for field in PRICE_FIELDS:
+                value = row.get(field, "")
+                if not value:
+                    continue
+                try:
+                    price = float(value.replace("€", "").replace(",", ""))
+                except ValueError:
+                    errors.append(f"Line {line}: invalid {field} '{value}'")
+                    continue
+                if price < 0:
+                    errors.append(f"Line {line}: {field} cannot be negative")
+                    continue
+                prices[field] = round(price, 2)
+            
+            if prices:
+                updates.setdefault(product.id, {}).update(prices)
+        return updates, errors
+    
+    def preview_price_updates(self, updates: Dict[str, dict]) -> List[dict]:
+        """Before/after prices for the products an update would change"""
+        rows = []
+        for product in self.products:
+            prices = updates.get(product.id)
+            if not prices:
+                continue
+            new_base = prices.get("base_price", product.base_price)
+            new_cutting = prices.get("cutting_charge", product.cutting_charge)
+            if new_base == product.base_price and new_cutting == product.cutting_charge:
+                continue
+            rows.append({
+                "id": product.id,
+                "name": product.name,
+                "category": product.category,
+                "grade": product.grade,
+                "finish": product.finish,
+                "base_price_before": product.base_price,
+                "base_price_after": new_base,
+                "cutting_charge_before": product.cutting_charge,
+                "cutting_charge_after": new_cutting,
+            })
+        return rows
+    
+    def apply_price_updates(self, updates: Dict[str, dict]) -> int:
+        """Set new prices on many products and save them in one write"""
+        changed = 0
+        for product in self.products:
+            prices = updates.get(product.id)
+            if not prices:
+                continue
+            before = (product.base_price, product.cutting_charge)
+            product.base_price = prices.get("base_price", product.base_price)
+            product.cutting_charge = prices.get("cutting_charge", product.cutting_charge)
+            if (product.base_price, product.cutting_charge) != before:
+                changed += 1
+        if changed:
+            self.save_products()
+        return changed
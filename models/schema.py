@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+SCHEMA_KEY = "schema_version"
+RECORDS_KEY = "records"
+
+# Version of the records each data file holds. When a model's stored shape
+# changes, bump its version here and register a migration from the previous
+# version with @migration.
+SCHEMA_VERSIONS = {
+    "company": 1,
+    "clients": 1,
+    "products": 1,
+    "invoices": 1,
+    "tonnage_prices": 1,
+}
+
+# The company file holds one object with the version stamped alongside its
+# fields; the other files hold {"schema_version": N, "records": [...]}
+SINGLE_RECORD = {"company"}
+
+# (kind, from_version) -> function turning one record into the next version
+MIGRATIONS: Dict[Tuple[str, int], Callable[[dict], dict]] = {}
+
+
+class SchemaError(ValueError):
+    """A data file that this version of the app cannot read"""
+
+
+def migration(kind: str, from_version: int):
+    """Register a record transform from ``from_version`` to ``from_version + 1``"""
+    def register(transform: Callable[[dict], dict]):
+        MIGRATIONS[(kind, from_version)] = transform
+        return transform
+    return register
+
+
+def _stamp_only(record: dict) -> dict:
+    return record
+
+
+# Version 0 is a file written before versions were recorded: a bare list or
+# object whose records already have the version 1 shape
+for _kind in SCHEMA_VERSIONS:
+    MIGRATIONS[(_kind, 0)] = _stamp_only
+
+
+def unwrap(kind: str, data) -> Tuple[int, List[dict]]:
+    """The schema version and the records of a parsed data file"""
+    if kind in SINGLE_RECORD:
+        if not isinstance(data, dict):
+            return 0, []
+        data = dict(data)
+        version = data.pop(SCHEMA_KEY, 0)
+        return version, [data] if data else []
+    if isinstance(data, list):
+        return 0, data
+    if isinstance(data, dict):
+        return data.get(SCHEMA_KEY, 0), data.get(RECORDS_KEY, [])
+    return 0, []
+
+
+def migrate_records(kind: str, version: int, records: Iterable[dict]) -> Iterator[dict]:
+    """Bring records of ``version`` up to the current version, one record at a time.
+
+    Raises SchemaError straight away, before any record is read, when the
+    data is newer than this app.
+    """
+    current = SCHEMA_VERSIONS[kind]
+    if version > current:
+        raise SchemaError(f"{kind} data is schema version {version}; this app reads up to {current}")
+    steps = [MIGRATIONS[(kind, step)] for step in range(version, current)]
+    return _migrate(steps, records)
+
+
+def _migrate(steps: List[Callable[[dict], dict]], records: Iterable[dict]) -> Iterator[dict]:
+    for record in records:
+        for transform in steps:
+            record = transform(record)
+        yield record
+
+
+def read_records(filepath: str, kind: str) -> List[dict]:
+    """Records of a data file at the current schema version.
+
+    A current file is returned as stored. An older one is migrated in
+    memory, one check per file rather than per record; the bootstrap
+    rewrites it so later loads take the fast path.
+    """
+    try:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+    version, records = unwrap(kind, data)
+    if version == SCHEMA_VERSIONS[kind]:
+        return records
+    return list(migrate_records(kind, version, records))
+
+
+def write_records(filepath: str, kind: str, records: List[dict]):
+    """Save records with the current schema version.
+
+    The file is written beside the target and swapped in, so a reader on
+    another thread sees the old or the new file, never a truncated one.
+    """
+    if kind in SINGLE_RECORD:
+        f, tmp_path = _open_temp(filepath)
+        try:
+            with f:
+                json.dump({SCHEMA_KEY: SCHEMA_VERSIONS[kind], **(records[0] if records else {})}, f, indent=2)
+            _replace(tmp_path, filepath)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return
+    writer = RecordWriter(filepath, kind)
+    try:
+        for record in records:
+            writer.write(record)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+
+
+def _open_temp(filepath: str):
+    """A new temporary file in the target's directory, as (file, path)"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filepath)), suffix=".tmp")
+    if os.path.exists(filepath):
+        shutil.copymode(filepath, tmp_path)  # mkstemp files are owner-only
+    return os.fdopen(fd, "w"), tmp_path
+
+
+def _replace(tmp_path: str, filepath: str, attempts: int = 20):
+    """Swap a written temporary file in for the target.
+
+    Windows refuses to replace a file another thread has open, and readers
+    only hold it for the length of a json.load, so wait briefly for them.
+    """
+    for attempt in range(attempts):
+        try:
+            os.replace(tmp_path, filepath)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.05)
+
+
+class RecordWriter:
+    """Writes a list data file record by record and swaps it in on commit.
+
+    Records go to a temporary file next to the target, so the data file is
+    replaced in one step and is never seen half written.
+    """
+
+    def __init__(self, filepath: str, kind: str):
+        self.filepath = filepath
+        self.f, self.tmp_path = _open_temp(filepath)
+        self.f.write(f'{{"{SCHEMA_KEY}": {SCHEMA_VERSIONS[kind]}, "{RECORDS_KEY}": [')
+        self.count = 0
+
+    def write(self, record: dict):
+        # One compact record per line: json's C encoder is only used without indent
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(record))
+        self.count += 1
+
+    def commit(self):
+        self.f.write("\n]}" if self.count else "]}")
+        self.f.close()
+        try:
+            _replace(self.tmp_path, self.filepath)
+        except BaseException:
+            os.remove(self.tmp_path)
+            raise
+
+    def discard(self):
+        self.f.close()
+        os.remove(self.tmp_path)
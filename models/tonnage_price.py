@@ -0,0 +1,51 @@
+from dataclasses import dataclass, asdict
+from typing import List
+from datetime import datetime
+from models.schema import read_records, write_records
+
+@dataclass
+class TonnagePrice:
+    category: str
+    grade: str = ""  # Empty matches any grade in the category
+    finish: str = ""  # Empty matches any finish
+    price_per_tonne: float = 0.0  # EUR per metric tonne
+    effective_date: str = ""
+    
+    def __post_init__(self):
+        if not self.effective_date:
+            self.effective_date = datetime.now().strftime("%Y-%m-%d")
+    
+    @property
+    def key(self):
+        return (self.category, self.grade, self.finish)
+    
+    def to_dict(self):
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+class TonnagePriceManager:
+    """Weekly price-per-tonne table, one row per (category, grade, finish)"""
+    
+    def __init__(self, filepath="data/tonnage_prices.json"):
+        self.filepath = filepath
+        self.prices = self.load_prices()
+    
+    def load_prices(self) -> List[TonnagePrice]:
+        return [TonnagePrice.from_dict(price_data) for price_data in read_records(self.filepath, "tonnage_prices")]
+    
+    def save_prices(self):
+        write_records(self.filepath, "tonnage_prices", [price.to_dict() for price in self.prices])
+    
+    def replace_prices(self, prices: List[TonnagePrice]):
+        """Replace the whole table in one write; later rows win on duplicate keys"""
+        by_key = {}
+        for price in prices:
+            by_key[price.key] = price
+        self.prices = list(by_key.values())
+        self.save_prices()
+    
+    def get_all_prices(self) -> List[TonnagePrice]:
+        return self.prices
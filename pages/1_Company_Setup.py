@@ -1,9 +1,21 @@
 import streamlit as st
+from pathlib import Path
 from models.company import Company
-from utils.validators import Validators
+from services.invoice_delivery import SMTPSettings
+from services.pdf_output import PROFILES
+from utils.validators import COMPANY_VALIDATOR, Validators
 from utils.formatters import Formatters
+from services.bootstrap import ERROR_ADVICE, bootstrap, bootstrap_errors
+from services.api import start_api
+from services.warmup import start_warmup
 
 st.set_page_config(page_title="Company Setup", page_icon="🏢", layout="wide")
+bootstrap()
+if bootstrap_errors():
+    st.error("\n\n".join([ERROR_ADVICE, *bootstrap_errors()]))
+    st.stop()
+start_warmup()
+start_api()
 
 st.title("🏢 Company Setup")
 st.markdown("Configure your company information for invoices and business documents.")
@@ -53,44 +65,43 @@ with st.form("company_form"):
         bank_sort_code = st.text_input("Sort Code", value=company.bank_sort_code, help="6 digits: 12-34-56")
         iban = st.text_input("IBAN", value=company.iban, help="Irish format: IE29 AIBK 9311 5212 3456 78")
     
+    st.subheader("Logo")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        logo_file = st.file_uploader("Company Logo", type=["png", "jpg", "jpeg"],
+                                     help="Shown top right on invoices; large images are downscaled automatically")
+        
+    with col2:
+        remove_logo = False
+        if company.logo_path and Path(company.logo_path).exists():
+            st.image(company.logo_path, width=150)
+            remove_logo = st.checkbox("Remove current logo")
+    
+    st.subheader("Invoice PDFs")
+    profile_names = list(PROFILES)
+    pdf_profile = st.selectbox("PDF output", profile_names,
+                               index=profile_names.index(company.pdf_profile) if company.pdf_profile in PROFILES else 0,
+                               format_func=lambda profile: PROFILES[profile].description,
+                               help="Used for downloads and emailed invoices")
+    
     submitted = st.form_submit_button("Save Company Information", use_container_width=True)
     
     if submitted:
-        errors = []
-        
-        # Validate required fields
-        if not name.strip():
-            errors.append("Company name is required")
-        if not address.strip():
-            errors.append("Address is required")
-        if not city.strip():
-            errors.append("City is required")
-        
-        # Validate optional fields
-        if email:
-            valid, error = Validators.validate_email(email)
-            if not valid:
-                errors.append(f"Email: {error}")
-        
-        if phone:
-            valid, error = Validators.validate_phone(phone)
-            if not valid:
-                errors.append(f"Phone: {error}")
-        
-        if vat_number:
-            valid, error = Validators.validate_vat_number(vat_number)
-            if not valid:
-                errors.append(f"VAT Number: {error}")
+        errors = [str(error) for error in COMPANY_VALIDATOR.validate({
+            "name": name, "address": address, "city": city, "email": email, "phone": phone,
+            "vat_number": vat_number, "iban": iban, "postal_code": postal_code,
+        })]
         
-        if iban:
-            valid, error = Validators.validate_iban(iban)
-            if not valid:
-                errors.append(f"IBAN: {error}")
-        
-        if postal_code:
-            valid, error = Validators.validate_postal_code(postal_code)
-            if not valid:
-                errors.append(f"Postal Code: {error}")
+        logo_data = logo_file.getvalue() if logo_file else None
+        if logo_data:
+            from PIL import Image
+            try:
+                with Image.open(logo_file) as image:
+                    image.verify()
+            except Exception:
+                errors.append("Logo: file is not a valid PNG or JPEG image")
         
         if errors:
             for error in errors:
@@ -112,13 +123,69 @@ with st.form("company_form"):
                 bank_name=bank_name.strip(),
                 bank_account=bank_account.strip(),
                 bank_sort_code=bank_sort_code.strip(),
-                iban=iban.strip()
+                iban=iban.strip(),
+                logo_path=company.logo_path,
+                pdf_profile=pdf_profile
             )
             
+            if logo_data:
+                updated_company.store_logo(logo_data, Path(logo_file.name).suffix)
+            elif remove_logo:
+                updated_company.remove_logo()
+            
             updated_company.save()
             st.success("✅ Company information saved successfully!")
             st.rerun()
 
+# Email delivery settings
+smtp_settings = SMTPSettings.load()
+
+with st.expander("📧 Email Delivery (SMTP)", expanded=not smtp_settings.configured):
+    with st.form("smtp_form"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            smtp_host = st.text_input("SMTP Server", value=smtp_settings.host, help="e.g., smtp.office365.com")
+            smtp_port = st.number_input("Port", min_value=1, max_value=65535, value=smtp_settings.port)
+            smtp_security = st.selectbox("Security", ["STARTTLS", "SSL/TLS", "None"],
+                                         index=0 if smtp_settings.use_tls and not smtp_settings.use_ssl
+                                         else 1 if smtp_settings.use_ssl else 2)
+            smtp_sender = st.text_input("From Address", value=smtp_settings.sender,
+                                        help="Leave empty to use the company email")
+        
+        with col2:
+            smtp_username = st.text_input("Username", value=smtp_settings.username)
+            smtp_password = st.text_input("Password", type="password",
+                                          placeholder="Saved; leave empty to keep" if smtp_settings.password else "")
+            clear_password = st.checkbox("Clear saved password", disabled=not smtp_settings.password)
+            smtp_workers = st.number_input("Parallel Connections", min_value=1, max_value=16,
+                                           value=smtp_settings.workers)
+            smtp_rate = st.number_input("Max Emails per Second", min_value=0.0, value=smtp_settings.max_per_second,
+                                        step=1.0, help="0 for no limit; many providers cap sending rates")
+        
+        if st.form_submit_button("Save Email Settings", use_container_width=True):
+            if smtp_sender:
+                valid, error = Validators.validate_email(smtp_sender)
+                if not valid:
+                    st.error(f"From Address: {error}")
+                    st.stop()
+            
+            SMTPSettings(
+                host=smtp_host.strip(),
+                port=int(smtp_port),
+                username=smtp_username.strip(),
+                password=smtp_password or ("" if clear_password else smtp_settings.password),
+                use_tls=smtp_security == "STARTTLS",
+                use_ssl=smtp_security == "SSL/TLS",
+                sender=smtp_sender.strip(),
+                workers=int(smtp_workers),
+                max_per_second=float(smtp_rate),
+                max_per_connection=smtp_settings.max_per_connection,
+                timeout=smtp_settings.timeout,
+            ).save()
+            st.success("✅ Email settings saved successfully!")
+            st.rerun()
+
 # Preview section
 if company.name:
     st.markdown("---")
@@ -170,6 +237,10 @@ with st.expander("💡 Setup Tips"):
     - IBAN is required for customers to make payments
     - Sort code format: 12-34-56 (6 digits with hyphens)
     
+    **Logo:**
+    - PNG or JPEG; it is downscaled and re-encoded once, so large files do not bloat invoice PDFs
+    - Use a transparent PNG if the logo should sit on a non-white background
+    
     **Phone Numbers:**
     - Irish landline: +353 1 234 5678 or 01 234 5678
     - Irish mobile: +353 87 123 4567 or 087 123 4567
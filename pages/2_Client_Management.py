@@ -1,10 +1,21 @@
 import streamlit as st
 from models.client import Client, ClientManager
-from utils.validators import Validators
+from models.invoice import InvoiceManager
+from services.catalog import get_catalog
+from services.client_dedup import DuplicateDetector, merge_clients
+from utils.validators import CLIENT_VALIDATOR
 from utils.formatters import Formatters
-import pandas as pd
+from services.bootstrap import ERROR_ADVICE, bootstrap, bootstrap_errors
+from services.api import start_api
+from services.warmup import start_warmup
 
 st.set_page_config(page_title="Client Management", page_icon="👥", layout="wide")
+bootstrap()
+if bootstrap_errors():
+    st.error("\n\n".join([ERROR_ADVICE, *bootstrap_errors()]))
+    st.stop()
+start_warmup()
+start_api()
 
 st.title("👥 Client Management")
 st.markdown("Manage your customer database and billing information.")
@@ -15,7 +26,7 @@ client_manager = ClientManager()
 # Sidebar for actions
 with st.sidebar:
     st.subheader("Actions")
-    action = st.radio("Choose Action:", ["View Clients", "Add New Client", "Edit Client"])
+    action = st.radio("Choose Action:", ["View Clients", "Add New Client", "Edit Client", "Find Duplicates"])
 
 if action == "View Clients":
     st.subheader("Client Database")
@@ -114,27 +125,8 @@ elif action == "Add New Client":
         submitted = st.form_submit_button("Add Client", use_container_width=True)
         
         if submitted:
-            errors = []
-            
-            # Validate required fields
-            if not name.strip():
-                errors.append("Company name is required")
-            
-            # Validate optional fields
-            if email:
-                valid, error = Validators.validate_email(email)
-                if not valid:
-                    errors.append(f"Email: {error}")
-            
-            if phone:
-                valid, error = Validators.validate_phone(phone)
-                if not valid:
-                    errors.append(f"Phone: {error}")
-            
-            if vat_number:
-                valid, error = Validators.validate_vat_number(vat_number)
-                if not valid:
-                    errors.append(f"VAT Number: {error}")
+            errors = [str(error) for error in CLIENT_VALIDATOR.validate(
+                {"name": name, "email": email, "phone": phone, "vat_number": vat_number})]
             
             if errors:
                 for error in errors:
@@ -157,7 +149,7 @@ elif action == "Add New Client":
                     notes=notes.strip()
                 )
                 
-                client_id = client_manager.add_client(new_client)
+                client_id = get_catalog().add_client(new_client)
                 st.success(f"✅ Client '{name}' added successfully!")
                 st.rerun()
 
@@ -220,27 +212,8 @@ elif action == "Edit Client":
                     st.rerun()
                 
                 if submitted:
-                    errors = []
-                    
-                    # Validate required fields
-                    if not name.strip():
-                        errors.append("Company name is required")
-                    
-                    # Validate optional fields
-                    if email:
-                        valid, error = Validators.validate_email(email)
-                        if not valid:
-                            errors.append(f"Email: {error}")
-                    
-                    if phone:
-                        valid, error = Validators.validate_phone(phone)
-                        if not valid:
-                            errors.append(f"Phone: {error}")
-                    
-                    if vat_number:
-                        valid, error = Validators.validate_vat_number(vat_number)
-                        if not valid:
-                            errors.append(f"VAT Number: {error}")
+                    errors = [str(error) for error in CLIENT_VALIDATOR.validate(
+                        {"name": name, "email": email, "phone": phone, "vat_number": vat_number})]
                     
                     if errors:
                         for error in errors:
@@ -264,7 +237,7 @@ elif action == "Edit Client":
                             created_date=client.created_date
                         )
                         
-                        success = client_manager.update_client(client_id, updated_client)
+                        success = get_catalog().update_client(client_id, updated_client)
                         if success:
                             st.success(f"✅ Client '{name}' updated successfully!")
                             del st.session_state.edit_client_id
@@ -272,6 +245,51 @@ elif action == "Edit Client":
                         else:
                             st.error("Failed to update client.")
 
+elif action == "Find Duplicates":
+    st.subheader("Find Duplicate Clients")
+    st.markdown("Clients entered more than once split their invoices and balances. "
+                "Merging keeps one record and moves every invoice to it.")
+    if "merge_message" in st.session_state:
+        st.success(st.session_state.pop("merge_message"))
+    
+    threshold = st.slider("Match threshold", min_value=0.5, max_value=1.0, value=0.75, step=0.05,
+                          help="Lower finds more possible duplicates, with more false matches")
+    candidates = DuplicateDetector(client_manager.get_all_clients()).find(threshold)
+    
+    if not candidates:
+        st.success("✅ No likely duplicates found.")
+    else:
+        invoice_counts = {}
+        for invoice in InvoiceManager().get_all_invoices():
+            invoice_counts[invoice.client_id] = invoice_counts.get(invoice.client_id, 0) + 1
+        
+        st.info(f"{len(candidates)} possible duplicate pair(s) found.")
+        for candidate in candidates:
+            pair = (candidate.client, candidate.duplicate)
+            pair_key = f"{candidate.client.id}_{candidate.duplicate.id}"
+            with st.expander(f"**{candidate.client.name}** / **{candidate.duplicate.name}** "
+                             f"- {candidate.score:.0%} match", expanded=False):
+                st.caption(", ".join(candidate.reasons))
+                columns = st.columns(2)
+                for column, client in zip(columns, pair):
+                    with column:
+                        st.write(f"**{client.name}**")
+                        st.write(f"**VAT:** {client.vat_number or '-'}")
+                        st.write(f"**Email:** {client.email or '-'}")
+                        st.write(f"**Phone:** {Formatters.format_phone(client.phone) or '-'}")
+                        st.write(f"**Eircode:** {client.postal_code or '-'}")
+                        st.write(f"**Invoices:** {invoice_counts.get(client.id, 0)}")
+                
+                names = {client.id: f"{client.name} ({client.city or 'no city'})" for client in pair}
+                keep_id = st.radio("Keep", list(names), format_func=names.get, key=f"keep_{pair_key}", horizontal=True)
+                if st.button("🔗 Merge", key=f"merge_{pair_key}", type="primary"):
+                    keep, duplicate = pair if keep_id == candidate.client.id else pair[::-1]
+                    moved = merge_clients(keep.id, [duplicate.id])
+                    # Shown after the rerun, which would otherwise clear it straight away
+                    st.session_state.merge_message = (f"✅ Merged '{duplicate.name}' into '{keep.name}' "
+                                                      f"({moved} invoice(s) moved).")
+                    st.rerun()
+
 # Handle delete confirmation
 if 'delete_client_id' in st.session_state:
     client_id = st.session_state.delete_client_id
@@ -283,7 +301,7 @@ if 'delete_client_id' in st.session_state:
         
         with col1:
             if st.button("Yes, Delete", type="primary"):
-                client_manager.delete_client(client_id)
+                get_catalog().delete_client(client_id)
                 st.success(f"Client '{client.name}' deleted successfully!")
                 del st.session_state.delete_client_id
                 st.rerun()
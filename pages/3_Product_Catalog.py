@@ -1,10 +1,23 @@
 import streamlit as st
 from models.product import Product, ProductManager
+from models.tonnage_price import TonnagePrice, TonnagePriceManager
+from services.catalog import get_catalog
+from services.pricing_engine import get_pricing_engine
+from services.stock_ledger import get_stock_ledger
 from utils.validators import Validators
 from utils.formatters import Formatters
-import pandas as pd
+import io
+from services.bootstrap import ERROR_ADVICE, bootstrap, bootstrap_errors
+from services.api import start_api
+from services.warmup import start_warmup
 
 st.set_page_config(page_title="Product Catalog", page_icon="📦", layout="wide")
+bootstrap()
+if bootstrap_errors():
+    st.error("\n\n".join([ERROR_ADVICE, *bootstrap_errors()]))
+    st.stop()
+start_warmup()
+start_api()
 
 st.title("📦 Steel Product Catalog")
 st.markdown("Manage your steel product inventory and pricing.")
@@ -15,7 +28,8 @@ product_manager = ProductManager()
 # Sidebar for actions
 with st.sidebar:
     st.subheader("Actions")
-    action = st.radio("Choose Action:", ["View Products", "Add New Product", "Edit Product"])
+    action = st.radio("Choose Action:", ["View Products", "Add New Product", "Edit Product", "Bulk Pricing", "Tonnage Prices",
+                                               "Stock Levels"])
 
 if action == "View Products":
     st.subheader("Product Catalog")
@@ -56,22 +70,6 @@ if action == "View Products":
         if not filtered_products:
             st.warning("No products match your search criteria.")
         else:
-            # Display products in a table format
-            product_data = []
-            for product in filtered_products:
-                product_data.append({
-                    "Name": product.name,
-                    "Category": product.category,
-                    "Grade": product.grade,
-                    "Dimensions": Formatters.format_dimensions(product.dimensions),
-                    "Price": Formatters.format_currency(product.base_price),
-                    "Stock": product.stock_quantity,
-                    "Active": "✅" if product.is_active else "❌",
-                    "Actions": product.id
-                })
-            
-            df = pd.DataFrame(product_data)
-            
             # Display interactive table
             for i, product in enumerate(filtered_products):
                 with st.expander(f"**{product.name}** - {product.category} ({product.grade})", expanded=False):
@@ -101,7 +99,7 @@ if action == "View Products":
                         if st.button(f"{'Deactivate' if product.is_active else 'Activate'}", 
                                    key=f"toggle_{product.id}"):
                             product.is_active = not product.is_active
-                            product_manager.update_product(product.id, product)
+                            get_catalog().update_product(product.id, product)
                             st.rerun()
                         
                         if st.button(f"Delete", key=f"delete_{product.id}", type="secondary"):
@@ -139,7 +137,7 @@ elif action == "Add New Product":
         with col1:
             st.markdown("**Pricing & Inventory**")
             base_price = st.number_input("Base Price (EUR)", min_value=0.0, step=0.01)
-            stock_quantity = st.number_input("Stock Quantity", min_value=0, step=1)
+            stock_quantity = st.number_input("Stock Quantity", min_value=0.0, step=1.0)
             
         with col2:
             st.markdown("**Order Settings**")
@@ -181,7 +179,7 @@ elif action == "Add New Product":
                     is_active=is_active
                 )
                 
-                product_id = product_manager.add_product(new_product)
+                product_id = get_catalog().add_product(new_product)
                 st.success(f"✅ Product '{name}' added successfully!")
                 st.rerun()
 
@@ -230,7 +228,9 @@ elif action == "Edit Product":
                 with col1:
                     st.markdown("**Pricing & Inventory**")
                     base_price = st.number_input("Base Price (EUR)", min_value=0.0, step=0.01, value=product.base_price)
-                    stock_quantity = st.number_input("Stock Quantity", min_value=0, step=1, value=product.stock_quantity)
+                    stock_quantity = st.number_input("Stock Quantity", min_value=0.0, step=1.0,
+                                                     value=float(product.stock_quantity),
+                                                     help="Changing the quantity records a stock adjustment")
                     
                 with col2:
                     st.markdown("**Order Settings**")
@@ -282,7 +282,9 @@ elif action == "Edit Product":
                             is_active=is_active
                         )
                         
-                        success = product_manager.update_product(product_id, updated_product)
+                        # Only a changed quantity is a stock count; otherwise keep the ledger's balance
+                        success = get_catalog().update_product(
+                            product_id, updated_product, count_stock=stock_quantity != float(product.stock_quantity))
                         if success:
                             st.success(f"✅ Product '{name}' updated successfully!")
                             del st.session_state.edit_product_id
@@ -290,6 +292,160 @@ elif action == "Edit Product":
                         else:
                             st.error("Failed to update product.")
 
+elif action == "Bulk Pricing":
+    st.subheader("Bulk Price Update")
+    
+    products = product_manager.get_all_products()
+    
+    if not products:
+        st.info("No products found. Add your first product using the sidebar.")
+    else:
+        source = st.radio("Update prices by", ["Adjustment", "Supplier price list (CSV)"], horizontal=True)
+        updates = {}
+        
+        if source == "Adjustment":
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                categories = st.multiselect("Category", sorted(set(p.category for p in products)), placeholder="All categories")
+            with col2:
+                grades = st.multiselect("Grade", sorted(set(p.grade for p in products if p.grade)), placeholder="All grades")
+            with col3:
+                finishes = st.multiselect("Finish", sorted(set(p.finish for p in products)), placeholder="All finishes")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Base Price**")
+                base_percentage = st.number_input("Change (%)", value=0.0, step=0.5, key="base_pct")
+                base_amount = st.number_input("Change (€ per unit)", value=0.0, step=0.01, key="base_amount")
+            with col2:
+                st.markdown("**Cutting Charge**")
+                cutting_percentage = st.number_input("Change (%)", value=0.0, step=0.5, key="cutting_pct")
+                cutting_amount = st.number_input("Change (€ per cut)", value=0.0, step=0.01, key="cutting_amount")
+            
+            matching = product_manager.find_products(categories=categories, grades=grades, finishes=finishes)
+            st.caption(f"{len(matching)} product(s) match the filters.")
+            updates = product_manager.plan_price_change(matching, base_percentage, base_amount,
+                                                        cutting_percentage, cutting_amount)
+        else:
+            st.markdown("Columns: `id` or `name` to match products, plus `base_price` and/or `cutting_charge`.")
+            price_file = st.file_uploader("Supplier price list", type=["csv"])
+            if price_file:
+                updates, errors = product_manager.read_price_list(
+                    io.TextIOWrapper(price_file, encoding="utf-8-sig", newline=""))
+                if errors:
+                    with st.expander(f"⚠️ {len(errors)} row(s) skipped"):
+                        for error in errors[:200]:
+                            st.write(error)
+        
+        preview = product_manager.preview_price_updates(updates)
+        if preview:
+            st.markdown(f"**{len(preview)} product(s) will change:**")
+            import pandas as pd
+            preview_df = pd.DataFrame(preview).drop(columns=["id"]).rename(columns={
+                "name": "Product", "category": "Category", "grade": "Grade", "finish": "Finish",
+                "base_price_before": "Price Before", "base_price_after": "Price After",
+                "cutting_charge_before": "Cutting Before", "cutting_charge_after": "Cutting After",
+            })
+            st.dataframe(preview_df, use_container_width=True, hide_index=True)
+            
+            if st.button(f"Apply to {len(preview)} Product(s)", type="primary"):
+                changed = get_catalog().apply_price_updates(updates)
+                st.success(f"✅ Updated prices for {changed} product(s).")
+        elif updates:
+            st.info("No prices would change.")
+
+elif action == "Tonnage Prices":
+    st.subheader("Tonnage Price Table")
+    st.markdown("Products with a weight are priced per unit from the matching price per tonne. "
+                "Leave grade or finish empty to cover every grade or finish in a category.")
+    
+    price_manager = TonnagePriceManager()
+    categories = ["Steel Bar", "Steel Plate", "Steel Beam", "Angle Iron", "Channel Steel", "Tube", "Other"]
+    import pandas as pd
+    table_df = pd.DataFrame([price.to_dict() for price in price_manager.get_all_prices()],
+                            columns=["category", "grade", "finish", "price_per_tonne", "effective_date"])
+    
+    edited_df = st.data_editor(
+        table_df,
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "category": st.column_config.SelectboxColumn("Category", options=categories, required=True),
+            "grade": st.column_config.TextColumn("Grade"),
+            "finish": st.column_config.SelectboxColumn(
+                "Finish", options=["", "Hot Rolled", "Cold Rolled", "Galvanized", "Painted", "Stainless", "Other"]),
+            "price_per_tonne": st.column_config.NumberColumn("€ per Tonne", min_value=0.0, format="€%.2f", required=True),
+            "effective_date": st.column_config.TextColumn("Effective Date", help="YYYY-MM-DD"),
+        },
+        key="tonnage_table",
+    )
+    
+    if st.button("Save Price Table", type="primary"):
+        rows = edited_df.fillna("").to_dict("records")
+        prices = [
+            TonnagePrice(category=row["category"], grade=str(row["grade"]).strip(), finish=row["finish"],
+                         price_per_tonne=float(row["price_per_tonne"] or 0.0), effective_date=row["effective_date"])
+            for row in rows if row["category"]
+        ]
+        price_manager.replace_prices(prices)
+        st.success(f"✅ Saved {len(prices)} tonnage price(s).")
+    
+    # Resulting unit prices
+    priced = []
+    for product in product_manager.get_active_products():
+        quote = get_pricing_engine().quote(product)
+        if quote.source == "tonnage":
+            priced.append({
+                "Product": product.name,
+                "Grade": product.grade,
+                "Weight (kg/unit)": quote.unit_weight_kg,
+                "€ per Tonne": quote.price_per_tonne,
+                "Unit Price": quote.unit_price,
+                "Catalog Price": product.base_price,
+            })
+    if priced:
+        st.markdown("**Resulting unit prices:**")
+        st.dataframe(pd.DataFrame(priced), use_container_width=True, hide_index=True)
+
+elif action == "Stock Levels":
+    import pandas as pd
+    st.subheader("Stock Levels")
+    st.markdown("Stock is taken out when invoices are issued, not while they are drafts, and returned when they "
+                "are cancelled, deleted or set back to draft. "
+                "Editing a product's stock quantity records an adjustment.")
+
+    ledger = get_stock_ledger()
+    products = product_manager.get_active_products()
+    threshold = st.number_input("Low-stock threshold", min_value=0.0, step=1.0, value=10.0)
+
+    low_stock = ledger.low_stock(products, threshold)
+    if low_stock:
+        st.warning(f"{len(low_stock)} product(s) at or below {threshold:g}.")
+        st.dataframe(pd.DataFrame([
+            {"Product": product.name, "Grade": product.grade, "Available": available,
+             "Min Order": product.min_order_quantity}
+            for product, available in low_stock
+        ]), use_container_width=True, hide_index=True)
+    else:
+        st.success("No products are running low.")
+
+    if products:
+        product_names = {product.name: product for product in products}
+        history_product = product_names[st.selectbox("Movement history for", list(product_names))]
+        movements = ledger.movements(history_product.id)
+        st.metric("Available", f"{ledger.available(history_product.id):g}")
+        if movements:
+            st.dataframe(pd.DataFrame([
+                {"Date": Formatters.format_date(movement.timestamp), "Reason": movement.reason.title(),
+                 "Invoice": movement.invoice_number, "Quantity": movement.quantity}
+                for movement in reversed(movements)
+            ]), use_container_width=True, hide_index=True)
+
+    if st.button("🔄 Rebuild Balances from History"):
+        balances = ledger.rebuild()
+        st.success(f"✅ Rebuilt stock balances for {len(balances)} product(s).")
+
 # Handle delete confirmation
 if 'delete_product_id' in st.session_state:
     product_id = st.session_state.delete_product_id
@@ -301,7 +457,7 @@ if 'delete_product_id' in st.session_state:
         
         with col1:
             if st.button("Yes, Delete", type="primary"):
-                product_manager.delete_product(product_id)
+                get_catalog().delete_product(product_id)
                 st.success(f"Product '{product.name}' deleted successfully!")
                 del st.session_state.delete_product_id
                 st.rerun()
@@ -1,23 +1,56 @@
 import streamlit as st
 from models.invoice import Invoice, InvoiceItem, InvoiceManager
-from models.client import ClientManager
-from models.product import ProductManager
-from models.company import Company
-from services.pdf_generator import PDFGenerator
+from services.pdf_cache import PDFCache
+from services.pdf_jobs import get_pdf_job_queue, render_variant
+from services.download_store import get_download_store
+from services.pricing_engine import get_pricing_engine
+from services.billing_service import get_billing_service
+from services.draft_store import get_draft_store
+from services.recent_items import get_recent_items
+from services.reference_data import client_label, load_reference_data, product_label
+from services.stock_ledger import InsufficientStock, get_stock_ledger
+from services.credit_exposure import CreditLimitExceeded, get_exposure_index
+from services.cut_optimizer import DEFAULT_KERF_MM, optimise_cuts, parse_cut_schedule, parse_stock_length
+from collections import Counter
 from utils.formatters import Formatters
 from datetime import datetime, timedelta
-import base64
+from services.bootstrap import ERROR_ADVICE, bootstrap, bootstrap_errors
+from services.api import start_api
+from services.warmup import start_warmup
 
 st.set_page_config(page_title="Create Invoice", page_icon="📄", layout="wide")
+bootstrap()
+if bootstrap_errors():
+    st.error("\n\n".join([ERROR_ADVICE, *bootstrap_errors()]))
+    st.stop()
+start_warmup()
+start_api()
 
 st.title("📄 Create Invoice")
 st.markdown("Generate professional invoices for your steel products.")
 
-# Initialize managers
-invoice_manager = InvoiceManager()
-client_manager = ClientManager()
-product_manager = ProductManager()
-company = Company.load()
+# Fragments showing figures derived from the invoice lines and charges.
+# Edits rerun these (and the edited section) instead of the whole page.
+INVOICE_VIEWS = ["invoice_summary", "invoice_actions"]
+
+# Results shown in the client and product pickers
+PICKER_LIMIT = 20
+
+# Item table column -> (InvoiceItem field, type)
+ITEM_COLUMNS = {
+    "Description": ("description", str),
+    "Quantity": ("quantity", float),
+    "Unit Price": ("unit_price", float),
+    "Cuts": ("cuts_required", int),
+    "Cut Charge": ("cutting_charge_per_cut", float),
+    "Discount %": ("discount_percentage", float),
+    "Fixed Discount": ("discount_amount", float),
+}
+
+# Company, clients and products are reloaded only when their files change
+reference = load_reference_data(st.session_state.get("invoice_reference_data"))
+st.session_state.invoice_reference_data = reference
+company = reference.company
 
 # Check if company is configured
 if not company.name:
@@ -27,8 +60,8 @@ if not company.name:
     st.stop()
 
 # Get clients and products
-clients = client_manager.get_all_clients()
-products = product_manager.get_active_products()
+clients = reference.clients
+products = reference.products
 
 if not clients:
     st.error("No clients found. Please add clients first.")
@@ -42,9 +75,16 @@ if not products:
         st.switch_page("pages/3_Product_Catalog.py")
     st.stop()
 
-# Initialize invoice in session state
+# Signed-in users see their own drafts; otherwise drafts are shared
+draft_owner = st.user.get("email") or ""
+
+# Initialize invoice in session state, picking up the draft in the URL after a refresh or restart
 if 'current_invoice' not in st.session_state:
-    st.session_state.current_invoice = Invoice()
+    draft_id = st.query_params.get("draft")
+    restored = get_draft_store().load(draft_id) if draft_id else None
+    st.session_state.current_invoice = restored or Invoice()
+    if restored:
+        st.toast(f"Restored draft {restored.invoice_number}")
 
 invoice = st.session_state.current_invoice
 
@@ -54,6 +94,127 @@ if invoice is None:
     invoice = st.session_state.current_invoice
 
 
+def picker_options(index, query: str, recent_ids, current_id: str = "") -> list:
+    """Ids for a picker: the best matches for the query, or the current and recent ids then A-Z"""
+    if query.strip():
+        return [record.id for record in index.search(query, PICKER_LIMIT)]
+    pinned = [record_id for record_id in dict.fromkeys([current_id, *recent_ids]) if record_id in index.records]
+    rest = [record.id for record in index.first(PICKER_LIMIT + len(pinned)) if record.id not in pinned]
+    return pinned + rest[:max(PICKER_LIMIT - len(pinned), 0)]
+
+
+def autosave(invoice: Invoice):
+    """Queue the invoice for the draft store and keep its id in the URL"""
+    if invoice.items:
+        get_draft_store().schedule(invoice, draft_owner)
+        if st.query_params.get("draft") != invoice.id:
+            st.query_params["draft"] = invoice.id
+    elif st.query_params.get("draft") == invoice.id:
+        # Every line was removed
+        get_draft_store().discard(invoice.id)
+        del st.query_params["draft"]
+
+
+def close_draft(invoice: Invoice):
+    get_draft_store().discard(invoice.id)
+    if "draft" in st.query_params:
+        del st.query_params["draft"]
+
+
+def resume_draft(invoice_id: str):
+    draft = get_draft_store().load(invoice_id)
+    if draft is not None:
+        autosave(st.session_state.current_invoice)
+        st.session_state.current_invoice = draft
+        st.query_params["draft"] = draft.id
+
+
+def refresh_invoice_views(*fragments: str):
+    """From a widget callback, save the draft and rerun the given fragments and the invoice totals only"""
+    autosave(st.session_state.current_invoice)
+    st.rerun([*fragments, *INVOICE_VIEWS])
+
+
+def lines_changed():
+    # A new table key starts the item editor from the updated lines
+    st.session_state.invoice_items_revision = st.session_state.get("invoice_items_revision", 0) + 1
+    refresh_invoice_views("invoice_items")
+
+
+def add_item(product_id: str):
+    state = st.session_state
+    product = state.invoice_reference_data.products_by_id[product_id]
+    quote = get_pricing_engine().quote(product)
+    state.current_invoice.add_item(InvoiceItem(
+        product_id=product.id,
+        product_name=product.name,
+        description=state.get(f"new_item_description_{product.id}", ""),
+        quantity=state.new_item_quantity,
+        unit_price=state[f"new_item_price_{product.id}"],
+        cuts_required=state.get(f"new_item_cuts_{product.id}", 0),
+        cutting_charge_per_cut=state.get(f"new_item_cut_charge_{product.id}", 0.0),
+        discount_percentage=state.new_item_discount_percentage,
+        discount_amount=state.new_item_discount_amount,
+        unit_weight_kg=quote.unit_weight_kg))
+    lines_changed()
+
+
+def apply_item_edits(key: str):
+    """Copy cell edits and deleted rows from the item table onto the invoice"""
+    changes = st.session_state[key]
+    invoice = st.session_state.current_invoice
+    for row, edits in changes.get("edited_rows", {}).items():
+        item = invoice.items[int(row)]
+        for column, value in edits.items():
+            name, kind = ITEM_COLUMNS[column]
+            setattr(item, name, kind(value) if value is not None else kind())
+    for row in sorted(changes.get("deleted_rows", []), reverse=True):
+        invoice.remove_item(row)
+    invoice.last_modified = datetime.now().isoformat()
+    lines_changed()
+
+
+def set_invoice_field(name: str, key: str):
+    setattr(st.session_state.current_invoice, name, st.session_state[key])
+    refresh_invoice_views("invoice_charges")
+
+
+def add_cut_list(product_id: str, plan, pieces):
+    cut_product = st.session_state.invoice_reference_data.products_by_id[product_id]
+    stock_length = parse_stock_length(cut_product.dimensions)
+    quote = get_pricing_engine().quote(cut_product)
+    quantity = plan.bars_needed
+    if cut_product.unit_of_measure == "weight" and cut_product.weight_per_unit > 0:
+        quantity = plan.bars_needed * cut_product.weight_per_unit
+    piece_summary = ", ".join(f"{count} × {length:g}mm"
+                              for length, count in sorted(Counter(pieces).items(), reverse=True))
+    st.session_state.current_invoice.add_item(InvoiceItem(
+        product_id=cut_product.id,
+        product_name=cut_product.name,
+        description=f"Cut list: {piece_summary} from {plan.bars_needed} × {stock_length:g}mm "
+                    f"({plan.waste_percentage:.1f}% waste)",
+        quantity=quantity,
+        unit_price=quote.unit_price,
+        cuts_required=plan.cuts,
+        cutting_charge_per_cut=cut_product.cutting_charge,
+        unit_weight_kg=quote.unit_weight_kg))
+    lines_changed()
+
+
+# Drafts left open in other sessions or before a restart
+other_drafts = [draft for draft in get_draft_store().list_drafts(draft_owner or None)
+                if draft.invoice_id != invoice.id]
+if other_drafts:
+    with st.expander(f"📝 Resume Draft ({len(other_drafts)})"):
+        for draft in other_drafts:
+            col1, col2, col3, col4 = st.columns([3, 3, 1, 1])
+            col1.write(f"**{draft.invoice_number}** - {draft.client_name or 'No client'}")
+            col2.caption(f"{draft.items} item(s), {Formatters.format_currency(draft.total_amount)} | "
+                         f"saved {draft.saved_at.replace('T', ' ')}")
+            col3.button("Resume", key=f"resume_{draft.invoice_id}", on_click=resume_draft,
+                        args=(draft.invoice_id,))
+            col4.button("Discard", key=f"discard_{draft.invoice_id}",
+                        on_click=get_draft_store().discard, args=(draft.invoice_id,))
 
 # Invoice Header Section
 st.subheader("Invoice Details")
@@ -61,18 +222,23 @@ st.subheader("Invoice Details")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    # Client selection
-    client_options = {
-        f"{client.name} - {client.city}": client
-        for client in clients
-    }
-    selected_client_key = st.selectbox("Select Client *",
-                                       options=list(client_options.keys()))
+    # Client selection: search by name, city or VAT number
+    client_query = st.text_input("Find Client", key="client_query", placeholder="Name, city or VAT number")
+    recent_clients = get_recent_items().clients()
+    client_ids = picker_options(reference.client_index, client_query, recent_clients, invoice.client_id)
+    if client_ids:
+        selected_client_id = st.selectbox(
+            "Select Client *", client_ids,
+            index=client_ids.index(invoice.client_id) if invoice.client_id in client_ids else 0,
+            format_func=lambda client_id: ("🕘 " if client_id in recent_clients else "")
+            + client_label(reference.clients_by_id[client_id]))
+    else:
+        st.warning("No clients match your search.")
+        selected_client_id = invoice.client_id
 
 # Initialize selected_client variable outside the column context
-selected_client = None
-if selected_client_key:
-    selected_client = client_options[selected_client_key]
+selected_client = reference.clients_by_id.get(selected_client_id)
+if selected_client:
     invoice.client_id = selected_client.id
     invoice.client_name = selected_client.name
     invoice.payment_terms = selected_client.payment_terms
@@ -106,303 +272,413 @@ with col3:
 
     # Auto-generate invoice number if empty
     if not invoice.invoice_number:
-        invoice.invoice_number = invoice_manager.generate_invoice_number()
+        invoice.invoice_number = InvoiceManager().generate_invoice_number()
 
     invoice_number = st.text_input("Invoice Number",
                                    value=invoice.invoice_number)
     invoice.invoice_number = invoice_number
 
+autosave(invoice)
+
 # Invoice Items Section
 st.markdown("---")
 st.subheader("Invoice Items")
 
-# Add item form
-with st.expander("➕ Add Item", expanded=len(invoice.items) == 0):
-    with st.form("add_item_form"):
+
+@st.fragment(key="invoice_add_item")
+def add_item_panel():
+    """Product picker and line inputs; choosing a product reruns only this panel"""
+    reference = st.session_state.invoice_reference_data
+    invoice = st.session_state.current_invoice
+    with st.expander("➕ Add Item", expanded=len(invoice.items) == 0):
         col1, col2 = st.columns(2)
 
         with col1:
-            # Product selection
-            product_options = {
-                f"{product.name} - {product.category}": product
-                for product in products
-            }
-            selected_product_key = st.selectbox("Select Product",
-                                                options=list(
-                                                    product_options.keys()))
-
-        # Initialize selected_product outside the column context
-        selected_product = None
-        if selected_product_key:
-            selected_product = product_options[selected_product_key]
-
-            # Show product details
-            st.info(
-                f"**Price:** {Formatters.format_currency(selected_product.base_price)} | "
-                f"**Stock:** {selected_product.stock_quantity} | "
-                f"**Grade:** {selected_product.grade}")
+            # Product selection: search by name, grade, category or dimensions
+            product_query = st.text_input("Find Product", key="new_item_query",
+                                          placeholder="Name, grade, category or size")
+            recent_products = get_recent_items().products_for(invoice.client_id)
+            product_ids = picker_options(reference.product_index, product_query, recent_products)
+            if not product_ids:
+                st.warning("No products match your search.")
+                return
+            selected_product_id = st.selectbox(
+                "Select Product", product_ids,
+                format_func=lambda product_id: ("🕘 " if product_id in recent_products else "")
+                + product_label(reference.products_by_id[product_id]))
+
+        selected_product = reference.products_by_id[selected_product_id]
+        quote = get_pricing_engine().quote(selected_product)
+
+        # Show product details
+        if quote.source == "tonnage":
+            price_text = (f"{Formatters.format_currency(quote.unit_price)} "
+                          f"({Formatters.format_currency(quote.price_per_tonne)}/t × {quote.unit_weight_kg:g} kg)")
+        else:
+            price_text = Formatters.format_currency(selected_product.base_price)
+        st.info(
+            f"**Price:** {price_text} | "
+            f"**Available:** {get_stock_ledger().available(selected_product.id):g} | "
+            f"**Grade:** {selected_product.grade}")
 
+        # Inputs that default from the product are keyed by it, so a new product starts from its own defaults
         with col1:
-            quantity = st.number_input("Quantity",
-                                       min_value=0.1,
-                                       step=0.1,
-                                       value=1.0)
-            unit_price = st.number_input("Unit Price (EUR)",
-                                         min_value=0.0,
-                                         step=0.01,
-                                         value=selected_product.base_price
-                                         if selected_product else 0.0)
+            st.number_input("Quantity", min_value=0.1, step=0.1, value=1.0, key="new_item_quantity")
+            st.number_input("Unit Price (EUR)", min_value=0.0, step=0.01, value=quote.unit_price,
+                            key=f"new_item_price_{selected_product.id}")
 
         with col2:
             # Cutting and discounts
-            cuts_required = 0
-            cutting_charge_per_cut = 0.0
-
-            if selected_product and selected_product.is_cuttable:
-                cuts_required = st.number_input("Cuts Required",
-                                                min_value=0,
-                                                step=1,
-                                                value=0)
-                cutting_charge_per_cut = st.number_input(
-                    "Cutting Charge per Cut (EUR)",
-                    min_value=0.0,
-                    step=0.01,
-                    value=selected_product.cutting_charge)
+            if selected_product.is_cuttable:
+                st.number_input("Cuts Required", min_value=0, step=1, value=0,
+                                key=f"new_item_cuts_{selected_product.id}")
+                st.number_input("Cutting Charge per Cut (EUR)", min_value=0.0, step=0.01,
+                                value=selected_product.cutting_charge,
+                                key=f"new_item_cut_charge_{selected_product.id}")
 
             # Discounts
-            discount_percentage = st.number_input("Discount (%)",
-                                                  min_value=0.0,
-                                                  max_value=100.0,
-                                                  step=0.1,
-                                                  value=0.0)
-            discount_amount = st.number_input("Fixed Discount (EUR)",
-                                              min_value=0.0,
-                                              step=0.01,
-                                              value=0.0)
+            st.number_input("Discount (%)", min_value=0.0, max_value=100.0, step=0.1, value=0.0,
+                            key="new_item_discount_percentage")
+            st.number_input("Fixed Discount (EUR)", min_value=0.0, step=0.01, value=0.0,
+                            key="new_item_discount_amount")
 
         # Item description
-        item_description = st.text_area(
-            "Item Description (optional)",
-            value=selected_product.description if selected_product is not None else "")
-
-        add_item = st.form_submit_button("Add Item", use_container_width=True)
-
-        if add_item and selected_product:
-            new_item = InvoiceItem(
-                product_id=selected_product.id,
-                product_name=selected_product.name,
-                description=item_description,
-                quantity=quantity,
-                unit_price=unit_price,
-                cuts_required=cuts_required,
-                cutting_charge_per_cut=cutting_charge_per_cut,
-                discount_percentage=discount_percentage,
-                discount_amount=discount_amount)
-
-            invoice.add_item(new_item)
-            st.rerun()
+        st.text_area("Item Description (optional)", value=selected_product.description,
+                     key=f"new_item_description_{selected_product.id}")
 
-# Display current items
-if invoice.items:
-    st.markdown("### Current Items")
+        st.button("Add Item", use_container_width=True, on_click=add_item, args=(selected_product.id,))
 
-    for i, item in enumerate(invoice.items):
-        with st.container():
-            col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
-
-            with col1:
-                st.write(f"**{item.product_name}**")
-                if item.description:
-                    st.caption(item.description)
-
-            with col2:
-                st.write(f"Qty: {item.quantity}")
-                if item.cuts_required > 0:
-                    st.caption(f"Cuts: {item.cuts_required}")
-
-            with col3:
-                st.write(f"{Formatters.format_currency(item.unit_price)}")
-                if item.cutting_charge_per_cut > 0:
-                    st.caption(
-                        f"Cut: {Formatters.format_currency(item.cutting_charge_per_cut)}"
-                    )
-
-            with col4:
-                if item.discount_percentage > 0 or item.discount_amount > 0:
-                    st.write(
-                        f"-{Formatters.format_currency(item.total_discount)}")
-                else:
-                    st.write("-")
 
-            with col5:
-                st.write(f"**{Formatters.format_currency(item.line_total)}**")
-                if st.button("🗑️", key=f"remove_{i}", help="Remove item"):
-                    invoice.remove_item(i)
-                    st.rerun()
+add_item_panel()
+
+
+@st.fragment(key="cut_planner")
+def cut_planner():
+    """Cut list planner for cuttable products; runs the optimiser only when its own inputs change"""
+    cuttable_products = st.session_state.invoice_reference_data.cuttable_products
+    if not cuttable_products:
+        return
+
+    with st.expander("✂️ Plan Cuts"):
+        col1, col2 = st.columns([2, 1])
+
+        with col1:
+            cut_product = cuttable_products[st.selectbox("Stock Product", list(cuttable_products),
+                                                         key="cut_product")]
+            stock_length = parse_stock_length(cut_product.dimensions)
+            schedule = st.text_area("Pieces (mm)", key="cut_schedule",
+                                    placeholder="One length per line, with an optional quantity:\n2400 x 10\n1850 x 4\n3.65m x 2")
+
+        with col2:
+            st.metric("Stock Length", f"{stock_length:,.0f} mm")
+            kerf = st.number_input("Saw Kerf (mm)", min_value=0.0, step=0.5, value=DEFAULT_KERF_MM, key="cut_kerf")
+            time_budget = st.number_input("Time Budget (s)", min_value=0.05, max_value=5.0, step=0.05,
+                                          value=0.5, key="cut_budget")
 
-            st.markdown("---")
+        pieces, schedule_errors = parse_cut_schedule(schedule)
+        if schedule_errors:
+            st.warning(f"Could not read: {', '.join(schedule_errors)}")
+
+        if pieces:
+            try:
+                plan = optimise_cuts(pieces, stock_length, kerf, time_budget)
+            except ValueError as e:
+                st.error(str(e))
+                plan = None
+
+            if plan:
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Bars Needed", plan.bars_needed)
+                col2.metric("Pieces", plan.pieces)
+                col3.metric("Cuts", plan.cuts)
+                col4.metric("Waste", f"{plan.waste_percentage:.1f}%")
+                if not plan.optimal:
+                    st.caption("Best plan found within the time budget; a plan with one bar fewer may exist.")
+
+                patterns = Counter(plan.bars)
+                st.dataframe(
+                    [{"Bars": count,
+                      "Pieces (mm)": " + ".join(f"{piece:g}" for piece in bar),
+                      "Offcut (mm)": round(plan.offcut(bar), 1)}
+                     for bar, count in patterns.most_common()],
+                    use_container_width=True, hide_index=True)
+
+                st.button("Add Cut List to Invoice", key="add_cut_list", on_click=add_cut_list,
+                          args=(cut_product.id, plan, pieces))
+
+
+cut_planner()
+
+
+@st.fragment(key="invoice_items")
+def item_table():
+    """Current lines as one editable table; an edit reruns this table and the totals"""
+    invoice = st.session_state.current_invoice
+    if not invoice.items:
+        return
+
+    import pandas as pd  # Only needed once there are lines to edit
+    st.markdown("### Current Items")
+    items_df = pd.DataFrame([
+        {
+            "Product": item.product_name,
+            "Description": item.description,
+            "Quantity": item.quantity,
+            "Unit Price": item.unit_price,
+            "Cuts": item.cuts_required,
+            "Cut Charge": item.cutting_charge_per_cut,
+            "Discount %": item.discount_percentage,
+            "Fixed Discount": item.discount_amount,
+            "Weight (kg)": round(item.weight_kg, 1),
+            "Line Total": item.line_total,
+        }
+        for item in invoice.items
+    ])
+    key = f"invoice_items_{invoice.id}_{st.session_state.get('invoice_items_revision', 0)}"
+    st.data_editor(
+        items_df, key=key, num_rows="delete", hide_index=True, use_container_width=True,
+        disabled=["Product", "Weight (kg)", "Line Total"],
+        column_config={
+            "Description": st.column_config.TextColumn(width="large"),
+            "Quantity": st.column_config.NumberColumn(min_value=0.0, format="%g"),
+            "Unit Price": st.column_config.NumberColumn(min_value=0.0, format="€%.2f"),
+            "Cuts": st.column_config.NumberColumn(min_value=0, step=1),
+            "Cut Charge": st.column_config.NumberColumn(min_value=0.0, format="€%.2f"),
+            "Discount %": st.column_config.NumberColumn(min_value=0.0, max_value=100.0, format="%.1f%%"),
+            "Fixed Discount": st.column_config.NumberColumn(min_value=0.0, format="€%.2f"),
+            "Line Total": st.column_config.NumberColumn(format="€%.2f"),
+        },
+        on_change=apply_item_edits, args=(key,))
+    st.caption("Edit quantities, prices and discounts in the table. Select rows and press Delete to remove them.")
+
+
+item_table()
 
 # Additional Charges and Discounts
 st.subheader("Additional Charges & Discounts")
 
-col1, col2 = st.columns(2)
 
-with col1:
-    st.markdown("**Additional Charges**")
-    invoice.shipping_cost = st.number_input("Shipping Cost (EUR)",
-                                            min_value=0.0,
-                                            step=0.01,
-                                            value=invoice.shipping_cost)
-    invoice.handling_cost = st.number_input("Handling Cost (EUR)",
-                                            min_value=0.0,
-                                            step=0.01,
-                                            value=invoice.handling_cost)
-    invoice.other_charges = st.number_input("Other Charges (EUR)",
-                                            min_value=0.0,
-                                            step=0.01,
-                                            value=invoice.other_charges)
-    if invoice.other_charges > 0:
-        invoice.other_charges_description = st.text_input(
-            "Other Charges Description",
-            value=invoice.other_charges_description,
-            placeholder="e.g., Special handling fee")
+@st.fragment(key="invoice_charges")
+def charges_panel():
+    invoice = st.session_state.current_invoice
 
-with col2:
-    st.markdown("**Global Discounts**")
-    invoice.global_discount_percentage = st.number_input(
-        "Global Discount (%)",
-        min_value=0.0,
-        max_value=100.0,
-        step=0.1,
-        value=invoice.global_discount_percentage)
-    invoice.global_discount_amount = st.number_input(
-        "Fixed Global Discount (EUR)",
-        min_value=0.0,
-        step=0.01,
-        value=invoice.global_discount_amount)
-
-    st.markdown("**Tax Settings**")
-    invoice.vat_rate = st.number_input("VAT Rate (%)",
-                                       min_value=0.0,
-                                       max_value=50.0,
-                                       step=0.1,
-                                       value=invoice.vat_rate)
-
-# Notes and Terms
-invoice.notes = st.text_area(
-    "Invoice Notes",
-    value=invoice.notes,
-    placeholder="Additional notes or payment instructions...")
+    def field_input(widget, label, name, **kwargs):
+        # Keyed by invoice so a new invoice starts from its own values
+        key = f"{name}_{invoice.id}"
+        widget(label, value=getattr(invoice, name), key=key, on_change=set_invoice_field, args=(name, key), **kwargs)
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.markdown("**Additional Charges**")
+        field_input(st.number_input, "Shipping Cost (EUR)", "shipping_cost", min_value=0.0, step=0.01)
+        field_input(st.number_input, "Handling Cost (EUR)", "handling_cost", min_value=0.0, step=0.01)
+        field_input(st.number_input, "Other Charges (EUR)", "other_charges", min_value=0.0, step=0.01)
+        if invoice.other_charges > 0:
+            field_input(st.text_input, "Other Charges Description", "other_charges_description",
+                        placeholder="e.g., Special handling fee")
+
+    with col2:
+        st.markdown("**Global Discounts**")
+        field_input(st.number_input, "Global Discount (%)", "global_discount_percentage",
+                    min_value=0.0, max_value=100.0, step=0.1)
+        field_input(st.number_input, "Fixed Global Discount (EUR)", "global_discount_amount",
+                    min_value=0.0, step=0.01)
+
+        st.markdown("**Tax Settings**")
+        field_input(st.number_input, "VAT Rate (%)", "vat_rate", min_value=0.0, max_value=50.0, step=0.1)
+
+    # Notes and Terms
+    field_input(st.text_area, "Invoice Notes", "notes",
+                placeholder="Additional notes or payment instructions...")
+
+
+charges_panel()
 
 # Invoice Summary
 st.markdown("---")
 st.subheader("Invoice Summary")
 
-col1, col2 = st.columns([1, 1])
-
-with col2:
-    # Calculate and display totals
-    summary_data = [
-        ("Subtotal:", Formatters.format_currency(invoice.subtotal)),
-    ]
 
-    if invoice.additional_charges_total > 0:
-        if invoice.shipping_cost > 0:
-            summary_data.append(
-                ("Shipping:",
-                 Formatters.format_currency(invoice.shipping_cost)))
-        if invoice.handling_cost > 0:
-            summary_data.append(
-                ("Handling:",
-                 Formatters.format_currency(invoice.handling_cost)))
-        if invoice.other_charges > 0:
-            desc = invoice.other_charges_description or "Other Charges"
+@st.fragment(key="invoice_summary")
+def invoice_summary():
+    invoice = st.session_state.current_invoice
+    selected_client = st.session_state.invoice_reference_data.clients_by_id.get(invoice.client_id)
+
+    col1, col2 = st.columns([1, 1])
+
+    credit_check = None
+    if selected_client and selected_client.credit_limit > 0:
+        credit_check = get_exposure_index().check(invoice, selected_client.credit_limit)
+
+    with col1:
+        if credit_check:
+            st.markdown("**Credit Position:**")
+            credit_col1, credit_col2, credit_col3 = st.columns(3)
+            credit_col1.metric("Credit Limit", Formatters.format_currency(credit_check.credit_limit))
+            credit_col2.metric("Outstanding", Formatters.format_currency(credit_check.outstanding),
+                               help="Unpaid Sent and Overdue invoices")
+            credit_col3.metric("Headroom", Formatters.format_currency(credit_check.headroom),
+                               help="Left after this invoice")
+            st.progress(min(credit_check.utilisation, 1.0),
+                        text=f"{credit_check.utilisation:.0%} of the credit limit used with this invoice")
+            if credit_check.exceeded:
+                st.error(f"This invoice takes {selected_client.name} "
+                         f"{Formatters.format_currency(-credit_check.headroom)} over their credit limit.")
+                st.checkbox("Save over the credit limit", key="override_credit")
+            elif credit_check.utilisation >= 0.9:
+                st.warning(f"{selected_client.name} is close to their credit limit.")
+
+    with col2:
+        # Calculate and display totals
+        summary_data = [
+            ("Subtotal:", Formatters.format_currency(invoice.subtotal)),
+        ]
+
+        if invoice.additional_charges_total > 0:
+            if invoice.shipping_cost > 0:
+                summary_data.append(
+                    ("Shipping:",
+                     Formatters.format_currency(invoice.shipping_cost)))
+            if invoice.handling_cost > 0:
+                summary_data.append(
+                    ("Handling:",
+                     Formatters.format_currency(invoice.handling_cost)))
+            if invoice.other_charges > 0:
+                desc = invoice.other_charges_description or "Other Charges"
+                summary_data.append(
+                    (f"{desc}:",
+                     Formatters.format_currency(invoice.other_charges)))
+
+        if invoice.global_discount_total > 0:
             summary_data.append(
-                (f"{desc}:",
-                 Formatters.format_currency(invoice.other_charges)))
-
-    if invoice.global_discount_total > 0:
-        summary_data.append(
-            ("Global Discount:",
-             f"-{Formatters.format_currency(invoice.global_discount_total)}"))
-
-    summary_data.extend([
-        ("Total Before VAT:",
-         Formatters.format_currency(invoice.total_before_vat)),
-        (f"VAT ({invoice.vat_rate}%):",
-         Formatters.format_currency(invoice.vat_amount)),
-        ("**TOTAL AMOUNT:**",
-         f"**{Formatters.format_currency(invoice.total_amount)}**")
-    ])
+                ("Global Discount:",
+                 f"-{Formatters.format_currency(invoice.global_discount_total)}"))
+
+        summary_data.extend([
+            ("Total Before VAT:",
+             Formatters.format_currency(invoice.total_before_vat)),
+            (f"VAT ({invoice.vat_rate}%):",
+             Formatters.format_currency(invoice.vat_amount)),
+            ("**TOTAL AMOUNT:**",
+             f"**{Formatters.format_currency(invoice.total_amount)}**")
+        ])
+
+        if invoice.total_weight_kg > 0:
+            summary_data.append(("Total Weight:", f"{invoice.total_weight_kg / 1000:,.3f} t"))
+
+        for label, value in summary_data:
+            col_a, col_b = st.columns([2, 1])
+            with col_a:
+                st.write(label)
+            with col_b:
+                st.write(value)
+
+
+invoice_summary()
+
+
+@st.fragment(run_every=1)
+def watch_pdf_job(job_id):
+    """Show render progress, rerunning the page once the job has finished"""
+    job = get_pdf_job_queue().get(job_id)
+    if job is None or not job.pending:
+        st.rerun()
+    st.progress(job.progress, text=f"Generating PDF... ({job.status})")
 
-    for label, value in summary_data:
-        col_a, col_b = st.columns([2, 1])
-        with col_a:
-            st.write(label)
-        with col_b:
-            st.write(value)
 
 # Action buttons
 st.markdown("---")
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    if st.button("💾 Save Invoice", use_container_width=True):
-        if not invoice.items:
-            st.error("Cannot save invoice without items.")
-        else:
-            invoice_id = invoice_manager.add_invoice(invoice)
-            st.success(
-                f"✅ Invoice {invoice.invoice_number} saved successfully!")
-            # Reset current invoice
-            st.session_state.current_invoice = Invoice()
-            st.rerun()
 
-with col2:
-    if st.button("📄 Generate PDF", use_container_width=True):
-        if not invoice.items:
-            st.error("Cannot generate PDF without items.")
-        elif not selected_client_key:
-            st.error("Please select a client.")
-        else:
-            try:
-                pdf_generator = PDFGenerator()
-                selected_client = client_options[selected_client_key]
-                pdf_buffer = pdf_generator.generate_invoice_pdf(
-                    invoice, company, selected_client)
 
-                # Encode PDF for download
-                pdf_data = pdf_buffer.getvalue()
-                b64_pdf = base64.b64encode(pdf_data).decode()
+@st.fragment(key="invoice_actions")
+def invoice_actions():
+    invoice = st.session_state.current_invoice
+    selected_client = st.session_state.invoice_reference_data.clients_by_id.get(invoice.client_id)
+    company = st.session_state.invoice_reference_data.company
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        if st.button("💾 Save Invoice", use_container_width=True):
+            if not invoice.items:
+                st.error("Cannot save invoice without items.")
+            else:
+                override_credit = st.session_state.get("override_credit", False)
+                credit_limit = 0.0 if override_credit or not selected_client else selected_client.credit_limit
+                try:
+                    get_billing_service().save_invoice(invoice, credit_limit=credit_limit)
+                except CreditLimitExceeded as e:
+                    st.error(f"Not saved: this invoice would exceed the credit limit by "
+                             f"{Formatters.format_currency(-e.check.headroom)}.")
+                except InsufficientStock as e:
+                    names = {item.product_id: item.product_name for item in invoice.items}
+                    st.error("Not enough stock to save this invoice:\n\n" + "\n".join(
+                        f"- {names.get(product_id, product_id)}: {requested:g} requested, {available:g} available"
+                        for product_id, requested, available in e.shortages))
+                else:
+                    st.success(
+                        f"✅ Invoice {invoice.invoice_number} saved successfully!")
+                    # Reset current invoice
+                    close_draft(invoice)
+                    st.session_state.current_invoice = Invoice()
+                    st.rerun()
 
-                # Create download link
-                filename = f"Invoice_{invoice.invoice_number}_{selected_client.name.replace(' ', '_')}.pdf"
-                href = f'<a href="data:application/pdf;base64,{b64_pdf}" download="{filename}">📄 Download PDF</a>'
-                st.markdown(href, unsafe_allow_html=True)
+    with col2:
+        if st.button("📄 Generate PDF", use_container_width=True):
+            if not invoice.items:
+                st.error("Cannot generate PDF without items.")
+            elif not selected_client:
+                st.error("Please select a client.")
+            else:
+                try:
+                    # Render on the background queue; the result is picked up on a later rerun
+                    filename = f"Invoice_{invoice.invoice_number}_{selected_client.name.replace(' ', '_')}.pdf"
+                    job = get_pdf_job_queue().submit(invoice, company, selected_client, filename)
+                    st.session_state.invoice_pdf_job = job.id
+
+                except Exception as e:
+                    st.error(f"Error generating PDF: {str(e)}")
+
+        # Keep the job status and download available across reruns while the invoice is unchanged
+        job_id = st.session_state.get("invoice_pdf_job")
+        job = get_pdf_job_queue().get(job_id) if job_id else None
+        if job and selected_client:
+            current_key = PDFCache.make_key(invoice, company, selected_client, render_variant(company))
+            spooled = get_download_store().get(job.download_token) if job.status == "Done" else None
+            if job.id != current_key:
+                del st.session_state.invoice_pdf_job
+            elif job.pending:
+                watch_pdf_job(job.id)
+            elif job.status == "Failed":
+                st.error(f"Error generating PDF: {job.error}")
+            elif spooled:
+                st.download_button("📥 Download PDF", data=spooled.reader(),
+                                   file_name=spooled.filename, mime=spooled.mime,
+                                   on_click="ignore", use_container_width=True)
+            else:
+                del st.session_state.invoice_pdf_job
+
+    with col3:
+        if st.button("🔄 Clear Invoice", use_container_width=True):
+            close_draft(invoice)
+            st.session_state.current_invoice = Invoice()
+            st.rerun()
 
-                st.success(
-                    "✅ PDF generated successfully! Click the link above to download."
-                )
+    with col4:
+        if st.button("📋 View All Invoices", use_container_width=True):
+            st.switch_page("pages/5_Invoice_History.py")
 
-            except Exception as e:
-                st.error(f"Error generating PDF: {str(e)}")
+    # Display current invoice preview
+    if invoice.items:
+        with st.expander("📋 Invoice Preview"):
+            st.markdown(f"**Invoice:** {invoice.invoice_number}")
+            st.markdown(f"**Client:** {invoice.client_name}")
+            st.markdown(
+                f"**Date:** {invoice.issue_date} | **Due:** {invoice.due_date}")
+            st.markdown(
+                f"**Items:** {len(invoice.items)} | **Total:** {Formatters.format_currency(invoice.total_amount)}"
+            )
 
-with col3:
-    if st.button("🔄 Clear Invoice", use_container_width=True):
-        st.session_state.current_invoice = Invoice()
-        st.rerun()
 
-with col4:
-    if st.button("📋 View All Invoices", use_container_width=True):
-        st.switch_page("pages/5_Invoice_History.py")
-
-# Display current invoice preview
-if invoice.items:
-    with st.expander("📋 Invoice Preview"):
-        st.markdown(f"**Invoice:** {invoice.invoice_number}")
-        st.markdown(f"**Client:** {invoice.client_name}")
-        st.markdown(
-            f"**Date:** {invoice.issue_date} | **Due:** {invoice.due_date}")
-        st.markdown(
-            f"**Items:** {len(invoice.items)} | **Total:** {Formatters.format_currency(invoice.total_amount)}"
-        )
+invoice_actions()
@@ -2,13 +2,26 @@ import streamlit as st
 from models.invoice import InvoiceManager
 from models.client import ClientManager
 from models.company import Company
-from services.pdf_generator import PDFGenerator
+from services.pdf_cache import PDFCache
+from services.pdf_jobs import get_pdf_job_queue, render_variant
+from services.download_store import get_download_store
+from services.billing_service import get_billing_service
+from services.invoice_delivery import SMTPSettings, get_delivery_batch, get_delivery_log, start_delivery
 from utils.formatters import Formatters
-import pandas as pd
 from datetime import datetime, timedelta
-import base64
+import csv
+import io
+from services.bootstrap import ERROR_ADVICE, bootstrap, bootstrap_errors
+from services.api import start_api
+from services.warmup import start_warmup
 
 st.set_page_config(page_title="Invoice History", page_icon="📋", layout="wide")
+bootstrap()
+if bootstrap_errors():
+    st.error("\n\n".join([ERROR_ADVICE, *bootstrap_errors()]))
+    st.stop()
+start_warmup()
+start_api()
 
 st.title("📋 Invoice History")
 st.markdown("View and manage all your invoices.")
@@ -20,6 +33,35 @@ company = Company.load()
 
 # Get all invoices
 invoices = invoice_manager.get_all_invoices()
+filtered_invoices = []
+
+# Background PDF jobs per invoice, kept across reruns
+if 'pdf_jobs' not in st.session_state:
+    st.session_state.pdf_jobs = {}
+
+# Last email delivery outcome per invoice
+deliveries = get_delivery_log().latest()
+
+
+@st.fragment(run_every=1)
+def watch_pdf_jobs(job_ids):
+    """Show render progress, rerunning the page once any job has finished"""
+    jobs = [get_pdf_job_queue().get(job_id) for job_id in job_ids]
+    if any(job is None or not job.pending for job in jobs):
+        st.rerun()
+    progress = sum(job.progress for job in jobs) / len(jobs)
+    st.progress(progress, text=f"Generating {len(jobs)} PDF(s)...")
+
+
+@st.fragment(run_every=1)
+def watch_delivery(batch_id):
+    """Show email progress, rerunning the page once the batch is done"""
+    batch = get_delivery_batch(batch_id)
+    if batch is None or not batch.pending:
+        st.rerun()
+    st.progress(batch.finished / max(batch.total, 1),
+                text=f"Emailing invoices... {batch.finished}/{batch.total}")
+
 
 if not invoices:
     st.info("No invoices found. Create your first invoice!")
@@ -138,6 +180,7 @@ else:
             filtered_invoices.sort(key=lambda x: x.client_name)
         
         # Display invoices
+        pending_jobs = []
         for invoice in filtered_invoices:
             with st.container():
                 col1, col2, col3, col4, col5 = st.columns([2, 2, 1, 1, 2])
@@ -171,22 +214,37 @@ else:
                     
                     with col_a:
                         if st.button("📄", key=f"pdf_{invoice.id}", help="Generate PDF"):
-                            # Generate PDF
+                            # Queue the render; the download appears once the job is done
                             try:
-                                pdf_generator = PDFGenerator()
                                 client = client_manager.get_client(invoice.client_id)
                                 if client:
-                                    pdf_buffer = pdf_generator.generate_invoice_pdf(invoice, company, client)
-                                    pdf_data = pdf_buffer.getvalue()
-                                    b64_pdf = base64.b64encode(pdf_data).decode()
-                                    
                                     filename = f"Invoice_{invoice.invoice_number}_{invoice.client_name.replace(' ', '_')}.pdf"
-                                    href = f'<a href="data:application/pdf;base64,{b64_pdf}" download="{filename}">Download PDF</a>'
-                                    st.markdown(href, unsafe_allow_html=True)
+                                    job = get_pdf_job_queue().submit(invoice, company, client, filename)
+                                    st.session_state.pdf_jobs[invoice.id] = job.id
                                 else:
                                     st.error("Client not found")
                             except Exception as e:
                                 st.error(f"Error generating PDF: {str(e)}")
+                        
+                        job_id = st.session_state.pdf_jobs.get(invoice.id)
+                        job = get_pdf_job_queue().get(job_id) if job_id else None
+                        client = client_manager.get_client(invoice.client_id) if job else None
+                        if client:
+                            current_key = PDFCache.make_key(invoice, company, client, render_variant(company))
+                            spooled = get_download_store().get(job.download_token) if job.status == "Done" else None
+                            if job.id != current_key:
+                                del st.session_state.pdf_jobs[invoice.id]
+                            elif job.pending:
+                                pending_jobs.append(job.id)
+                                st.caption("⏳")
+                            elif job.status == "Failed":
+                                st.error(f"Error generating PDF: {job.error}")
+                            elif spooled:
+                                st.download_button("📥", data=spooled.reader(), file_name=spooled.filename,
+                                                   mime=spooled.mime, key=f"download_{invoice.id}",
+                                                   help="Download PDF", on_click="ignore")
+                            else:
+                                del st.session_state.pdf_jobs[invoice.id]
                     
                     with col_b:
                         if st.button("📝", key=f"edit_{invoice.id}", help="Edit Invoice"):
@@ -210,6 +268,14 @@ else:
                         st.write(f"Status: {invoice.status}")
                         st.write(f"Payment Terms: {invoice.payment_terms}")
                         
+                        delivery = deliveries.get(invoice.id)
+                        if delivery:
+                            sent_at = Formatters.format_date(delivery.timestamp)
+                            if delivery.status == "Sent":
+                                st.write(f"Emailed: {sent_at} to {delivery.recipient}")
+                            else:
+                                st.write(f"Email {delivery.status.lower()}: {sent_at} ({delivery.error})")
+                        
                         if invoice.notes:
                             st.write(f"Notes: {invoice.notes}")
                     
@@ -235,10 +301,14 @@ else:
                                 "Total": Formatters.format_currency(item.line_total)
                             })
                         
+                        import pandas as pd
                         items_df = pd.DataFrame(items_data)
                         st.dataframe(items_df, use_container_width=True)
                 
                 st.markdown("---")
+        
+        if pending_jobs:
+            watch_pdf_jobs(pending_jobs)
 
 # Handle delete confirmation
 if 'delete_invoice_id' in st.session_state:
@@ -251,7 +321,7 @@ if 'delete_invoice_id' in st.session_state:
         
         with col1:
             if st.button("Yes, Delete", type="primary"):
-                invoice_manager.delete_invoice(invoice_id)
+                get_billing_service().delete_invoice(invoice_id)
                 st.success(f"Invoice '{invoice.invoice_number}' deleted successfully!")
                 del st.session_state.delete_invoice_id
                 st.rerun()
@@ -270,31 +340,135 @@ if filtered_invoices:
     
     with col1:
         if st.button("📊 Export to CSV"):
-            # Create CSV data
-            csv_data = []
-            for invoice in filtered_invoices:
-                csv_data.append({
-                    "Invoice Number": invoice.invoice_number,
-                    "Client": invoice.client_name,
-                    "Issue Date": invoice.issue_date,
-                    "Due Date": invoice.due_date,
-                    "Status": invoice.status,
-                    "Subtotal": invoice.subtotal,
-                    "VAT": invoice.vat_amount,
-                    "Total": invoice.total_amount,
-                    "Items Count": len(invoice.items)
-                })
-            
-            df = pd.DataFrame(csv_data)
-            csv = df.to_csv(index=False)
-            
-            # Create download link
-            b64 = base64.b64encode(csv.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="invoices_export.csv">📊 Download CSV</a>'
-            st.markdown(href, unsafe_allow_html=True)
+            # Stream CSV rows straight into a spooled file
+            fieldnames = ["Invoice Number", "Client", "Issue Date", "Due Date", "Status",
+                          "Subtotal", "VAT", "Total", "Items Count"]
+            with get_download_store().open_spool("invoices_export.csv", "text/csv") as (f, spooled):
+                text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+                writer = csv.DictWriter(text, fieldnames=fieldnames)
+                writer.writeheader()
+                for invoice in filtered_invoices:
+                    writer.writerow({
+                        "Invoice Number": invoice.invoice_number,
+                        "Client": invoice.client_name,
+                        "Issue Date": invoice.issue_date,
+                        "Due Date": invoice.due_date,
+                        "Status": invoice.status,
+                        "Subtotal": invoice.subtotal,
+                        "VAT": invoice.vat_amount,
+                        "Total": invoice.total_amount,
+                        "Items Count": len(invoice.items)
+                    })
+                text.flush()
+                text.detach()
+            st.session_state.csv_export_token = spooled.token
+        
+        csv_export = get_download_store().get(st.session_state.get("csv_export_token", ""))
+        if csv_export:
+            st.download_button("📊 Download CSV", data=csv_export.reader(), file_name=csv_export.filename,
+                               mime=csv_export.mime, on_click="ignore")
     
     with col2:
-        st.info("More bulk actions coming soon...")
+        smtp_settings = SMTPSettings.load()
+        batch = get_delivery_batch(st.session_state.get("delivery_batch_id", ""))
+        
+        if not smtp_settings.configured:
+            st.info("Set up email delivery in Company Setup to email invoices.")
+        elif batch is not None and batch.pending:
+            watch_delivery(batch.id)
+        else:
+            clients_by_id = {client.id: client for client in client_manager.get_all_clients()}
+            sendable = [inv for inv in filtered_invoices
+                        if inv.status != "Cancelled" and clients_by_id.get(inv.client_id)
+                        and clients_by_id[inv.client_id].email]
+            mark_sent = st.checkbox("Mark emailed drafts as Sent", value=True)
+            if st.button(f"📧 Email {len(sendable)} Invoice(s)", disabled=not sendable):
+                batch = start_delivery(sendable, company, clients_by_id, smtp_settings, mark_sent=mark_sent)
+                st.session_state.delivery_batch_id = batch.id
+                st.rerun()
+            
+            if batch is not None and batch.report is not None:
+                report = batch.report
+                st.success(f"Emailed {report.sent} invoice(s) in {report.elapsed:.1f}s "
+                           f"({report.messages_per_second:.1f}/s)")
+                if report.failed or report.skipped:
+                    st.warning(f"{report.failed} failed, {report.skipped} skipped; see the invoice details for errors.")
+                if batch.not_marked:
+                    st.warning(f"Left as Draft, not enough stock to mark as Sent: {', '.join(batch.not_marked)}")
+            elif batch is not None and batch.error:
+                st.error(f"Email delivery failed: {batch.error}")
     
     with col3:
         st.info("Batch PDF generation coming soon...")
+
+# Bulk VAT and price changes
+if invoices:
+    with st.expander("🔁 Bulk VAT / Repricing"):
+        st.markdown("Apply a new VAT rate or a unit price change to every invoice matching the filters below.")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            bulk_statuses = st.multiselect("Status", ["Draft", "Sent", "Paid", "Overdue", "Cancelled"],
+                                           default=["Draft"], key="bulk_statuses")
+        
+        with col2:
+            bulk_from = st.date_input("Issued From", value=None, key="bulk_from")
+            bulk_to = st.date_input("Issued To", value=None, key="bulk_to")
+        
+        with col3:
+            all_clients = client_manager.get_all_clients()
+            client_names = {client.id: client.name for client in all_clients}
+            bulk_clients = st.multiselect("Clients", list(client_names), format_func=client_names.get,
+                                          placeholder="All clients", key="bulk_clients")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            change_vat = st.checkbox("Change VAT rate", key="bulk_change_vat")
+            new_vat_rate = st.number_input("New VAT Rate (%)", min_value=0.0, max_value=100.0, value=23.0,
+                                           step=0.5, disabled=not change_vat, key="bulk_vat_rate")
+        
+        with col2:
+            price_change_percentage = st.number_input("Unit Price Change (%)", min_value=-100.0, value=0.0,
+                                                      step=0.5, key="bulk_price_pct")
+        
+        with col3:
+            price_change_amount = st.number_input("Unit Price Change (€ per unit)", value=0.0, step=0.01,
+                                                  key="bulk_price_amount")
+        
+        changes = {
+            "vat_rate": new_vat_rate if change_vat else None,
+            "price_change_percentage": price_change_percentage,
+            "price_change_amount": price_change_amount,
+        }
+        matching = invoice_manager.find_invoices(statuses=bulk_statuses, date_from=bulk_from, date_to=bulk_to,
+                                                 client_ids=bulk_clients)
+        has_changes = change_vat or price_change_percentage or price_change_amount
+        
+        if not matching:
+            st.info("No invoices match these filters.")
+        elif has_changes:
+            preview = invoice_manager.preview_bulk_update(matching, **changes)
+            before = sum(row["total_before"] for row in preview)
+            after = sum(row["total_after"] for row in preview)
+            
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Invoices", len(preview))
+            col2.metric("Total Before", Formatters.format_currency(before))
+            col3.metric("Total After", Formatters.format_currency(after), delta=f"{after - before:,.2f}")
+            
+            import pandas as pd
+            preview_df = pd.DataFrame(preview).drop(columns=["id"]).rename(columns={
+                "invoice_number": "Invoice", "client_name": "Client", "status": "Status",
+                "vat_rate_before": "VAT % Before", "vat_rate_after": "VAT % After",
+                "total_before": "Total Before", "total_after": "Total After", "difference": "Difference",
+            })
+            st.dataframe(preview_df, use_container_width=True, hide_index=True)
+            
+            if st.button(f"Apply to {len(preview)} Invoice(s)", type="primary"):
+                updated = get_billing_service().apply_bulk_update([row["id"] for row in preview], **changes)
+                st.success(f"Updated {updated} invoice(s).")
+                st.rerun()
+        else:
+            st.caption(f"{len(matching)} invoice(s) match. Set a VAT rate or price change to preview it.")
@@ -0,0 +1,89 @@
+import streamlit as st
+from services.csv_import import CSVEncodingError, CSVImporter, ENCODING_NAMES, TEMPLATE_COLUMNS
+from services.bootstrap import ERROR_ADVICE, bootstrap, bootstrap_errors
+from services.api import start_api
+from services.warmup import start_warmup
+
+st.set_page_config(page_title="Data Import", page_icon="📥", layout="wide")
+bootstrap()
+if bootstrap_errors():
+    st.error("\n\n".join([ERROR_ADVICE, *bootstrap_errors()]))
+    st.stop()
+start_warmup()
+start_api()
+
+st.title("📥 Data Import")
+st.markdown("Load existing clients, products and invoice history from CSV files.")
+
+IMPORT_TYPES = {"Clients": "clients", "Products": "products", "Invoice History": "invoices"}
+ENCODINGS = {"Detect automatically": None, "UTF-8 (Excel 'CSV UTF-8')": "utf-8-sig",
+             "Windows-1252 (older Excel 'CSV')": "cp1252"}
+
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    import_label = st.radio("What are you importing?", list(IMPORT_TYPES), horizontal=True)
+    kind = IMPORT_TYPES[import_label]
+
+with col2:
+    st.download_button(f"📄 Download {import_label} Template",
+                       data=",".join(TEMPLATE_COLUMNS[kind]) + "\n",
+                       file_name=f"{kind}_template.csv", mime="text/csv", on_click="ignore")
+
+if kind == "invoices":
+    st.info("Use one row per invoice line, with the rows of each invoice next to each other. "
+            "Clients must already exist; products are matched by name. "
+            "Imported invoices are recorded as history and do not change stock levels.")
+else:
+    st.info("Rows whose name already exists are skipped. Headers are matched to the template loosely, "
+            "so 'Company Name' or 'VAT' work too.")
+
+uploaded = st.file_uploader("CSV file", type=["csv", "txt"])
+encoding = ENCODINGS[st.selectbox("File encoding", list(ENCODINGS))]
+dry_run = st.checkbox("Validate only (don't import)")
+
+if uploaded and st.button("📥 Validate" if dry_run else "📥 Import", type="primary"):
+    progress = st.progress(0.0, text="Reading file...")
+    size = max(uploaded.size, 1)
+
+    def show_progress(rows: int):
+        progress.progress(min(uploaded.tell() / size, 1.0), text=f"{rows:,} rows read...")
+
+    uploaded.seek(0)
+    try:
+        report = CSVImporter(encoding=encoding).import_file(kind, uploaded, dry_run=dry_run, progress=show_progress)
+    except CSVEncodingError as e:
+        report = None
+        st.error(str(e))
+    progress.empty()
+    st.session_state.import_report = report
+
+report = st.session_state.get("import_report")
+if report is not None:
+    st.markdown("---")
+    st.subheader("Validation Result" if report.dry_run else "Import Result")
+    if report.encoding:
+        st.caption(f"Read as {ENCODING_NAMES.get(report.encoding, report.encoding)}")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Rows Read", f"{report.rows:,}")
+    with col2:
+        st.metric("Valid" if report.dry_run else "Imported", f"{report.imported:,}",
+                  help="Invoices count once however many rows they span")
+    with col3:
+        st.metric("Rejected Rows", f"{report.rejected_rows:,}")
+    with col4:
+        st.metric("Rows per Second", f"{report.rows_per_second:,.0f}")
+
+    if report.rejected_rows:
+        st.warning(f"{report.error_count:,} problem(s) found"
+                   + (f"; showing the first {len(report.errors):,}." if report.errors_truncated else "."))
+        import pandas as pd
+        st.dataframe(pd.DataFrame([
+            {"Line": error.row, "Field": error.field, "Problem": error.message} for error in report.errors
+        ]), use_container_width=True, hide_index=True)
+    elif report.dry_run:
+        st.success("✅ Every row is valid.")
+    else:
+        st.success(f"✅ Imported {report.imported:,} {report.kind}.")
@@ -0,0 +1,649 @@
+import asyncio
+import hmac
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+from models.client import Client
+from models.invoice import Invoice, InvoiceItem, InvoiceManager
+from models.product import Product, ProductManager
+from services.billing_service import get_billing_service
+from services.catalog import get_catalog
+from services.credit_exposure import CreditLimitExceeded, get_exposure_index
+from services.csv_import import INVOICE_STATUSES
+from services.download_store import get_download_store
+from services.pdf_jobs import get_pdf_job_queue
+from services.pricing_engine import get_pricing_engine
+from services.reference_data import load_reference_data
+from services.stock_ledger import InsufficientStock, get_stock_ledger
+from utils.validators import CLIENT_VALIDATOR, PRODUCT_VALIDATOR
+
+API_HOST = "127.0.0.1"  # Local systems only
+API_PORT = int(os.environ.get("BILLING_API_PORT", "8502"))
+API_TOKEN = os.environ.get("BILLING_API_TOKEN", "")  # When set, requests need "Authorization: Bearer <token>"
+API_ENABLED = os.environ.get("BILLING_API", "0") == "1"  # Off unless asked for
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_BATCH = 1000  # Invoices per batch request
+MAX_BODY_BYTES = 10 * 1024 * 1024
+KEEP_ALIVE_SECONDS = 15
+PDF_TIMEOUT = 120  # Seconds to wait for a render
+
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 411: "Length Required",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error", 504: "Gateway Timeout"}
+
+_TYPE_NAMES = {str: "a string", float: "a number", int: "an integer", bool: "true or false"}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str, **details):
+        self.status = status
+        self.message = message
+        self.details = details
+        super().__init__(message)
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes = b""
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise ApiError(400, "Body is not valid JSON")
+
+    def page(self) -> Tuple[int, int]:
+        """Offset and limit from the query string"""
+        try:
+            offset = int(self.query.get("offset", 0))
+            limit = int(self.query.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            raise ApiError(400, "offset and limit must be integers")
+        if offset < 0 or not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ApiError(400, f"offset must be 0 or more and limit between 1 and {MAX_PAGE_SIZE}")
+        return offset, limit
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "application/json"
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def json_response(payload, status: int = 200) -> Response:
+    return Response(status, json.dumps(payload, default=str).encode("utf-8"))
+
+
+def error_response(error: ApiError) -> Response:
+    return json_response({"error": error.message, **error.details}, error.status)
+
+
+def paginate(records: List, offset: int, limit: int, serialise: Callable) -> dict:
+    page = records[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(records) else None
+    return {"items": [serialise(record) for record in page], "total": len(records),
+            "offset": offset, "limit": limit, "next_offset": next_offset}
+
+
+def model_values(payload, model, exclude=()) -> dict:
+    """Fields of the dataclass given in a JSON object, checked against the field types"""
+    if not isinstance(payload, dict):
+        raise ApiError(400, "Expected a JSON object")
+    types = {f.name: f.type for f in fields(model) if f.name not in exclude}
+    unknown = sorted(set(payload) - set(types))
+    if unknown:
+        raise ApiError(400, f"Unknown field(s): {', '.join(unknown)}")
+    values = {}
+    for name, value in payload.items():
+        kind = types[name]
+        if kind is float and isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if not isinstance(value, kind) or (kind is not bool and isinstance(value, bool)):
+            raise ApiError(400, f"{name} must be {_TYPE_NAMES.get(kind, kind.__name__)}")
+        values[name] = value
+    return values
+
+
+def _iso_date(value: str, name: str) -> str:
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ApiError(400, f"{name} must be a date in YYYY-MM-DD format")
+
+
+def _due_date(issue_date: str, payment_terms: str) -> str:
+    """Issue date plus the days in payment terms such as '30 days', as the invoice page does"""
+    try:
+        days = int(payment_terms.split()[0])
+    except (ValueError, IndexError):
+        days = 30
+    return (date.fromisoformat(issue_date) + timedelta(days=days)).isoformat()
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, 0
+
+
+def _invoice_dict(invoice: Invoice) -> dict:
+    return {**invoice.to_dict(), "subtotal": invoice.subtotal, "vat_amount": invoice.vat_amount,
+            "total_amount": invoice.total_amount}
+
+
+def _stock_error(error: InsufficientStock) -> ApiError:
+    return ApiError(409, str(error), shortages=[
+        {"product_id": product_id, "requested": requested, "available": available}
+        for product_id, requested, available in error.shortages])
+
+
+def _credit_error(error: CreditLimitExceeded) -> ApiError:
+    return ApiError(409, str(error), credit_limit=error.check.credit_limit,
+                    outstanding=error.check.outstanding, headroom=error.check.headroom)
+
+
+class BillingAPI:
+    """JSON API over the client, product and invoice managers.
+
+    Handlers run on a small thread pool and go through the same process-wide
+    services as the pages: reference data and indexes are shared, invoice
+    writes take the billing service lock, and PDFs come from the shared
+    render queue and cache. Client and product writes go through the
+    catalog's locks, as the pages' do.
+    """
+
+    def __init__(self, workers: int = 8, invoices_path="data/invoices.json"):
+        self.invoices_path = invoices_path
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self._snapshot = None  # (file version, invoices newest first, invoices by id)
+        self._snapshot_lock = threading.Lock()
+        self.routes = []
+        for method, pattern, handler in [
+            ("GET", r"/api/health", self.health),
+            ("GET", r"/api/clients", self.list_clients),
+            ("POST", r"/api/clients", self.create_client),
+            ("GET", r"/api/clients/([^/]+)", self.get_client),
+            ("PUT", r"/api/clients/([^/]+)", self.update_client),
+            ("DELETE", r"/api/clients/([^/]+)", self.delete_client),
+            ("GET", r"/api/clients/([^/]+)/balance", self.client_balance),
+            ("GET", r"/api/products", self.list_products),
+            ("POST", r"/api/products", self.create_product),
+            ("GET", r"/api/products/([^/]+)", self.get_product),
+            ("PUT", r"/api/products/([^/]+)", self.update_product),
+            ("DELETE", r"/api/products/([^/]+)", self.delete_product),
+            ("GET", r"/api/invoices", self.list_invoices),
+            ("POST", r"/api/invoices", self.create_invoice),
+            ("POST", r"/api/invoices/batch", self.create_invoices),
+            ("POST", r"/api/invoices/status", self.set_invoice_status),
+            ("GET", r"/api/invoices/([^/]+)", self.get_invoice),
+            ("DELETE", r"/api/invoices/([^/]+)", self.delete_invoice),
+            ("GET", r"/api/invoices/([^/]+)/pdf", self.invoice_pdf),
+        ]:
+            self.routes.append((method, re.compile(pattern + "$"), handler))
+
+    async def handle(self, request: Request) -> Response:
+        if API_TOKEN and request.path != "/api/health" and not hmac.compare_digest(
+                request.headers.get("authorization", "").encode(), f"Bearer {API_TOKEN}".encode()):
+            return error_response(ApiError(401, "Missing or wrong API token"))
+        allowed = []
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            args = [unquote(group) for group in match.groups()]
+            try:
+                if asyncio.iscoroutinefunction(handler):
+                    result = await handler(request, *args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(self._executor, handler, request, *args)
+            except ApiError as e:
+                return error_response(e)
+            except Exception as e:
+                return error_response(ApiError(500, f"{type(e).__name__}: {e}"))
+            return result if isinstance(result, Response) else json_response(result)
+        if allowed:
+            return error_response(ApiError(405, f"Use {', '.join(sorted(set(allowed)))}"))
+        return error_response(ApiError(404, f"No such endpoint: {request.path}"))
+
+    def health(self, request: Request):
+        return {"status": "ok", "time": datetime.now().isoformat(timespec="seconds")}
+
+    # Clients
+
+    def list_clients(self, request: Request):
+        offset, limit = request.page()
+        index = load_reference_data().client_index
+        query = request.query.get("q", "")
+        clients = index.search(query, limit=len(index.records)) if query else index.first(len(index.records))
+        return paginate(clients, offset, limit, Client.to_dict)
+
+    def get_client(self, request: Request, client_id: str):
+        return self._client(client_id).to_dict()
+
+    def client_balance(self, request: Request, client_id: str):
+        client = self._client(client_id)
+        outstanding = get_exposure_index().outstanding(client.id)
+        return {"client_id": client.id, "name": client.name, "outstanding": outstanding,
+                "credit_limit": client.credit_limit,
+                "headroom": client.credit_limit - outstanding if client.credit_limit > 0 else None}
+
+    def create_client(self, request: Request):
+        values = model_values(request.json(), Client, exclude=("id", "created_date"))
+        self._validate(CLIENT_VALIDATOR, values)
+        client = Client(id="", **values)
+        get_catalog().add_client(client)
+        return json_response(client.to_dict(), 201)
+
+    def update_client(self, request: Request, client_id: str):
+        values = model_values(request.json(), Client, exclude=("id", "created_date"))
+        with get_catalog().clients() as manager:
+            client = manager.get_client(client_id)
+            if client is None:
+                raise ApiError(404, "Client not found")
+            updated = Client.from_dict({**client.to_dict(), **values})
+            self._validate(CLIENT_VALIDATOR, updated)
+            manager.update_client(client_id, updated)
+        return updated.to_dict()
+
+    def delete_client(self, request: Request, client_id: str):
+        if not get_catalog().delete_client(client_id):
+            raise ApiError(404, "Client not found")
+        return Response(204)
+
+    def _client(self, client_id: str) -> Client:
+        client = load_reference_data().clients_by_id.get(client_id)
+        if client is None:
+            raise ApiError(404, "Client not found")
+        return client
+
+    # Products
+
+    def list_products(self, request: Request):
+        offset, limit = request.page()
+        if request.query.get("include_inactive", "").lower() in ("1", "true", "yes"):
+            products = ProductManager().get_all_products()
+        else:
+            products = load_reference_data().products
+        filters = {name: set(request.query[name].split(",")) for name in ("category", "grade", "finish")
+                   if request.query.get(name)}
+        products = [product for product in products
+                    if all(getattr(product, name) in allowed for name, allowed in filters.items())]
+        return paginate(products, offset, limit, self._product_dict)
+
+    def get_product(self, request: Request, product_id: str):
+        product = load_reference_data().products_by_id.get(product_id) or ProductManager().get_product(product_id)
+        if product is None:
+            raise ApiError(404, "Product not found")
+        return self._product_dict(product)
+
+    def create_product(self, request: Request):
+        values = model_values(request.json(), Product, exclude=("id",))
+        self._validate(PRODUCT_VALIDATOR, values)
+        product = Product(id="", **values)
+        get_catalog().add_product(product)
+        return json_response(self._product_dict(product), 201)
+
+    def update_product(self, request: Request, product_id: str):
+        values = model_values(request.json(), Product, exclude=("id",))
+        with get_catalog().products() as manager:
+            product = manager.get_product(product_id)
+            if product is None:
+                raise ApiError(404, "Product not found")
+            updated = Product.from_dict({**product.to_dict(), **values})
+            self._validate(PRODUCT_VALIDATOR, updated)
+            manager.update_product(product_id, updated)
+            if "stock_quantity" in values:
+                get_stock_ledger().adjust(product_id, updated.stock_quantity)
+        return self._product_dict(updated)
+
+    def delete_product(self, request: Request, product_id: str):
+        if not get_catalog().delete_product(product_id):
+            raise ApiError(404, "Product not found")
+        return Response(204)
+
+    @staticmethod
+    def _product_dict(product: Product) -> dict:
+        quote = get_pricing_engine().quote(product)
+        return {**product.to_dict(), "available": get_stock_ledger().available(product.id),
+                "unit_price": quote.unit_price, "price_source": quote.source}
+
+    # Invoices
+
+    def list_invoices(self, request: Request):
+        offset, limit = request.page()
+        _, invoices, _ = self._invoice_snapshot()
+        statuses = set(request.query["status"].split(",")) if request.query.get("status") else None
+        client_ids = set(request.query["client_id"].split(",")) if request.query.get("client_id") else None
+        start = _iso_date(request.query["date_from"], "date_from") if request.query.get("date_from") else ""
+        end = _iso_date(request.query["date_to"], "date_to") if request.query.get("date_to") else ""
+        if statuses or client_ids or start or end:
+            invoices = [invoice for invoice in invoices
+                        if (not statuses or invoice.status in statuses)
+                        and (not client_ids or invoice.client_id in client_ids)
+                        and (not start or invoice.issue_date >= start)
+                        and (not end or invoice.issue_date <= end)]
+        return paginate(invoices, offset, limit, _invoice_dict)
+
+    def get_invoice(self, request: Request, invoice_id: str):
+        return _invoice_dict(self._invoice(invoice_id))
+
+    def create_invoice(self, request: Request):
+        payload = request.json()
+        options = self._save_options(payload)
+        invoice = self._build_invoice(payload)
+        error = self._save([invoice], **options)[0]
+        if error is not None:
+            raise error
+        return json_response(_invoice_dict(invoice), 201)
+
+    def create_invoices(self, request: Request):
+        """Create many invoices with one write; each succeeds or fails on its own"""
+        payload = request.json()
+        if not isinstance(payload, dict) or not isinstance(payload.get("invoices"), list):
+            raise ApiError(400, 'Expected {"invoices": [...]}')
+        if len(payload["invoices"]) > MAX_BATCH:
+            raise ApiError(413, f"At most {MAX_BATCH} invoices per batch")
+        options = self._save_options(payload)
+
+        results: List[Optional[dict]] = [None] * len(payload["invoices"])
+        built = []
+        for index, invoice_payload in enumerate(payload["invoices"]):
+            try:
+                built.append((index, self._build_invoice(invoice_payload)))
+            except ApiError as e:
+                results[index] = {"index": index, "status": e.status, "error": e.message, **e.details}
+        errors = self._save([invoice for _, invoice in built], **options)
+        for (index, invoice), error in zip(built, errors):
+            if error is None:
+                results[index] = {"index": index, "status": 201, "id": invoice.id,
+                                  "invoice_number": invoice.invoice_number, "total_amount": invoice.total_amount}
+            else:
+                results[index] = {"index": index, "status": error.status, "error": error.message, **error.details}
+        created = sum(result["status"] == 201 for result in results)
+        return {"created": created, "failed": len(results) - created, "results": results}
+
+    def set_invoice_status(self, request: Request):
+        payload = request.json()
+        if not isinstance(payload, dict) or not isinstance(payload.get("ids"), list):
+            raise ApiError(400, 'Expected {"ids": [...], "status": "..."}')
+        status = payload.get("status")
+        if status not in INVOICE_STATUSES:
+            raise ApiError(400, f"status must be one of {', '.join(INVOICE_STATUSES)}")
+        only_from = payload.get("only_from")
+        if only_from is not None and not isinstance(only_from, list):
+            raise ApiError(400, "only_from must be a list of statuses")
+        change = get_billing_service().set_status(payload["ids"], status, only_from=only_from)
+        refused = []
+        for invoice, shortage in change.refused:
+            error = _stock_error(shortage)
+            refused.append({"id": invoice.id, "invoice_number": invoice.invoice_number,
+                            "status": error.status, "error": error.message, **error.details})
+        return {"changed": change.changed, "refused": refused}
+
+    def delete_invoice(self, request: Request, invoice_id: str):
+        self._invoice(invoice_id)
+        get_billing_service().delete_invoice(invoice_id)
+        return Response(204)
+
+    async def invoice_pdf(self, request: Request, invoice_id: str):
+        """Render through the shared queue and cache; waiting does not hold a worker thread"""
+        loop = asyncio.get_running_loop()
+        invoice, company, client = await loop.run_in_executor(self._executor, self._pdf_inputs, invoice_id)
+        queue = get_pdf_job_queue()
+        job = queue.submit(invoice, company, client, f"{invoice.invoice_number}.pdf")
+        deadline = time.monotonic() + PDF_TIMEOUT
+        delay = 0.01
+        while job.pending:
+            if time.monotonic() > deadline:
+                raise ApiError(504, "PDF render timed out")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+        if job.status != "Done":
+            raise ApiError(500, f"PDF render failed: {job.error}")
+        spooled = get_download_store().get(job.download_token)
+        if spooled is None:
+            raise ApiError(500, "Rendered PDF expired before it could be sent")
+        data = await loop.run_in_executor(self._executor, spooled.reader())
+        return Response(200, data, "application/pdf",
+                        {"Content-Disposition": f'attachment; filename="{job.filename}"'})
+
+    def _pdf_inputs(self, invoice_id: str):
+        invoice = self._invoice(invoice_id)
+        data = load_reference_data()
+        client = data.clients_by_id.get(invoice.client_id) or Client(id=invoice.client_id, name=invoice.client_name)
+        return invoice, data.company, client
+
+    def _invoice(self, invoice_id: str) -> Invoice:
+        invoice = self._invoice_snapshot()[2].get(invoice_id)
+        if invoice is None:
+            raise ApiError(404, "Invoice not found")
+        return invoice
+
+    def _invoice_snapshot(self):
+        """Invoices as last saved, reloaded only when the file changes. Treat as read-only."""
+        version = _file_version(self.invoices_path)
+        with self._snapshot_lock:
+            if self._snapshot is None or self._snapshot[0] != version:
+                # Under the write lock, so a save in progress is never read half written
+                with get_billing_service().exclusive():
+                    version = _file_version(self.invoices_path)
+                    invoices = InvoiceManager(self.invoices_path).get_all_invoices()
+                self._snapshot = (version, invoices, {invoice.id: invoice for invoice in invoices})
+            return self._snapshot
+
+    def _build_invoice(self, payload) -> Invoice:
+        if not isinstance(payload, dict):
+            raise ApiError(400, "Each invoice must be a JSON object")
+        payload = dict(payload)
+        payload.pop("allow_oversell", None)
+        payload.pop("enforce_credit_limit", None)
+        items_payload = payload.pop("items", None)
+        values = model_values(payload, Invoice, exclude=("client_name", "items", "created_date", "last_modified"))
+        data = load_reference_data()
+
+        client = data.clients_by_id.get(values.get("client_id", ""))
+        if client is None:
+            raise ApiError(422, "client_id does not match a client")
+        if values.setdefault("status", "Draft") not in INVOICE_STATUSES:
+            raise ApiError(422, f"status must be one of {', '.join(INVOICE_STATUSES)}")
+        values["client_name"] = client.name
+        values.setdefault("vat_number", client.vat_number)
+        values.setdefault("payment_terms", client.payment_terms)
+        values["issue_date"] = _iso_date(values.get("issue_date") or date.today().isoformat(), "issue_date")
+        if values.get("due_date"):
+            values["due_date"] = _iso_date(values["due_date"], "due_date")
+        else:
+            values["due_date"] = _due_date(values["issue_date"], values["payment_terms"])
+
+        if not isinstance(items_payload, list) or not items_payload:
+            raise ApiError(422, "An invoice needs at least one item")
+        engine = get_pricing_engine()
+        items = []
+        for position, item_payload in enumerate(items_payload):
+            item = model_values(item_payload, InvoiceItem, exclude=("product_name", "unit_weight_kg"))
+            product = data.products_by_id.get(item.get("product_id", ""))
+            if product is None:
+                raise ApiError(422, f"Item {position}: product_id does not match an active product")
+            if item.get("quantity", 0) <= 0:
+                raise ApiError(422, f"Item {position}: quantity must be greater than 0")
+            quote = engine.quote(product)
+            item.setdefault("description", "")
+            item.setdefault("unit_price", quote.unit_price)
+            if item.get("cuts_required"):
+                item.setdefault("cutting_charge_per_cut", product.cutting_charge)
+            items.append(InvoiceItem(product_name=product.name, unit_weight_kg=quote.unit_weight_kg, **item))
+
+        invoice = Invoice(**values)
+        invoice.items = items
+        return invoice
+
+    @staticmethod
+    def _save_options(payload) -> dict:
+        payload = payload if isinstance(payload, dict) else {}
+        allow_oversell = payload.get("allow_oversell", False)
+        enforce_credit = payload.get("enforce_credit_limit", True)
+        if not isinstance(allow_oversell, bool) or not isinstance(enforce_credit, bool):
+            raise ApiError(400, "allow_oversell and enforce_credit_limit must be true or false")
+        return {"allow_oversell": allow_oversell, "enforce_credit": enforce_credit}
+
+    @staticmethod
+    def _save(invoices: List[Invoice], allow_oversell: bool, enforce_credit: bool) -> List[Optional[ApiError]]:
+        credit_limits = {}
+        if enforce_credit:
+            clients = load_reference_data().clients_by_id
+            credit_limits = {invoice.client_id: clients[invoice.client_id].credit_limit
+                             for invoice in invoices if invoice.client_id in clients}
+        errors = get_billing_service().save_invoices(invoices, allow_oversell=allow_oversell,
+                                                     credit_limits=credit_limits) if invoices else []
+        results = []
+        for error in errors:
+            if error is None or isinstance(error, ApiError):
+                results.append(error)
+            elif isinstance(error, InsufficientStock):
+                results.append(_stock_error(error))
+            elif isinstance(error, CreditLimitExceeded):
+                results.append(_credit_error(error))
+            else:
+                results.append(ApiError(409, str(error)))
+        return results
+
+    @staticmethod
+    def _validate(validator, record):
+        errors = validator.validate(record)
+        if errors:
+            raise ApiError(422, "; ".join(str(error) for error in errors),
+                           fields={error.field: error.message for error in errors})
+
+    # HTTP
+
+    async def serve(self, host: str = API_HOST, port: int = API_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._connection, host, port)
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One client connection; requests on it are handled in turn (HTTP/1.1 keep-alive)"""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_SECONDS)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, error_response(ApiError(431, "Request headers too large")), False)
+                    return
+
+                request, keep_alive, error = await self._read_request(reader, head)
+                response = error_response(error) if error else await self.handle(request)
+                await self._send(writer, response, keep_alive and error is None)
+                if not keep_alive or error is not None:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader, head: bytes):
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            return None, False, ApiError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        if "transfer-encoding" in headers:
+            return None, False, ApiError(411, "Send a Content-Length; chunked bodies are not supported")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            return None, False, ApiError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            return None, False, ApiError(413, f"Body is larger than {MAX_BODY_BYTES:,} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        request = Request(method.upper(), url.path.rstrip("/") or "/", dict(parse_qsl(url.query)), headers, body)
+        return request, keep_alive, None
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, response: Response, keep_alive: bool):
+        head = [f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}"]
+        if response.status != 204:
+            head += [f"Content-Type: {response.content_type}", f"Content-Length: {len(response.body)}"]
+        head += [f"{name}: {value}" for name, value in response.headers.items()]
+        head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + (response.body if response.status != 204 else b""))
+        await writer.drain()
+
+
+_shared_api = None
+_shared_api_lock = threading.Lock()
+
+
+def get_api() -> BillingAPI:
+    """Process-wide API handlers, shared with the server thread"""
+    global _shared_api
+    with _shared_api_lock:
+        if _shared_api is None:
+            _shared_api = BillingAPI()
+        return _shared_api
+
+
+_started = False
+
+
+def start_api(host: str = API_HOST, port: int = API_PORT):
+    """Serve the API from a background thread of this process, once.
+
+    Does nothing unless BILLING_API=1. Running in the Streamlit server
+    process means the API and the pages share one set of services and
+    locks. If the port is taken (e.g. by a second server) the API is
+    skipped and the UI carries on.
+    """
+    global _started
+    with _shared_api_lock:
+        if _started or not API_ENABLED:
+            return
+        _started = True
+
+    api = get_api()
+
+    async def run():
+        try:
+            server = await api.serve(host, port)
+        except OSError as e:
+            print(f"Billing API not started on {host}:{port}: {e}")
+            return
+        print(f"Billing API listening on http://{host}:{port}/api"
+              + ("" if API_TOKEN else " without a token; set BILLING_API_TOKEN to require one"))
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=asyncio.run, args=(run(),), name="billing-api", daemon=True).start()
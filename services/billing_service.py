@@ -0,0 +1,230 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from models.invoice import Invoice, InvoiceManager
+from services.credit_exposure import CreditLimitExceeded, ExposureIndex, get_exposure_index
+from services.recent_items import RecentItems, get_recent_items
+from services.stock_ledger import RELEASED_STATUSES, InsufficientStock, StockLedger, get_stock_ledger
+
+
+@dataclass
+class StatusChange:
+    changed: int = 0
+    refused: List[Tuple[Invoice, InsufficientStock]] = field(default_factory=list)  # Kept their status
+
+
+class BillingService:
+    """Single entry point for invoice writes and their side effects.
+
+    Saves, deletes and status changes go through one lock, so the invoice
+    file, the stock ledger, the credit exposure index and the recent items
+    lists are always updated together and two sessions cannot interleave
+    their writes.
+    """
+
+    def __init__(self, filepath="data/invoices.json", ledger: StockLedger = None,
+                 exposure: ExposureIndex = None, recent: RecentItems = None):
+        self.filepath = filepath
+        self.ledger = ledger or get_stock_ledger()
+        self.exposure = exposure or get_exposure_index()
+        self.recent = recent or get_recent_items()
+        self._lock = threading.RLock()
+
+    def invoice_manager(self) -> InvoiceManager:
+        return InvoiceManager(self.filepath)
+
+    def save_invoice(self, invoice: Invoice, allow_oversell: bool = False, credit_limit: float = 0.0) -> Invoice:
+        """Add a new invoice or replace the saved one with the same id.
+
+        With a ``credit_limit``, raises CreditLimitExceeded when the client's
+        open invoices plus this one would go over it. Raises InsufficientStock
+        when the lines need more stock than is available. Nothing is saved
+        in either case.
+        """
+        with self._lock:
+            self.exposure.refresh()
+            self.recent.refresh()
+            check = self.exposure.check(invoice, credit_limit)
+            if check.exceeded:
+                raise CreditLimitExceeded(check)
+
+            manager = self.invoice_manager()
+            if not invoice.invoice_number:
+                invoice.invoice_number = manager.generate_invoice_number()
+            movements = self.ledger.post_invoice(invoice, allow_oversell=allow_oversell)
+            try:
+                if manager.get_invoice(invoice.id):
+                    manager.update_invoice(invoice.id, invoice)
+                else:
+                    manager.add_invoice(invoice)
+            except Exception:
+                if movements:
+                    self._restore_stock(manager.get_invoice(invoice.id), invoice)
+                raise
+            self.exposure.update(invoice)
+            self.exposure.mark_current()
+            self.recent.record(invoice)
+            self.recent.mark_current()
+            return invoice
+
+    def save_invoices(self, invoices: List[Invoice], allow_oversell: bool = False,
+                      credit_limits: Optional[Dict[str, float]] = None) -> List[Optional[Exception]]:
+        """Add several new invoices with a single write of the invoice file.
+
+        Each invoice is checked as ``save_invoice`` would, counting the ones
+        accepted before it in the batch, and an id or invoice number already
+        on file is rejected. ``credit_limits`` maps client ids to limits. An
+        invoice that fails a check is skipped and its error is returned in
+        its place, None for each invoice saved.
+        """
+        credit_limits = credit_limits or {}
+        with self._lock:
+            self.exposure.refresh()
+            self.recent.refresh()
+            manager = self.invoice_manager()
+            existing = {invoice.id for invoice in manager.invoices}
+            numbers = {invoice.invoice_number for invoice in manager.invoices}
+            results, accepted = [], []
+            with self.ledger.batch():
+                for invoice in invoices:
+                    try:
+                        if invoice.id in existing:
+                            raise ValueError(f"Invoice {invoice.id} already exists")
+                        if invoice.invoice_number and invoice.invoice_number in numbers:
+                            raise ValueError(f"Invoice number {invoice.invoice_number} is already used")
+                        check = self.exposure.check(invoice, credit_limits.get(invoice.client_id, 0.0))
+                        if check.exceeded:
+                            raise CreditLimitExceeded(check)
+                        if not invoice.invoice_number:
+                            invoice.invoice_number = manager.generate_invoice_number()
+                        self.ledger.post_invoice(invoice, allow_oversell=allow_oversell)
+                    except (ValueError, CreditLimitExceeded, InsufficientStock) as e:
+                        results.append(e)
+                        continue
+                    manager.invoices.append(invoice)
+                    existing.add(invoice.id)
+                    numbers.add(invoice.invoice_number)
+                    self.exposure.update(invoice)  # Later invoices for the client see this one
+                    accepted.append(invoice)
+                    results.append(None)
+
+            if accepted:
+                try:
+                    manager.save_invoices()
+                except Exception:
+                    for invoice in accepted:
+                        self.ledger.release_invoice(invoice.id, invoice.invoice_number)
+                        self.exposure.remove(invoice.id)
+                    raise
+                self.exposure.mark_current()
+                for invoice in accepted:
+                    self.recent.record(invoice)
+                self.recent.mark_current()
+            return results
+
+    def delete_invoice(self, invoice_id: str):
+        with self._lock:
+            self.exposure.refresh()
+            manager = self.invoice_manager()
+            invoice = manager.get_invoice(invoice_id)
+            manager.delete_invoice(invoice_id)
+            self.ledger.release_invoice(invoice_id, invoice.invoice_number if invoice else "")
+            self.exposure.remove(invoice_id)
+            self.exposure.mark_current()
+
+    def set_status(self, invoice_ids, status: str, only_from=None) -> StatusChange:
+        """Change the status of several invoices with a single write.
+
+        Moving a Draft to a status that holds stock takes the stock then.
+        An invoice that needs more stock than is available keeps its status
+        and is returned in ``refused`` with the shortage.
+        """
+        with self._lock:
+            self.exposure.refresh()
+            manager = self.invoice_manager()
+            ids = set(invoice_ids)
+            result = StatusChange()
+            before = {}
+            with self.ledger.batch():
+                for invoice in manager.invoices:
+                    if invoice.id not in ids or invoice.status == status \
+                            or (only_from is not None and invoice.status not in only_from):
+                        continue
+                    previous, invoice.status = invoice.status, status
+                    try:
+                        self.ledger.post_invoice(invoice, allow_oversell=status in RELEASED_STATUSES)
+                    except InsufficientStock as e:
+                        result.refused.append((invoice, e))
+                        continue
+                    finally:
+                        invoice.status = previous
+                    before[invoice.id] = previous
+            try:
+                result.changed = manager.set_status(before, status, only_from=only_from)
+            except Exception:
+                for invoice in manager.invoices:
+                    if invoice.id in before:
+                        invoice.status = before[invoice.id]
+                        self.ledger.post_invoice(invoice, allow_oversell=True)
+                raise
+            for invoice in manager.invoices:
+                if invoice.id in before:
+                    self.exposure.update(invoice)
+            self.exposure.mark_current()
+            return result
+
+    def apply_bulk_update(self, invoice_ids, **changes) -> int:
+        """Reprice several invoices in one write; quantities are unchanged"""
+        with self._lock:
+            self.exposure.refresh()
+            manager = self.invoice_manager()
+            changed = manager.apply_bulk_update(invoice_ids, **changes)
+            ids = set(invoice_ids)
+            for invoice in manager.invoices:
+                if invoice.id in ids:
+                    self.exposure.update(invoice)
+            self.exposure.mark_current()
+            return changed
+
+    def reassign_client(self, from_client_ids, client) -> int:
+        """Move the invoices of duplicate clients to ``client`` in one write"""
+        with self._lock:
+            self.exposure.refresh()
+            manager = self.invoice_manager()
+            ids = set(from_client_ids)
+            moving = [invoice.id for invoice in manager.invoices if invoice.client_id in ids]
+            moved = manager.reassign_client(ids, client.id)
+            for invoice in manager.invoices:
+                if invoice.id in moving:
+                    self.exposure.update(invoice)
+            self.exposure.mark_current()
+            return moved
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the write lock while invoices are written outside the service.
+
+        The exposure index sees the changed file and rebuilds on next use.
+        """
+        with self._lock:
+            yield self
+
+    def _restore_stock(self, saved: Optional[Invoice], attempted: Invoice):
+        if saved is not None:
+            self.ledger.post_invoice(saved, allow_oversell=True)
+        else:
+            self.ledger.release_invoice(attempted.id, attempted.invoice_number)
+
+
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_billing_service() -> BillingService:
+    """Process-wide billing service shared by every page and session"""
+    global _shared_service
+    with _shared_service_lock:
+        if _shared_service is None:
+            _shared_service = BillingService()
+        return _shared_service
@@ -0,0 +1,122 @@
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+from models.schema import (SCHEMA_VERSIONS, SINGLE_RECORD, RecordWriter, SchemaError, migrate_records, unwrap,
+                           write_records)
+
+DATA_DIR = Path("data")
+BACKUP_DIR = Path("backups")
+DATA_FILES = {
+    "company": "data/company.json",
+    "clients": "data/clients.json",
+    "products": "data/products.json",
+    "invoices": "data/invoices.json",
+    "tonnage_prices": "data/tonnage_prices.json",
+}
+CREATED_FILES = ("company", "clients", "products", "invoices")  # Made empty when missing
+PROGRESS_EVERY = 1000  # Records between progress reports
+ERROR_ADVICE = ("Some data files could not be opened, so the app has stopped without changing them. "
+                "Install the latest version of the app, or restore the files from the backups folder, "
+                "then restart it.")
+
+# progress(kind, records done, total records)
+Progress = Callable[[str, int, int], None]
+
+
+@dataclass
+class MigrationReport:
+    kind: str
+    filepath: str
+    from_version: int
+    to_version: int
+    records: int
+    backup_path: str
+
+
+def print_progress(kind: str, done: int, total: int):
+    print(f"Migrating {kind}: {done:,}/{total:,} records")
+
+
+def migrate_file(kind: str, filepath: str, progress: Optional[Progress] = None,
+                 backup_dir: Path = BACKUP_DIR) -> Optional[MigrationReport]:
+    """Rewrite a data file at the current schema version; None if it already is.
+
+    The original is copied to ``backup_dir`` first. Records are transformed
+    and written one at a time, and the file is swapped in only once every
+    record has been written.
+    """
+    with open(filepath, 'r') as f:
+        version, records = unwrap(kind, json.load(f))
+    current = SCHEMA_VERSIONS[kind]
+    if version == current:
+        return None
+
+    migrated = migrate_records(kind, version, records)  # A file newer than the app raises before the backup
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    backup_path = backup_dir / f"{Path(filepath).stem}_v{version}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    shutil.copy2(filepath, backup_path)
+
+    total = len(records)
+    if kind in SINGLE_RECORD:
+        write_records(filepath, kind, list(migrated))
+    else:
+        writer = RecordWriter(filepath, kind)
+        try:
+            for done, record in enumerate(migrated, start=1):
+                writer.write(record)
+                if progress and done % PROGRESS_EVERY == 0 and done != total:
+                    progress(kind, done, total)
+        except BaseException:
+            writer.discard()
+            raise
+        writer.commit()
+    if progress:
+        progress(kind, total, total)
+    return MigrationReport(kind, filepath, version, current, total, str(backup_path))
+
+
+_done = False
+_done_lock = threading.Lock()
+_errors: List[str] = []
+
+
+def bootstrap(progress: Optional[Progress] = print_progress) -> List[MigrationReport]:
+    """Create missing data files and migrate old ones, once per process.
+
+    Sessions that arrive while it runs wait for it to finish. Returns the
+    migrations this call performed; files that could not be set up are
+    reported by ``bootstrap_errors`` and are not retried until a restart.
+    """
+    global _done
+    with _done_lock:
+        if _done:
+            return []
+        DATA_DIR.mkdir(exist_ok=True)
+        reports = []
+        for kind, filepath in DATA_FILES.items():
+            try:
+                if not os.path.exists(filepath):
+                    if kind in CREATED_FILES:
+                        write_records(filepath, kind, [])
+                    continue
+                report = migrate_file(kind, filepath, progress)
+            except json.JSONDecodeError:
+                continue  # Unreadable files load as empty, as they always have
+            except (SchemaError, OSError) as e:
+                print(f"Could not set up {filepath}: {e}")
+                _errors.append(f"{filepath}: {e}")
+                continue
+            if report:
+                reports.append(report)
+        _done = True
+        return reports
+
+
+def bootstrap_errors() -> List[str]:
+    """Data files the bootstrap could not create or migrate, one message each"""
+    return list(_errors)
@@ -0,0 +1,110 @@
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from models.client import Client, ClientManager
+from models.product import Product, ProductManager
+from services.stock_ledger import StockLedger, get_stock_ledger
+
+
+class Catalog:
+    """Single entry point for client and product writes.
+
+    Every write loads the file fresh and saves it under a lock, so a page
+    or API request holding an older copy of the list cannot save over
+    changes made since it loaded. Product writes share the stock ledger's
+    lock, because the ledger also writes stock balances to the product file.
+    """
+
+    def __init__(self, clients_path="data/clients.json", products_path="data/products.json",
+                 ledger: StockLedger = None):
+        self.clients_path = clients_path
+        self.products_path = products_path
+        self.ledger = ledger or get_stock_ledger()
+        self._clients_lock = threading.RLock()
+
+    @contextmanager
+    def locked(self, kind: str):
+        """Hold off other writes to the ``clients`` or ``products`` file, for writers that stream it themselves"""
+        with self._clients_lock if kind == "clients" else self.ledger.lock:
+            yield
+
+    @contextmanager
+    def clients(self) -> Iterator[ClientManager]:
+        """The current clients to change and save; other client writes wait until the block ends"""
+        with self.locked("clients"):
+            yield ClientManager(self.clients_path)
+
+    @contextmanager
+    def products(self) -> Iterator[ProductManager]:
+        """The current products to change and save; other product and stock writes wait until the block ends"""
+        with self.locked("products"):
+            yield ProductManager(self.products_path)
+
+    # Clients
+
+    def add_client(self, client: Client) -> str:
+        with self.clients() as manager:
+            return manager.add_client(client)
+
+    def update_client(self, client_id: str, client: Client) -> bool:
+        with self.clients() as manager:
+            return manager.update_client(client_id, client)
+
+    def delete_client(self, client_id: str) -> bool:
+        with self.clients() as manager:
+            if manager.get_client(client_id) is None:
+                return False
+            manager.delete_client(client_id)
+            return True
+
+    # Products
+
+    def add_product(self, product: Product) -> str:
+        """Add a product and record its stock quantity as its opening balance"""
+        with self.products() as manager:
+            product_id = manager.add_product(product)
+            self.ledger.adjust(product_id, product.stock_quantity)
+            return product_id
+
+    def update_product(self, product_id: str, product: Product, count_stock: bool = False) -> bool:
+        """Replace a product's details.
+
+        Its stock quantity stays at the ledger's balance, which invoices
+        may have changed since ``product`` was loaded, unless
+        ``count_stock`` is set: then the new quantity is recorded as a stock
+        adjustment.
+        """
+        with self.products() as manager:
+            current = manager.get_product(product_id)
+            if current is None:
+                return False
+            if not count_stock:
+                product.stock_quantity = current.stock_quantity
+            manager.update_product(product_id, product)
+            if count_stock:
+                self.ledger.adjust(product_id, product.stock_quantity)
+            return True
+
+    def delete_product(self, product_id: str) -> bool:
+        with self.products() as manager:
+            if manager.get_product(product_id) is None:
+                return False
+            manager.delete_product(product_id)
+            return True
+
+    def apply_price_updates(self, updates: Dict[str, dict]) -> int:
+        with self.products() as manager:
+            return manager.apply_price_updates(updates)
+
+
+_shared_catalog = None
+_shared_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> Catalog:
+    """Process-wide catalog shared by every page, session and API request"""
+    global _shared_catalog
+    with _shared_catalog_lock:
+        if _shared_catalog is None:
+            _shared_catalog = Catalog()
+        return _shared_catalog
@@ -0,0 +1,215 @@
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models.client import Client
+from services.billing_service import get_billing_service
+from services.catalog import Catalog, get_catalog
+
+# Spellings of the same legal form, reduced to one token
+NAME_SYNONYMS = {
+    "limited": "ltd", "teoranta": "ltd", "teo": "ltd", "company": "co", "and": "&",
+    "brothers": "bros", "constructions": "construction", "unlimited": "uc",
+}
+# Tokens too common to say anything about whether two names match
+NAME_STOPWORDS = {"ltd", "co", "&", "the", "plc", "dac", "uc", "of", "ireland", "irl", "group", "services"}
+GENERIC_EMAIL_DOMAINS = {"gmail.com", "yahoo.com", "yahoo.ie", "hotmail.com", "outlook.com", "live.ie",
+                         "eircom.net", "icloud.com", "msn.com"}
+NAME_WEIGHT = 0.6  # Share of the score a close name match is worth
+SAME_NAME_WEIGHT = 0.8  # An identical normalised name, enough by itself for the default threshold
+MAX_BLOCK_SIZE = 200  # Larger blocks (a common token, a busy routing area) are too broad to pair up
+
+_PUNCTUATION_RE = re.compile(r"[^\w&]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalise_name(name: str) -> str:
+    tokens = _PUNCTUATION_RE.sub(" ", (name or "").casefold()).split()
+    return " ".join(token for token in (NAME_SYNONYMS.get(token, token) for token in tokens) if token)
+
+
+def normalise_vat(vat: str) -> str:
+    vat = _SPACES_RE.sub("", vat or "").upper()
+    return vat if not vat or vat.startswith("IE") else "IE" + vat
+
+
+def normalise_email(email: str) -> str:
+    return (email or "").strip().casefold()
+
+
+def normalise_eircode(eircode: str) -> str:
+    return _SPACES_RE.sub("", eircode or "").upper()
+
+
+def normalise_phone(phone: str) -> str:
+    digits = re.sub(r"\D", "", phone or "")
+    if digits.startswith("353"):
+        digits = "0" + digits[3:]
+    return digits
+
+
+@dataclass
+class _Profile:
+    client: Client
+    name: str
+    tokens: Set[str]
+    numbers: Set[str]
+    vat: str
+    email: str
+    domain: str
+    eircode: str
+    phone: str
+
+    @classmethod
+    def of(cls, client: Client) -> "_Profile":
+        name = normalise_name(client.name)
+        email = normalise_email(client.email)
+        domain = email.rpartition("@")[2]
+        return cls(
+            client=client,
+            name=name,
+            tokens={token for token in name.split() if token not in NAME_STOPWORDS},
+            numbers={token for token in name.split() if token.isdigit()},
+            vat=normalise_vat(client.vat_number),
+            email=email,
+            domain="" if domain in GENERIC_EMAIL_DOMAINS else domain,
+            eircode=normalise_eircode(client.postal_code),
+            phone=normalise_phone(client.phone),
+        )
+
+    def blocking_keys(self) -> Iterable[Tuple[str, str]]:
+        if self.vat:
+            yield "vat", self.vat
+        if self.email:
+            yield "email", self.email
+        if self.domain:
+            yield "domain", self.domain
+        if len(self.eircode) == 7:
+            yield "eircode", self.eircode
+        if len(self.eircode) >= 3:
+            yield "routing", self.eircode[:3]
+        if self.phone:
+            yield "phone", self.phone
+        for token in self.tokens - self.numbers:
+            yield "token", token
+
+
+@dataclass
+class DuplicateCandidate:
+    client: Client
+    duplicate: Client
+    score: float  # 0 to 1
+    reasons: List[str] = field(default_factory=list)
+
+
+def _score(a: _Profile, b: _Profile, threshold: float = 0.0) -> Tuple[float, List[str]]:
+    """Match score for two clients; name scoring is skipped once the threshold is out of reach"""
+    reasons = []
+    score = 0.0
+    if a.vat and b.vat:
+        if a.vat == b.vat:
+            score += 0.5
+            reasons.append("same VAT number")
+        else:
+            score -= 0.4  # Different VAT registrations are different businesses
+    if a.email and a.email == b.email:
+        score += 0.4
+        reasons.append("same email")
+    elif a.domain and a.domain == b.domain:
+        score += 0.15
+        reasons.append("same email domain")
+    if a.phone and a.phone == b.phone:
+        score += 0.3
+        reasons.append("same phone")
+    if len(a.eircode) == 7 and a.eircode == b.eircode:
+        score += 0.3
+        reasons.append("same Eircode")
+    elif a.eircode[:3] and a.eircode[:3] == b.eircode[:3]:
+        score += 0.05
+
+    if score + SAME_NAME_WEIGHT < threshold:
+        return max(score, 0.0), reasons
+    if a.name and a.name == b.name:
+        # "Shannon Construction Ltd" and "Shannon Construction Limited"
+        reasons.insert(0, "same name")
+        return max(0.0, min(score + SAME_NAME_WEIGHT, 1.0)), reasons
+    if score + NAME_WEIGHT < threshold:
+        return max(score, 0.0), reasons
+    matcher = SequenceMatcher(None, a.name, b.name)
+    similarity = matcher.ratio() if score + NAME_WEIGHT * matcher.quick_ratio() >= threshold else 0.0
+    if a.tokens or b.tokens:
+        similarity = max(similarity, len(a.tokens & b.tokens) / len(a.tokens | b.tokens))
+    if a.numbers != b.numbers:
+        similarity /= 2  # "Unit 4 Ltd" and "Unit 5 Ltd" are different businesses
+    score += NAME_WEIGHT * similarity
+    if similarity >= 0.99:
+        reasons.insert(0, "same name")
+    elif similarity >= 0.7:
+        reasons.insert(0, f"similar name ({similarity:.0%})")
+    return max(0.0, min(score, 1.0)), reasons
+
+
+class DuplicateDetector:
+    """Finds clients that are probably entered more than once.
+
+    Each client is filed under blocking keys (VAT number, email, email
+    domain, Eircode and its routing key, phone, distinctive name tokens) and
+    only clients sharing a key are compared, so the work grows with the
+    number of near matches rather than with every pair of clients.
+    """
+
+    def __init__(self, clients: List[Client]):
+        self.profiles = [_Profile.of(client) for client in clients]
+        self.blocks: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for index, profile in enumerate(self.profiles):
+            for key in set(profile.blocking_keys()):
+                self.blocks[key].append(index)
+
+    def candidate_pairs(self) -> Set[Tuple[int, int]]:
+        pairs = set()
+        for members in self.blocks.values():
+            if 1 < len(members) <= MAX_BLOCK_SIZE:
+                pairs.update(combinations(members, 2))
+        return pairs
+
+    def find(self, threshold: float = 0.75) -> List[DuplicateCandidate]:
+        """Scored candidate pairs at or above the threshold, best first"""
+        candidates = []
+        for i, j in self.candidate_pairs():
+            score, reasons = _score(self.profiles[i], self.profiles[j], threshold)
+            if score >= threshold:
+                first, second = self.profiles[i].client, self.profiles[j].client
+                # Keep the older record by default
+                if second.created_date < first.created_date:
+                    first, second = second, first
+                candidates.append(DuplicateCandidate(first, second, score, reasons))
+        return sorted(candidates, key=lambda candidate: (-candidate.score, candidate.client.name))
+
+
+def merge_clients(keep_id: str, duplicate_ids: List[str], catalog: Optional[Catalog] = None) -> int:
+    """Fold duplicate clients into one and move their invoices to it.
+
+    Invoices are re-pointed in one write, blank details on the kept client
+    are filled from the duplicates, and the duplicates are removed in one
+    write. Returns the number of invoices moved.
+    """
+    with (catalog or get_catalog()).clients() as manager:
+        keep = manager.get_client(keep_id)
+        if keep is None:
+            raise ValueError("Client to keep not found")
+        duplicate_ids = set(duplicate_ids) - {keep_id}
+        duplicates = [client for client in manager.clients if client.id in duplicate_ids]
+
+        moved = get_billing_service().reassign_client(duplicate_ids, keep)
+
+        for duplicate in duplicates:
+            for name in ("contact_person", "address", "city", "county", "postal_code", "phone", "email", "vat_number"):
+                if not getattr(keep, name) and getattr(duplicate, name):
+                    setattr(keep, name, getattr(duplicate, name))
+            keep.credit_limit = max(keep.credit_limit, duplicate.credit_limit)
+            if duplicate.notes and duplicate.notes not in keep.notes:
+                keep.notes = f"{keep.notes}\n{duplicate.notes}".strip()
+        manager.merge_clients(keep, [duplicate.id for duplicate in duplicates])
+        return moved
@@ -0,0 +1,143 @@
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from models.invoice import Invoice, InvoiceManager
+
+# Unpaid invoices that count against a client's credit limit
+OPEN_STATUSES = ("Sent", "Overdue")
+# Invoices being built in these statuses add nothing to the exposure
+SETTLED_STATUSES = ("Paid", "Cancelled")
+
+
+@dataclass(frozen=True)
+class CreditCheck:
+    credit_limit: float  # 0 means no limit
+    outstanding: float   # Open invoices, not counting the one being checked
+    invoice_amount: float
+
+    @property
+    def limited(self) -> bool:
+        return self.credit_limit > 0
+
+    @property
+    def projected(self) -> float:
+        return self.outstanding + self.invoice_amount
+
+    @property
+    def headroom(self) -> float:
+        return self.credit_limit - self.projected
+
+    @property
+    def utilisation(self) -> float:
+        return self.projected / self.credit_limit if self.limited else 0.0
+
+    @property
+    def exceeded(self) -> bool:
+        return self.limited and self.projected > self.credit_limit + 0.005
+
+
+class CreditLimitExceeded(Exception):
+    """Raised when saving an invoice would take a client over their credit limit"""
+
+    def __init__(self, check: CreditCheck):
+        self.check = check
+        super().__init__(f"Credit limit exceeded by €{-check.headroom:,.2f}")
+
+
+class ExposureIndex:
+    """Outstanding amount per client, kept current as invoices are written.
+
+    The index is built from the invoice file once and then updated with each
+    saved, deleted or re-statused invoice, so a credit check is two dict
+    lookups. Writers call ``refresh`` before writing and ``mark_current``
+    after applying their own change; if the file changes any other way the
+    index is rebuilt on next use.
+    """
+
+    def __init__(self, filepath="data/invoices.json"):
+        self.filepath = filepath
+        self._totals: Dict[str, float] = {}
+        self._entries: Dict[str, Tuple[str, float]] = {}  # invoice id -> (client id, amount)
+        self._version = None
+        self._lock = threading.RLock()
+
+    def outstanding(self, client_id: str) -> float:
+        self.refresh()
+        return self._totals.get(client_id, 0.0)
+
+    def check(self, invoice: Invoice, credit_limit: float) -> CreditCheck:
+        """Credit position for the client if the invoice were saved as it is"""
+        self.refresh()
+        with self._lock:
+            outstanding = self._totals.get(invoice.client_id, 0.0)
+            client_id, amount = self._entries.get(invoice.id, ("", 0.0))
+            if client_id == invoice.client_id:
+                outstanding -= amount
+        invoice_amount = 0.0 if invoice.status in SETTLED_STATUSES else invoice.total_amount
+        return CreditCheck(credit_limit, max(outstanding, 0.0), invoice_amount)
+
+    def update(self, invoice: Invoice):
+        """Apply one saved invoice"""
+        with self._lock:
+            self._discard(invoice.id)
+            if invoice.status in OPEN_STATUSES:
+                amount = invoice.total_amount
+                self._entries[invoice.id] = (invoice.client_id, amount)
+                self._totals[invoice.client_id] = self._totals.get(invoice.client_id, 0.0) + amount
+
+    def remove(self, invoice_id: str):
+        with self._lock:
+            self._discard(invoice_id)
+
+    def rebuild(self, invoices: List[Invoice]):
+        with self._lock:
+            self._totals, self._entries = {}, {}
+            for invoice in invoices:
+                self.update(invoice)
+
+    def mark_current(self):
+        """Record the invoice file as reflected in the index"""
+        with self._lock:
+            self._version = self._file_version()
+
+    def refresh(self):
+        """Rebuild from the invoice file if it changed since the index last saw it"""
+        version = self._file_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self.rebuild(InvoiceManager(self.filepath).invoices)
+            self._version = version
+
+    def _discard(self, invoice_id: str):
+        entry = self._entries.pop(invoice_id, None)
+        if entry:
+            client_id, amount = entry
+            remaining = self._totals.get(client_id, 0.0) - amount
+            if abs(remaining) < 0.005:
+                self._totals.pop(client_id, None)
+            else:
+                self._totals[client_id] = remaining
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.filepath)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return 0, 0
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_exposure_index() -> ExposureIndex:
+    """Process-wide exposure index shared by every page and session"""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = ExposureIndex()
+        return _shared_index
@@ -0,0 +1,445 @@
+import codecs
+import csv
+import io
+import re
+import time
+import uuid
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+from models.client import Client
+from models.invoice import Invoice, InvoiceItem
+from models.product import Product
+from models.schema import RecordWriter, read_records
+from services.billing_service import get_billing_service
+from services.catalog import get_catalog
+from services.pricing_engine import get_pricing_engine
+from services.stock_ledger import get_stock_ledger, stock_required
+from utils.validators import CLIENT_VALIDATOR, PRODUCT_VALIDATOR
+
+KINDS = ("clients", "products", "invoices")
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000  # Errors kept for display; the total is still counted
+
+INVOICE_STATUSES = ("Draft", "Sent", "Paid", "Overdue", "Cancelled")
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y")
+TRUE_VALUES = {"1", "true", "yes", "y", "t", "x"}
+FALSE_VALUES = {"0", "false", "no", "n", "f", ""}
+FALLBACK_ENCODING = "cp1252"  # What older Excel saves as "CSV" on Windows in Ireland
+ENCODING_NAMES = {"utf-8-sig": "UTF-8", "cp1252": "Windows-1252"}
+
+# Normalised header -> field name, for headers that differ from the field names
+ALIASES = {
+    "clients": {
+        "company": "name", "company_name": "name", "client": "name", "client_name": "name",
+        "contact": "contact_person", "vat": "vat_number", "eircode": "postal_code",
+        "postcode": "postal_code", "credit_limit_eur": "credit_limit", "terms": "payment_terms",
+    },
+    "products": {
+        "product": "name", "product_name": "name", "weight": "weight_per_unit", "weight_kg": "weight_per_unit",
+        "price": "base_price", "base_price_eur": "base_price", "unit_price": "base_price",
+        "cutting_charge_eur": "cutting_charge", "uom": "unit_of_measure", "unit": "unit_of_measure",
+        "stock": "stock_quantity", "min_order": "min_order_quantity", "cuttable": "is_cuttable",
+        "active": "is_active",
+    },
+    "invoices": {
+        "number": "invoice_number", "invoice": "invoice_number", "invoice_no": "invoice_number",
+        "client": "client_name", "customer": "client_name", "date": "issue_date", "vat": "vat_rate",
+        "vat_rate_percent": "vat_rate", "product": "product_name", "qty": "quantity", "price": "unit_price",
+        "cuts": "cuts_required", "cutting_charge": "cutting_charge_per_cut", "discount": "discount_percentage",
+        "shipping": "shipping_cost", "handling": "handling_cost",
+    },
+}
+
+# Columns offered in the downloadable templates; any field name is accepted
+TEMPLATE_COLUMNS = {
+    "clients": ["name", "contact_person", "email", "phone", "address", "city", "county", "postal_code",
+                "country", "vat_number", "payment_terms", "credit_limit", "notes"],
+    "products": ["name", "description", "category", "grade", "dimensions", "weight_per_unit", "base_price",
+                 "cutting_charge", "unit_of_measure", "finish", "stock_quantity", "min_order_quantity",
+                 "is_cuttable", "is_active"],
+    "invoices": ["invoice_number", "client_name", "issue_date", "due_date", "status", "vat_rate", "notes",
+                 "product_name", "description", "quantity", "unit_price", "cuts_required",
+                 "cutting_charge_per_cut", "discount_percentage"],
+}
+
+INVOICE_HEADER_FIELDS = {f.name: f.type for f in fields(Invoice)
+                         if f.name not in ("id", "items", "created_date", "last_modified")}
+INVOICE_ITEM_FIELDS = {f.name: f.type for f in fields(InvoiceItem) if f.name != "unit_weight_kg"}
+
+
+@dataclass
+class RowError:
+    row: int  # Line in the file; the header is line 1
+    field: str
+    message: str
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    dry_run: bool = False
+    rows: int = 0
+    imported: int = 0  # Records, not rows: invoices span several rows
+    rejected_rows: int = 0
+    error_count: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    elapsed: float = 0.0
+    encoding: str = ""
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def errors_truncated(self) -> bool:
+        return self.error_count > len(self.errors)
+
+    def add_errors(self, errors: List[RowError]):
+        self.error_count += len(errors)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        if room > 0:
+            self.errors.extend(errors[:room])
+
+
+def normalise_header(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.strip().lower()).strip("_")
+
+
+def _parse_number(value: str, decimal_comma: bool) -> float:
+    value = value.replace("€", "").replace(" ", "").replace(" ", "")
+    if decimal_comma:
+        value = value.replace(".", "").replace(",", ".")
+    else:
+        value = value.replace(",", "")
+    return float(value)
+
+
+def _parse_date(value: str) -> str:
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+class CSVEncodingError(ValueError):
+    """The file is not text in the encoding it was read with"""
+
+
+def detect_encoding(source: BinaryIO) -> str:
+    """UTF-8 if the whole file decodes as UTF-8, otherwise Windows-1252.
+
+    Reads the file through once and seeks back to where it started.
+    Sources that cannot seek are taken to be UTF-8.
+    """
+    if not source.seekable():
+        return "utf-8-sig"
+    start = source.tell()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    finally:
+        source.seek(start)
+
+
+class CSVImporter:
+    """Streams clients, products or historic invoices from CSV into the data files.
+
+    Rows are read and validated a chunk at a time and written straight to a
+    new copy of the data file, so memory does not grow with the size of the
+    upload. Every valid row is added with one file replacement; invalid
+    rows are reported with their line number and skipped. Excel exports are
+    handled: a byte-order mark, semicolon delimiters with decimal commas and
+    day-first dates. With no ``encoding`` the file is read as UTF-8, or as
+    Windows-1252 if it is not valid UTF-8. Text that does not decode stops
+    the import with a ``CSVEncodingError`` rather than being replaced.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, encoding: Optional[str] = None):
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.decimal_comma = False
+
+    def import_file(self, kind: str, source: Union[BinaryIO, TextIO], dry_run: bool = False,
+                    progress: Optional[Callable[[int], None]] = None) -> ImportReport:
+        """Import one CSV file. ``progress`` is called with the rows read so far after each chunk.
+
+        With ``dry_run``, rows are validated and counted but nothing is written.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown import type: {kind}")
+        report = ImportReport(kind=kind, dry_run=dry_run)
+        start = time.perf_counter()
+        if not isinstance(source, io.TextIOBase):
+            report.encoding = self.encoding or detect_encoding(source)
+        rows = self._read_rows(kind, source, report.encoding)
+        try:
+            if kind == "invoices":
+                with get_billing_service().exclusive() as service:
+                    self._import_invoices(rows, report, dry_run, progress, service.ledger)
+            elif dry_run:
+                self._import_records(kind, rows, report, dry_run, progress)
+            else:
+                with get_catalog().locked(kind):
+                    self._import_records(kind, rows, report, dry_run, progress)
+        except UnicodeDecodeError as e:
+            name = ENCODING_NAMES.get(report.encoding, report.encoding)
+            raise CSVEncodingError(
+                f"The file is not valid {name} text: it contains byte 0x{e.object[e.start:e.end].hex()}, "
+                f"which {name} does not use. Nothing was imported; save the file as 'CSV UTF-8' "
+                f"or choose its encoding.") from e
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def _read_rows(self, kind: str, source, encoding: str) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+        """Chunks of (line number, row) with headers mapped to field names"""
+        wrapped = not isinstance(source, io.TextIOBase)
+        text = io.TextIOWrapper(source, encoding=encoding, newline="") if wrapped else source
+        try:
+            yield from self._chunks(kind, text)
+        finally:
+            if wrapped:
+                text.detach()  # Leave the caller's file open
+
+    def _chunks(self, kind: str, text: TextIO) -> Iterator[List[Tuple[int, Dict[str, str]]]]:
+        header_line = text.readline()
+        delimiter = max((",", ";", "\t"), key=header_line.count)
+        self.decimal_comma = delimiter == ";"
+        aliases = ALIASES[kind]
+        header = [aliases.get(normalise_header(name), normalise_header(name))
+                  for name in next(csv.reader([header_line], delimiter=delimiter), [])]
+
+        reader = csv.reader(text, delimiter=delimiter)
+        chunk = []
+        for values in reader:
+            if not any(value.strip() for value in values):
+                continue
+            row = {name: value.strip() for name, value in zip(header, values) if name}
+            chunk.append((reader.line_num + 1, row))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _coerce(self, line: int, row: Dict[str, str], types: Dict[str, type],
+                errors: List[RowError]) -> Dict[str, object]:
+        values = {}
+        for name, kind in types.items():
+            raw = row.get(name)
+            if raw is None or (raw == "" and kind is not str):
+                continue
+            try:
+                if kind is bool:
+                    lowered = raw.lower()
+                    if lowered not in TRUE_VALUES | FALSE_VALUES:
+                        raise ValueError(raw)
+                    values[name] = lowered in TRUE_VALUES
+                elif kind in (int, float):
+                    number = _parse_number(raw, self.decimal_comma)
+                    if number < 0:
+                        errors.append(RowError(line, name, "Value must be positive"))
+                        continue
+                    values[name] = int(number) if kind is int else number
+                else:
+                    values[name] = raw
+            except ValueError:
+                errors.append(RowError(line, name, f"Invalid value: {raw}"))
+        return values
+
+    # Clients and products
+
+    def _import_records(self, kind: str, chunks, report: ImportReport, dry_run: bool, progress):
+        model, validator = (Client, CLIENT_VALIDATOR) if kind == "clients" else (Product, PRODUCT_VALIDATOR)
+        filepath = f"data/{kind}.json"
+        types = {f.name: f.type for f in fields(model) if f.name not in ("id", "created_date")}
+        existing = read_records(filepath, kind)
+        seen = {record.get("name", "").casefold() for record in existing}
+
+        writer = None if dry_run else RecordWriter(filepath, kind)
+        stock = {}
+        try:
+            if writer:
+                for record in existing:
+                    writer.write(record)
+            del existing
+
+            for chunk in chunks:
+                parsed = []
+                for line, row in chunk:
+                    errors = []
+                    parsed.append((line, self._coerce(line, row, types, errors), errors))
+                for error in validator.validate_batch(values for _, values, _ in parsed):
+                    line, _, errors = parsed[error.index]
+                    errors.append(RowError(line, error.field, error.message))
+
+                for line, values, errors in parsed:
+                    report.rows += 1
+                    name = values.get("name", "")
+                    if name and name.casefold() in seen:
+                        errors.append(RowError(line, "name", f"'{name}' already exists"))
+                    if errors:
+                        report.rejected_rows += 1
+                        report.add_errors(errors)
+                        continue
+
+                    seen.add(name.casefold())
+                    record = model(id=str(uuid.uuid4()), **values)
+                    if kind == "products" and record.stock_quantity:
+                        stock[record.id] = record.stock_quantity
+                    if writer:
+                        writer.write(dict(vars(record)))  # Flat dataclass; asdict would deep-copy
+                    report.imported += 1
+                if progress:
+                    progress(report.rows)
+        except BaseException:
+            if writer:
+                writer.discard()
+            raise
+
+        if writer:
+            writer.commit()
+            if stock:
+                get_stock_ledger().adjust_many(stock)
+
+    # Invoices: one row per line item, rows of an invoice next to each other
+
+    def _import_invoices(self, chunks, report: ImportReport, dry_run: bool, progress, ledger):
+        filepath = "data/invoices.json"
+        clients = read_records("data/clients.json", "clients")
+        clients_by_name = {client["name"].casefold(): client for client in clients}
+        clients_by_id = {client["id"]: client for client in clients}
+        products = [Product.from_dict(data) for data in read_records("data/products.json", "products")]
+        products_by_name = {product.name.casefold(): product for product in products}
+        products_by_id = {product.id: product for product in products}
+        engine = get_pricing_engine()
+
+        existing = read_records(filepath, "invoices")
+        seen = {record.get("invoice_number", "") for record in existing}
+        writer = None if dry_run else RecordWriter(filepath, "invoices")
+        sales = []  # (invoice id, number, quantity per product) for the stock ledger
+
+        def finish(group):
+            line, number = group[0][0], group[0][1].get("invoice_number", "")
+            errors = []
+            header = self._coerce(line, group[0][1], INVOICE_HEADER_FIELDS, errors)
+            if not number:
+                errors.append(RowError(line, "invoice_number", "Invoice number is required"))
+            elif number in seen:
+                errors.append(RowError(line, "invoice_number", f"Invoice {number} already exists or is split"))
+
+            client = (clients_by_id.get(header.get("client_id", ""))
+                      or clients_by_name.get(header.get("client_name", "").casefold()))
+            if client is None:
+                errors.append(RowError(line, "client_name", "Client not found"))
+            else:
+                header["client_id"], header["client_name"] = client["id"], client["name"]
+                header.setdefault("vat_number", client.get("vat_number", ""))
+                header.setdefault("payment_terms", client.get("payment_terms", "30 days"))
+            if header.get("status", "Draft") not in INVOICE_STATUSES:
+                errors.append(RowError(line, "status", f"Status must be one of {', '.join(INVOICE_STATUSES)}"))
+            for date_field in ("issue_date", "due_date"):
+                if header.get(date_field):
+                    try:
+                        header[date_field] = _parse_date(header[date_field])
+                    except ValueError:
+                        errors.append(RowError(line, date_field, "Invalid date"))
+            if header.get("issue_date") and not header.get("due_date") and not errors:
+                due = datetime.strptime(header["issue_date"], "%Y-%m-%d") + timedelta(days=30)
+                header["due_date"] = due.strftime("%Y-%m-%d")
+
+            items = []
+            for item_line, row in group:
+                values = self._coerce(item_line, row, INVOICE_ITEM_FIELDS, errors)
+                product = (products_by_id.get(values.get("product_id", ""))
+                           or products_by_name.get(values.get("product_name", "").casefold()))
+                if product is None and not values.get("product_name"):
+                    errors.append(RowError(item_line, "product_name", "Product is required"))
+                    continue
+                if not values.get("quantity"):
+                    errors.append(RowError(item_line, "quantity", "Quantity is required"))
+                    continue
+                if product is not None:
+                    values["product_id"], values["product_name"] = product.id, product.name
+                    values["unit_weight_kg"] = engine.quote(product).unit_weight_kg
+                    values.setdefault("unit_price", product.base_price)
+                items.append(InvoiceItem(**{"product_id": "", "description": "", "unit_price": 0.0, **values}))
+
+            if errors:
+                report.rejected_rows += len(group)
+                report.add_errors(errors)
+                return
+            seen.add(number)
+            invoice = Invoice(**header)
+            invoice.items = items
+            if writer:
+                writer.write({**vars(invoice), "items": [dict(vars(item)) for item in items]})
+                quantities = stock_required(invoice)
+                if quantities:
+                    sales.append((invoice.id, invoice.invoice_number, quantities))
+            report.imported += 1
+
+        try:
+            if writer:
+                for record in existing:
+                    writer.write(record)
+            del existing
+
+            group = []
+            for chunk in chunks:
+                for line, row in chunk:
+                    report.rows += 1
+                    if group and row.get("invoice_number", "") != group[0][1].get("invoice_number", ""):
+                        finish(group)
+                        group = []
+                    group.append((line, row))
+                if progress:
+                    progress(report.rows)
+            if group:
+                finish(group)
+        except BaseException:
+            if writer:
+                writer.discard()
+            raise
+
+        if writer:
+            writer.commit()
+            for start in range(0, len(sales), self.chunk_size):
+                ledger.record_history(sales[start:start + self.chunk_size])
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import clients, products or historic invoices from CSV")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("csv_file")
+    parser.add_argument("--dry-run", action="store_true", help="Validate only, write nothing")
+    parser.add_argument("--encoding", help="File encoding, e.g. cp1252 for older Excel (default: detect)")
+    args = parser.parse_args()
+
+    importer = CSVImporter(encoding=args.encoding)
+    try:
+        with open(args.csv_file, "rb") as f:
+            report = importer.import_file(args.kind, f, dry_run=args.dry_run)
+    except CSVEncodingError as e:
+        print(e)
+        return 2
+
+    action = "Validated" if report.dry_run else "Imported"
+    print(f"{action} {report.imported} {report.kind} from {report.rows} rows "
+          f"in {report.elapsed:.2f}s ({report.rows_per_second:,.0f} rows/s)")
+    if report.rejected_rows:
+        print(f"{report.rejected_rows} row(s) rejected:")
+        for error in report.errors:
+            print(f"  line {error.row}, {error.field}: {error.message}")
+        if report.errors_truncated:
+            print(f"  ... and {report.error_count - len(report.errors)} more")
+    return 1 if report.rejected_rows else 0
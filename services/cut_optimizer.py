@@ -0,0 +1,190 @@
+import math
+import random
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+DEFAULT_KERF_MM = 3.0  # Material lost per saw cut
+DEFAULT_TIME_BUDGET = 0.5  # Seconds the improvement passes may use
+
+_LENGTH_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(mm|cm|m)?\b(?:\s*(length|long|lg))?", re.I)
+_SCHEDULE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(mm|cm|m)?\s*(?:[x×*@]\s*(\d+))?\s*$", re.I)
+_UNIT_MM = {"mm": 1.0, "cm": 10.0, "m": 1000.0}
+
+
+def parse_stock_length(dimensions: str) -> Optional[float]:
+    """Stock bar length in mm from a Product.dimensions string.
+
+    Understands "12mm dia × 12m length", "20mm x 20mm x 6000mm" and
+    "20x20x6000": a value in metres or marked as the length wins, otherwise
+    the largest dimension is taken as the length if it is at least 1 metre.
+    """
+    if not dimensions:
+        return None
+    candidates = []
+    for value, unit, marker in _LENGTH_RE.findall(dimensions):
+        length = float(value) * _UNIT_MM[(unit or "mm").lower()]
+        if marker or (unit or "").lower() == "m":
+            return length
+        candidates.append(length)
+    longest = max(candidates, default=0.0)
+    return longest if longest >= 1000 else None
+
+
+def parse_cut_schedule(text: str) -> Tuple[List[float], List[str]]:
+    """Piece lengths in mm from one "length [x quantity]" entry per line or comma.
+
+    Lengths without a unit are millimetres. Returns the pieces and a list of
+    entries that could not be read.
+    """
+    pieces, errors = [], []
+    for entry in re.split(r"[\n,;]+", text or ""):
+        if not entry.strip():
+            continue
+        match = _SCHEDULE_RE.match(entry)
+        if not match:
+            errors.append(entry.strip())
+            continue
+        value, unit, count = match.groups()
+        length = float(value) * _UNIT_MM[(unit or "mm").lower()]
+        if length <= 0:
+            errors.append(entry.strip())
+            continue
+        pieces.extend([length] * int(count or 1))
+    return pieces, errors
+
+
+@dataclass(frozen=True)
+class CutPlan:
+    stock_length: float
+    kerf: float
+    bars: Tuple[Tuple[float, ...], ...]  # Piece lengths cut from each bar, longest first
+    optimal: bool  # True when the bar count equals the lower bound
+    elapsed: float
+
+    @property
+    def bars_needed(self) -> int:
+        return len(self.bars)
+
+    @property
+    def pieces(self) -> int:
+        return sum(len(bar) for bar in self.bars)
+
+    def offcut(self, bar: Tuple[float, ...]) -> float:
+        """Length left on a bar after its pieces and saw cuts"""
+        return max(self.stock_length - sum(bar) - self.kerf * self._cuts_on(bar), 0.0)
+
+    def _cuts_on(self, bar: Tuple[float, ...]) -> int:
+        # The last piece needs no cut when it uses up the rest of the bar
+        used = sum(bar) + self.kerf * (len(bar) - 1)
+        return len(bar) - 1 if self.stock_length - used < 1e-6 else len(bar)
+
+    @property
+    def cuts(self) -> int:
+        return sum(self._cuts_on(bar) for bar in self.bars)
+
+    @property
+    def waste_mm(self) -> float:
+        return self.stock_length * self.bars_needed - sum(sum(bar) for bar in self.bars)
+
+    @property
+    def waste_percentage(self) -> float:
+        total = self.stock_length * self.bars_needed
+        return self.waste_mm / total * 100 if total else 0.0
+
+
+def optimise_cuts(pieces: List[float], stock_length: float, kerf: float = DEFAULT_KERF_MM,
+                  time_budget: float = DEFAULT_TIME_BUDGET) -> CutPlan:
+    """Plan the cuts for the requested pieces from bars of one stock length.
+
+    Runs first-fit decreasing, then spends up to ``time_budget`` seconds on
+    improvement passes while the bar count is above the lower bound.
+    Identical requests are answered from a cache.
+    """
+    if not pieces:
+        return CutPlan(stock_length, kerf, (), True, 0.0)
+    too_long = [piece for piece in pieces if piece > stock_length]
+    if too_long:
+        raise ValueError(f"Piece of {max(too_long):g}mm is longer than the {stock_length:g}mm stock length")
+    return _optimise(tuple(sorted(pieces, reverse=True)), float(stock_length), float(kerf), float(time_budget))
+
+
+@lru_cache(maxsize=256)
+def _optimise(pieces: Tuple[float, ...], stock_length: float, kerf: float, time_budget: float) -> CutPlan:
+    start = time.perf_counter()
+    deadline = start + time_budget
+
+    # Work in tenths of a millimetre. Every piece takes its length plus one
+    # kerf; the extra kerf of capacity lets the last piece on a bar run to
+    # the end without a cut.
+    capacity = round((stock_length + kerf) * 10)
+    sizes = [round((piece + kerf) * 10) for piece in pieces]
+    lower_bound = max(1, -(-sum(sizes) // capacity))
+
+    best = _first_fit(sizes, capacity)
+    rng = random.Random(len(pieces))
+    while len(best) > lower_bound and time.perf_counter() < deadline:
+        best = _repack_pass(best, capacity, rng)
+
+    bars = tuple(sorted((tuple(sorted((size / 10 - kerf for size in bar), reverse=True)) for bar in best),
+                        key=lambda bar: -sum(bar)))
+    return CutPlan(stock_length, kerf, bars, len(best) == lower_bound, time.perf_counter() - start)
+
+
+def _first_fit(sizes: List[int], capacity: int) -> List[List[int]]:
+    bars, free = [], []
+    for size in sizes:
+        for i, space in enumerate(free):
+            if size <= space:
+                bars[i].append(size)
+                free[i] = space - size
+                break
+        else:
+            bars.append([size])
+            free.append(capacity - size)
+    return bars
+
+
+def _repack_pass(bars: List[List[int]], capacity: int, rng: random.Random) -> List[List[int]]:
+    """Repack the emptiest bar together with a few random others.
+
+    Each new bar takes the subset of the pooled pieces that fills it best.
+    The result is kept when it needs fewer bars or gathers more of the
+    offcut into one bar, which makes that bar easier to empty next time.
+    """
+    emptiest = min(range(len(bars)), key=lambda i: sum(bars[i]))
+    others = [i for i in range(len(bars)) if i != emptiest]
+    chosen = [emptiest] + rng.sample(others, min(len(others), rng.randint(1, 3)))
+    pool = [size for i in chosen for size in bars[i]]
+
+    repacked = []
+    while pool:
+        subset = _fullest_subset(pool, capacity)
+        repacked.append([pool[i] for i in subset])
+        for i in sorted(subset, reverse=True):
+            pool.pop(i)
+
+    before = sum(sum(bars[i]) ** 2 for i in chosen)
+    after = sum(sum(bar) ** 2 for bar in repacked)
+    if len(repacked) < len(chosen) or after > before or (after == before and rng.random() < 0.5):
+        kept = [bar for i, bar in enumerate(bars) if i not in chosen]
+        return kept + repacked
+    return bars
+
+
+def _fullest_subset(sizes: List[int], capacity: int) -> List[int]:
+    """Indexes of the pieces that fill one bar as fully as possible (subset sum)"""
+    mask = (1 << (capacity + 1)) - 1
+    reachable = [1]
+    for size in sizes:
+        reachable.append((reachable[-1] | (reachable[-1] << size)) & mask)
+
+    target = reachable[-1].bit_length() - 1
+    chosen = []
+    for i in range(len(sizes) - 1, -1, -1):
+        if not (reachable[i] >> target) & 1:
+            chosen.append(i)
+            target -= sizes[i]
+    return chosen
@@ -4,6 +4,9 @@ from pathlib import Path
 from typing import Dict, Any
 import shutil
 from datetime import datetime
+from models.schema import SCHEMA_VERSIONS, unwrap, write_records
+
+SECRET_FILES = {"smtp.json"}  # Credentials are never copied into backups or exports
 
 class DataManager:
     def __init__(self):
@@ -25,7 +28,7 @@ class DataManager:
         # Create a zip file with all data
         import zipfile
         with zipfile.ZipFile(backup_path, 'w') as zipf:
-            for file_path in self.data_dir.glob("*.json"):
+            for file_path in self._shareable_files():
                 zipf.write(file_path, file_path.name)
         
         return str(backup_path)
@@ -47,7 +50,7 @@ class DataManager:
         
         if format_type == "json":
             export_data = {}
-            for file_path in self.data_dir.glob("*.json"):
+            for file_path in self._shareable_files():
                 with open(file_path, 'r') as f:
                     export_data[file_path.stem] = json.load(f)
             
@@ -64,6 +67,9 @@ class DataManager:
             # This is more complex and would require specific handling for each data type
             pass
     
+    def _shareable_files(self):
+        return [path for path in self.data_dir.glob("*.json") if path.name not in SECRET_FILES]
+    
     def get_data_stats(self) -> Dict[str, Any]:
         """Get statistics about the data"""
         stats = {}
@@ -75,6 +81,8 @@ class DataManager:
                     
                 if file_path.stem == "company":
                     stats["company_configured"] = bool(data.get("name"))
+                elif file_path.stem in SCHEMA_VERSIONS:
+                    stats[f"{file_path.stem}_count"] = len(unwrap(file_path.stem, data)[1])
                 elif isinstance(data, list):
                     stats[f"{file_path.stem}_count"] = len(data)
                 else:
@@ -89,9 +97,8 @@ class DataManager:
         """Clear all data (with confirmation)"""
         try:
             for file_path in self.data_dir.glob("*.json"):
-                if file_path.stem == "company":
-                    with open(file_path, 'w') as f:
-                        json.dump({}, f)
+                if file_path.stem in SCHEMA_VERSIONS:
+                    write_records(str(file_path), file_path.stem, [])
                 else:
                     with open(file_path, 'w') as f:
                         json.dump([], f)
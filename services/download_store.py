@@ -0,0 +1,130 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class SpooledFile:
+    token: str
+    path: Path
+    filename: str
+    mime: str
+    size: int
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+    def reader(self) -> Callable[[], bytes]:
+        """Deferred loader for st.download_button: reads the file only when clicked"""
+        path = self.path
+        return lambda: path.read_bytes()
+
+
+class DownloadStore:
+    """Temporary on-disk spool for generated downloads (PDFs, ZIPs, CSVs).
+
+    Pages spool a file once and hand st.download_button a deferred reader,
+    so the bytes stay on disk until the user actually clicks download
+    instead of being embedded in the page on every rerun.
+    """
+
+    def __init__(self, spool_dir=None, ttl_seconds=3600, cleanup_interval=60):
+        self.spool_dir = Path(spool_dir or Path(tempfile.gettempdir()) / "irish_steel_downloads")
+        self.ttl_seconds = ttl_seconds
+        self.cleanup_interval = cleanup_interval
+        self._files: Dict[str, SpooledFile] = {}
+        self._lock = threading.Lock()
+        self._last_cleanup = 0.0
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+
+    def spool(self, data: bytes, filename: str, mime: str) -> SpooledFile:
+        """Write data to the spool and return its handle"""
+        with self.open_spool(filename, mime) as (f, spooled):
+            f.write(data)
+        return spooled
+
+    @contextmanager
+    def open_spool(self, filename: str, mime: str):
+        """Stream a download straight to disk.
+
+        Yields ``(file, spooled)``; the spooled file becomes available to
+        ``get`` once the block exits without error.
+        """
+        self.cleanup()
+        token = uuid.uuid4().hex
+        spooled = SpooledFile(
+            token=token,
+            path=self.spool_dir / f"{token}{Path(filename).suffix}",
+            filename=filename,
+            mime=mime,
+            size=0,
+            expires_at=time.time() + self.ttl_seconds,
+        )
+        try:
+            with open(spooled.path, "wb") as f:
+                yield f, spooled
+        except BaseException:
+            spooled.path.unlink(missing_ok=True)
+            raise
+
+        spooled.size = spooled.path.stat().st_size
+        with self._lock:
+            self._files[token] = spooled
+
+    def get(self, token: str) -> Optional[SpooledFile]:
+        """Return a live spooled file, or None if it expired or is unknown"""
+        with self._lock:
+            spooled = self._files.get(token)
+        if spooled is None or spooled.expired or not spooled.path.exists():
+            return None
+        return spooled
+
+    def discard(self, token: str):
+        with self._lock:
+            spooled = self._files.pop(token, None)
+        if spooled is not None:
+            spooled.path.unlink(missing_ok=True)
+
+    def cleanup(self, force: bool = False):
+        """Remove expired spool files, at most once per cleanup interval"""
+        now = time.time()
+        if not force and now - self._last_cleanup < self.cleanup_interval:
+            return
+        self._last_cleanup = now
+
+        with self._lock:
+            expired = [token for token, spooled in self._files.items() if spooled.expired]
+            for token in expired:
+                self._files.pop(token).path.unlink(missing_ok=True)
+            known = {spooled.path for spooled in self._files.values()}
+
+        # Leftovers from earlier runs of the application
+        for path in self.spool_dir.iterdir():
+            if path in known:
+                continue
+            try:
+                if now - path.stat().st_mtime > self.ttl_seconds:
+                    os.unlink(path)
+            except OSError:
+                continue
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_download_store() -> DownloadStore:
+    """Process-wide spool shared by every page and session"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = DownloadStore()
+        return _shared_store
@@ -0,0 +1,174 @@
+import atexit
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from models.invoice import Invoice
+from models.schema import SCHEMA_KEY, SCHEMA_VERSIONS, migrate_records
+
+SAVE_DELAY = 2.0  # Seconds of quiet before a draft is written
+MAX_DELAY = 10.0  # A draft that keeps changing is still written this often
+
+
+@dataclass
+class DraftSummary:
+    invoice_id: str
+    owner: str
+    saved_at: str
+    invoice_number: str
+    client_name: str
+    items: int
+    total_amount: float
+
+
+def _invoice(record: dict) -> Invoice:
+    """The draft's invoice, migrated if it was saved under an older invoice schema"""
+    data = record["invoice"]
+    version = record.get(SCHEMA_KEY, 0)
+    if version != SCHEMA_VERSIONS["invoices"]:
+        data = next(migrate_records("invoices", version, [data]))
+    return Invoice.from_dict(data)
+
+
+class DraftStore:
+    """Autosave for invoices that are still being built.
+
+    Each draft is its own small JSON file, kept apart from the issued
+    invoices. ``schedule`` only snapshots the invoice; a background thread
+    writes it once the draft has been quiet for ``delay`` seconds (or
+    ``max_delay`` after its first unsaved change), so a burst of edits costs
+    one write of that draft and nothing else. Unchanged snapshots are not
+    written again.
+    """
+
+    def __init__(self, directory="data/drafts", delay: float = SAVE_DELAY, max_delay: float = MAX_DELAY):
+        self.directory = Path(directory)
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending: Dict[str, Tuple[str, str, float, float]] = {}  # id -> (owner, json, first change, due)
+        self._written: Dict[str, str] = {}  # id -> json last written
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def schedule(self, invoice: Invoice, owner: str = ""):
+        """Queue the invoice for saving; later calls for the same draft replace the snapshot"""
+        record = json.dumps({SCHEMA_KEY: SCHEMA_VERSIONS["invoices"], "owner": owner, "invoice": invoice.to_dict()})
+        now = time.monotonic()
+        with self._condition:
+            if self._written.get(invoice.id) == record:
+                self._pending.pop(invoice.id, None)
+                return
+            _, _, first, _ = self._pending.get(invoice.id, (owner, record, now, now))
+            self._pending[invoice.id] = (owner, record, first, min(now + self.delay, first + self.max_delay))
+            self._ensure_worker()
+            self._condition.notify()
+
+    def discard(self, invoice_id: str):
+        """Forget the draft, e.g. once it has been saved as an invoice or cleared"""
+        with self._condition:
+            self._pending.pop(invoice_id, None)
+            self._written.pop(invoice_id, None)
+            self._path(invoice_id).unlink(missing_ok=True)
+
+    def load(self, invoice_id: str) -> Optional[Invoice]:
+        with self._condition:
+            pending = self._pending.get(invoice_id)
+        try:
+            record = json.loads(pending[1]) if pending else json.loads(self._path(invoice_id).read_text())
+            return _invoice(record)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def list_drafts(self, owner: Optional[str] = None) -> List[DraftSummary]:
+        """Saved and pending drafts, newest first; only ``owner``'s when given"""
+        with self._condition:
+            pending = {invoice_id: record for invoice_id, (_, record, _, _) in self._pending.items()}
+        records = {}
+        for path in self.directory.glob("*.json") if self.directory.exists() else ():
+            try:
+                records[path.stem] = (json.loads(path.read_text()), path.stat().st_mtime)
+            except (OSError, ValueError):
+                continue
+        for invoice_id, record in pending.items():
+            records[invoice_id] = (json.loads(record), time.time())
+
+        drafts = []
+        for invoice_id, (record, modified) in records.items():
+            if owner is not None and record.get("owner", "") != owner:
+                continue
+            try:
+                invoice = _invoice(record)
+            except (ValueError, KeyError, TypeError):
+                continue
+            drafts.append(DraftSummary(
+                invoice_id=invoice_id,
+                owner=record.get("owner", ""),
+                saved_at=datetime.fromtimestamp(modified).isoformat(timespec="seconds"),
+                invoice_number=invoice.invoice_number,
+                client_name=invoice.client_name,
+                items=len(invoice.items),
+                total_amount=invoice.total_amount,
+            ))
+        return sorted(drafts, key=lambda draft: draft.saved_at, reverse=True)
+
+    def flush(self):
+        """Write every pending draft now"""
+        with self._condition:
+            due = list(self._pending)
+        self._write(due)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="draft-autosave", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    due = [invoice_id for invoice_id, (_, _, _, at) in self._pending.items() if at <= now]
+                    if due:
+                        break
+                    next_due = min((at for _, _, _, at in self._pending.values()), default=None)
+                    self._condition.wait(None if next_due is None else next_due - now)
+            self._write(due)
+
+    def _write(self, invoice_ids: List[str]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for invoice_id in invoice_ids:
+            with self._condition:
+                entry = self._pending.pop(invoice_id, None)
+                if entry is None:
+                    continue
+                record = entry[1]
+                path = self._path(invoice_id)
+                temp_path = path.with_suffix(".tmp")
+                try:
+                    temp_path.write_text(record)
+                    os.replace(temp_path, path)
+                    self._written[invoice_id] = record
+                except OSError:
+                    # Try again with the next change rather than losing the snapshot
+                    temp_path.unlink(missing_ok=True)
+
+    def _path(self, invoice_id: str) -> Path:
+        return self.directory / f"{Path(invoice_id).name}.json"
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_draft_store() -> DraftStore:
+    """Process-wide draft store shared by every page and session"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = DraftStore()
+            atexit.register(_shared_store.flush)
+        return _shared_store
@@ -0,0 +1,456 @@
+import json
+import os
+import queue
+import smtplib
+import ssl
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Callable, Dict, List, Optional
+from models.company import Company
+from models.invoice import Invoice
+from models.client import Client
+from services.billing_service import get_billing_service
+from services.pdf_cache import PDFCache, get_pdf_cache
+from services.pdf_jobs import render_variant
+from services.pdf_output import get_output_profile
+
+
+@dataclass
+class SMTPSettings:
+    host: str = ""
+    port: int = 587
+    username: str = ""
+    password: str = ""
+    use_tls: bool = True   # STARTTLS after connecting
+    use_ssl: bool = False  # Implicit TLS, usually port 465
+    sender: str = ""       # Defaults to the company email
+    timeout: float = 30.0
+    workers: int = 4
+    max_per_second: float = 0.0  # 0 means no throttle
+    max_per_connection: int = 100  # Reconnect after this many messages
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.host)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def save(self, filepath="data/smtp.json"):
+        # Holds the password in plain text: readable by the owner only
+        with open(os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.chmod(filepath, 0o600)  # Files saved before this change
+
+    @classmethod
+    def load(cls, filepath="data/smtp.json"):
+        try:
+            with open(filepath, 'r') as f:
+                data = json.load(f)
+                return cls.from_dict(data) if data else cls()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls()
+
+
+@dataclass
+class DeliveryRecord:
+    invoice_id: str
+    invoice_number: str
+    recipient: str
+    status: str  # Sent, Failed, Skipped
+    attempts: int = 0
+    error: str = ""
+    message_id: str = ""
+    timestamp: str = ""
+
+    def __post_init__(self):
+        if not self.timestamp:
+            self.timestamp = datetime.now().isoformat()
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class DeliveryLog:
+    """Append-only JSON-lines log with one record per delivery attempt.
+
+    The latest record per invoice is kept in memory; each call to
+    ``latest`` parses only the lines appended since the previous one.
+    """
+
+    def __init__(self, filepath="data/delivery_log.jsonl"):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._latest: Dict[str, DeliveryRecord] = {}
+        self._read_to = 0  # Bytes of the file already folded into _latest
+        self._version = None
+
+    def append(self, record: DeliveryRecord):
+        line = json.dumps(record.to_dict())
+        with self._lock:
+            with open(self.filepath, 'a') as f:
+                f.write(line + "\n")
+
+    def load_records(self) -> List[DeliveryRecord]:
+        records = []
+        try:
+            with open(self.filepath, 'r') as f:
+                for line in f:
+                    try:
+                        records.append(DeliveryRecord.from_dict(json.loads(line)))
+                    except (json.JSONDecodeError, TypeError):
+                        continue  # Torn last line after a crash
+        except FileNotFoundError:
+            pass
+        return records
+
+    def latest(self) -> Dict[str, DeliveryRecord]:
+        """Most recent record per invoice id"""
+        with self._lock:
+            version = self._file_version()
+            if version != self._version:
+                if version[1] <= self._read_to:  # Replaced or truncated rather than appended to
+                    self._latest, self._read_to = {}, 0
+                self._read_new()
+                self._version = version
+            return dict(self._latest)
+
+    def _read_new(self):
+        try:
+            with open(self.filepath, 'rb') as f:
+                f.seek(self._read_to)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1  # A line still being written is read next time
+        for line in data[:end].splitlines():
+            try:
+                record = DeliveryRecord.from_dict(json.loads(line))
+            except (json.JSONDecodeError, TypeError):
+                continue  # Torn line after a crash
+            self._latest[record.invoice_id] = record
+        self._read_to += end
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.filepath)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return 0, 0
+
+
+_shared_log = None
+_shared_log_lock = threading.Lock()
+
+
+def get_delivery_log() -> DeliveryLog:
+    """Process-wide delivery log shared by every page and delivery batch"""
+    global _shared_log
+    with _shared_log_lock:
+        if _shared_log is None:
+            _shared_log = DeliveryLog()
+        return _shared_log
+
+
+@dataclass
+class DeliveryReport:
+    records: List[DeliveryRecord] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def _count(self, status: str) -> int:
+        return sum(1 for record in self.records if record.status == status)
+
+    @property
+    def sent(self) -> int:
+        return self._count("Sent")
+
+    @property
+    def failed(self) -> int:
+        return self._count("Failed")
+
+    @property
+    def skipped(self) -> int:
+        return self._count("Skipped")
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def sent_invoice_ids(self) -> List[str]:
+        return [record.invoice_id for record in self.records if record.status == "Sent"]
+
+
+class RateLimiter:
+    """Spaces sends evenly across every worker sharing the limiter"""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second if per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class _Connection:
+    """One worker's SMTP session, opened lazily and reused across messages"""
+
+    def __init__(self, settings: SMTPSettings):
+        self.settings = settings
+        self.smtp = None
+        self.sent = 0
+
+    def send(self, message: EmailMessage):
+        if self.smtp is not None and self.sent >= self.settings.max_per_connection:
+            self.close()
+        if self.smtp is None:
+            self.smtp = self._open()
+            self.sent = 0
+        self.smtp.send_message(message)
+        self.sent += 1
+
+    def _open(self) -> smtplib.SMTP:
+        settings = self.settings
+        if settings.use_ssl:
+            smtp = smtplib.SMTP_SSL(settings.host, settings.port, timeout=settings.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(settings.host, settings.port, timeout=settings.timeout)
+            if settings.use_tls:
+                smtp.starttls(context=ssl.create_default_context())
+        if settings.username:
+            smtp.login(settings.username, settings.password)
+        return smtp
+
+    def reset(self):
+        """Drop a connection that failed mid-conversation"""
+        if self.smtp is not None:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+        self.smtp = None
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except Exception:
+                pass
+        self.smtp = None
+
+
+class InvoiceDelivery:
+    """Emails invoice PDFs to clients over SMTP.
+
+    Each worker thread keeps one authenticated connection open for its share
+    of the batch instead of reconnecting per message. Sends are throttled by
+    a shared rate limiter, transient failures are retried with backoff and
+    every outcome is written to the delivery log.
+    """
+
+    def __init__(self, settings: SMTPSettings, log: DeliveryLog = None, cache: PDFCache = None,
+                 max_retries: int = 3, retry_backoff: float = 1.0):
+        self.settings = settings
+        self.log = log or get_delivery_log()
+        self.cache = cache or get_pdf_cache()
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.limiter = RateLimiter(settings.max_per_second)
+
+    def deliver(self, invoices: List[Invoice], company: Company, clients: Dict[str, Client],
+                progress: Optional[Callable[[int, int], None]] = None) -> DeliveryReport:
+        """Send every invoice to its client's email address.
+
+        ``progress`` is called with (finished, total) after each invoice.
+        """
+        report = DeliveryReport()
+        pending = queue.Queue()
+        for invoice in invoices:
+            pending.put(invoice)
+
+        total = len(invoices)
+        lock = threading.Lock()
+
+        def record(result: DeliveryRecord):
+            self.log.append(result)
+            with lock:
+                report.records.append(result)
+                finished = len(report.records)
+            if progress:
+                progress(finished, total)
+
+        start = time.perf_counter()
+        workers = [
+            threading.Thread(target=self._worker, args=(pending, company, clients, record),
+                             name=f"smtp-delivery-{i}", daemon=True)
+            for i in range(max(1, min(self.settings.workers, total)))
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        report.elapsed = time.perf_counter() - start
+        return report
+
+    def build_message(self, invoice: Invoice, company: Company, client: Client, pdf: bytes) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = f"Invoice {invoice.invoice_number} from {company.name}"
+        message["From"] = self.settings.sender or company.email
+        message["To"] = client.email
+        message["Message-ID"] = make_msgid(domain=(company.email.split("@")[-1] or None))
+        message.set_content(
+            f"Dear {client.contact_person or client.name},\n\n"
+            f"Please find attached invoice {invoice.invoice_number} for "
+            f"€{invoice.total_amount:,.2f}, due on {invoice.due_date}.\n\n"
+            f"Kind regards,\n{company.name}\n"
+        )
+        filename = f"Invoice_{invoice.invoice_number}_{invoice.client_name.replace(' ', '_')}.pdf"
+        message.add_attachment(pdf, maintype="application", subtype="pdf", filename=filename)
+        return message
+
+    def _worker(self, pending: queue.Queue, company: Company, clients: Dict[str, Client],
+                record: Callable[[DeliveryRecord], None]):
+        from services.pdf_canvas_renderer import CanvasPDFGenerator  # Loads reportlab on first delivery
+
+        # The canvas renderer keeps per-document state, so each worker has its own
+        renderer = CanvasPDFGenerator(get_output_profile(company.pdf_profile))
+        connection = _Connection(self.settings)
+        try:
+            while True:
+                try:
+                    invoice = pending.get_nowait()
+                except queue.Empty:
+                    return
+                client = clients.get(invoice.client_id)
+                record(self._deliver_one(connection, renderer, invoice, company, client))
+        finally:
+            connection.close()
+
+    def _deliver_one(self, connection: _Connection, renderer: "CanvasPDFGenerator", invoice: Invoice,
+                     company: Company, client: Optional[Client]) -> DeliveryRecord:
+        result = DeliveryRecord(invoice_id=invoice.id, invoice_number=invoice.invoice_number,
+                                recipient=client.email if client else "", status="Skipped")
+        if client is None:
+            result.error = "Client not found"
+            return result
+        if not client.email:
+            result.error = "Client has no email address"
+            return result
+
+        try:
+            pdf = self.cache.get_or_render(invoice, company, client, renderer.generate_invoice_pdf,
+                                           variant=render_variant(company))
+            message = self.build_message(invoice, company, client, pdf)
+        except Exception as e:
+            result.status = "Failed"
+            result.error = f"PDF generation failed: {e}"
+            return result
+        result.message_id = message["Message-ID"]
+
+        for attempt in range(1, self.max_retries + 1):
+            result.attempts = attempt
+            self.limiter.wait()
+            try:
+                connection.send(message)
+                result.status = "Sent"
+                result.error = ""
+                return result
+            except smtplib.SMTPRecipientsRefused as e:
+                result.error = f"Recipient refused: {', '.join(e.recipients)}"
+                break
+            except smtplib.SMTPResponseException as e:
+                connection.reset()
+                reply = e.smtp_error.decode(errors="replace") if isinstance(e.smtp_error, bytes) else e.smtp_error
+                result.error = f"{e.smtp_code} {reply}"
+                if not 400 <= e.smtp_code < 500:
+                    break  # Only 4xx replies are temporary
+            except smtplib.SMTPServerDisconnected as e:
+                connection.reset()
+                result.error = str(e) or "Server disconnected"
+            except smtplib.SMTPException as e:
+                connection.reset()
+                result.error = str(e)
+                break
+            except OSError as e:
+                # Network trouble: refused connection, timeout, reset
+                connection.reset()
+                result.error = str(e) or type(e).__name__
+            if attempt < self.max_retries:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+
+        result.status = "Failed"
+        return result
+
+
+@dataclass
+class DeliveryBatch:
+    id: str
+    total: int
+    finished: int = 0
+    report: Optional[DeliveryReport] = None
+    error: str = ""
+    not_marked: List[str] = field(default_factory=list)  # Emailed drafts left as Draft for lack of stock
+
+    @property
+    def pending(self) -> bool:
+        return self.report is None and not self.error
+
+
+_batches: Dict[str, DeliveryBatch] = {}
+_batches_lock = threading.Lock()
+
+
+def start_delivery(invoices: List[Invoice], company: Company, clients: Dict[str, Client],
+                   settings: SMTPSettings, mark_sent: bool = True) -> DeliveryBatch:
+    """Deliver a batch on a background thread and return its progress handle.
+
+    With ``mark_sent``, Draft invoices that were delivered move to "Sent" in
+    one write once the batch is done, except those whose stock has run out.
+    """
+    batch = DeliveryBatch(id=uuid.uuid4().hex, total=len(invoices))
+    snapshot = [Invoice.from_dict(invoice.to_dict()) for invoice in invoices]
+
+    def progress(finished: int, total: int):
+        batch.finished = finished
+
+    def run():
+        try:
+            report = InvoiceDelivery(settings).deliver(snapshot, company, clients, progress=progress)
+            if mark_sent and report.sent_invoice_ids:
+                change = get_billing_service().set_status(report.sent_invoice_ids, "Sent", only_from=("Draft",))
+                batch.not_marked = [invoice.invoice_number for invoice, _ in change.refused]
+            batch.report = report
+        except Exception as e:
+            batch.error = str(e)
+
+    with _batches_lock:
+        _batches[batch.id] = batch
+    threading.Thread(target=run, name="smtp-delivery-batch", daemon=True).start()
+    return batch
+
+
+def get_delivery_batch(batch_id: str) -> Optional[DeliveryBatch]:
+    with _batches_lock:
+        return _batches.get(batch_id)
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Optional
+from models.company import Company
+from models.invoice import Invoice
+from models.client import Client
+
+# Bump whenever the PDF layout changes so previously cached renders are ignored
+RENDER_VERSION = "4"
+
+# Invoice fields that change on every load without affecting the rendered PDF
+VOLATILE_INVOICE_FIELDS = ("last_modified",)
+
+
+class PDFCache:
+    """Two-tier (memory + disk) LRU cache of rendered invoice PDFs.
+
+    Entries are keyed by a content hash of the invoice, company and client,
+    so any edit to those inputs produces a new key and the stale render is
+    simply never looked up again and ages out of the LRU.
+    """
+
+    def __init__(self, cache_dir="cache/pdf", memory_budget=32 * 1024 * 1024,
+                 disk_budget=256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._disk_bytes = sum(p.stat().st_size for p in self.cache_dir.glob("*.pdf"))
+
+    @staticmethod
+    def make_key(invoice: Invoice, company: Company, client: Client, variant: str = "") -> str:
+        """Stable hash of everything that ends up on the rendered PDF"""
+        invoice_data = invoice.to_dict()
+        for field_name in VOLATILE_INVOICE_FIELDS:
+            invoice_data.pop(field_name, None)
+
+        payload = json.dumps({
+            "version": RENDER_VERSION,
+            "variant": variant,
+            "invoice": invoice_data,
+            "company": company.to_dict(),
+            "client": client.to_dict(),
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached PDF bytes, promoting disk hits into memory"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return data
+
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Touch the file so disk eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Store PDF bytes in both tiers"""
+        with self._lock:
+            self._remember(key, data)
+
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            # A file of its own, so concurrent renders of the same key cannot interleave
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._lock:
+                existing = path.stat().st_size if path.exists() else 0
+                os.replace(tmp_path, path)
+                tmp_path = None
+                self._disk_bytes += len(data) - existing
+                if self._disk_bytes > self.disk_budget:
+                    self._evict_disk()
+        except OSError as e:
+            print(f"Error writing PDF cache entry: {e}")
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def get_or_render(self, invoice: Invoice, company: Company, client: Client,
+                      render: Callable[[Invoice, Company, Client], BytesIO],
+                      variant: str = "") -> bytes:
+        """Return the cached PDF for these inputs, rendering it on a miss"""
+        key = self.make_key(invoice, company, client, variant)
+        data = self.get(key)
+        if data is None:
+            data = render(invoice, company, client).getvalue()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        """Drop every cached render from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for path in self.cache_dir.glob("*.pdf"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._disk_bytes = 0
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pdf"
+
+    def _remember(self, key: str, data: bytes):
+        """Insert into the memory tier and evict least recently used entries"""
+        if len(data) > self.memory_budget:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        """Remove least recently used files until the disk tier fits its budget"""
+        entries = []
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.disk_budget:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+        self._disk_bytes = total
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PDFCache:
+    """Process-wide cache shared by every page and session"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = PDFCache()
+        return _shared_cache
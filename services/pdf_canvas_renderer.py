@@ -0,0 +1,421 @@
+from functools import lru_cache
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph
+from io import BytesIO
+from typing import Callable, Optional
+from models.company import Company
+from models.invoice import Invoice, InvoiceItem
+from models.client import Client
+from services.pdf_output import OutputProfile, get_output_profile
+from services.pdf_template import PAGE_MARGIN, PAGE_SIZE, get_invoice_template, get_styles
+
+# Items table geometry, matching the platypus layout in PDFGenerator
+ITEM_HEADERS = ['Description', 'Qty', 'Unit Price', 'Cuts', 'Cutting Cost', 'Discount', 'Total']
+ITEM_COL_WIDTHS = [2.5*inch, 0.5*inch, 0.8*inch, 0.4*inch, 0.8*inch, 0.8*inch, 0.8*inch]
+ITEM_TABLE_WIDTH = sum(ITEM_COL_WIDTHS)
+ITEM_FONT_SIZE = 9
+ITEM_LEADING = ITEM_FONT_SIZE * 1.2
+HEADER_FONT_SIZE = 10
+HEADER_ROW_HEIGHT = HEADER_FONT_SIZE * 1.2 + 3 + 12
+CELL_PADDING = 6
+SUBTOTAL_ROW_HEIGHT = ITEM_LEADING + CELL_PADDING
+
+SUMMARY_COL_WIDTHS = [4*inch, 2*inch]
+SUMMARY_ROW_HEIGHT = 18
+SUMMARY_TOTAL_ROW_HEIGHT = 20.4
+
+DETAILS_COL_WIDTH = 3*inch
+DETAILS_ROW_HEIGHT = 18
+
+SECTION_GAP = 20
+
+# How often the progress callback is told about drawn item rows
+PROGRESS_EVERY_ROWS = 50
+
+# Notes longer than this many wrapped lines are laid out by platypus instead
+MAX_FAST_NOTES_LINES = 6
+
+
+@lru_cache(maxsize=4096)
+def _item_text_width(text: str, font: str) -> float:
+    """Width of an items-table cell value; most values repeat across rows"""
+    return stringWidth(text, font, ITEM_FONT_SIZE)
+
+
+@lru_cache(maxsize=1024)
+def _description_lines(product_name: str, description: str, font: str):
+    """Wrap the description cell; invoices usually repeat the same products"""
+    width = ITEM_COL_WIDTHS[0] - CELL_PADDING * 2
+    lines = []
+    for text in (product_name, description):
+        for part in text.split("\n"):
+            lines.extend(simpleSplit(part, font, ITEM_FONT_SIZE, width) or [""])
+    return tuple(lines)
+
+
+def _column_edges(left, widths):
+    edges = [left]
+    for width in widths:
+        edges.append(edges[-1] + width)
+    return edges
+
+
+class CanvasPDFGenerator:
+    """Fast invoice renderer that draws straight onto a reportlab canvas.
+
+    The invoice layout is fixed, so column positions are computed once and
+    rows are placed with manual pagination instead of platypus layout. Long
+    free-text notes still go through a platypus Paragraph so they wrap and
+    split across pages properly.
+    """
+
+    def __init__(self, profile: OutputProfile = None):
+        self.profile = profile or get_output_profile()
+        self.font, self.bold_font = self.profile.fonts
+        self.styles = get_styles(self.font)
+        self.page_width, self.page_height = PAGE_SIZE
+        self.frame_left = PAGE_MARGIN
+        self.frame_width = self.page_width - 2 * PAGE_MARGIN
+
+        items_left = self.frame_left + (self.frame_width - ITEM_TABLE_WIDTH) / 2
+        self.item_edges = _column_edges(items_left, ITEM_COL_WIDTHS)
+
+        summary_left = self.frame_left + (self.frame_width - sum(SUMMARY_COL_WIDTHS)) / 2
+        self.summary_edges = _column_edges(summary_left, SUMMARY_COL_WIDTHS)
+
+        details_left = self.frame_left + (self.frame_width - 2 * DETAILS_COL_WIDTH) / 2
+        self.details_edges = _column_edges(details_left, [DETAILS_COL_WIDTH, DETAILS_COL_WIDTH])
+
+    def generate_invoice_pdf(self, invoice: Invoice, company: Company, client: Client,
+                             progress: Optional[Callable[[float], None]] = None) -> BytesIO:
+        """Generate a professional invoice PDF.
+
+        ``progress`` is called with the fraction of item rows drawn so far.
+        """
+        buffer = BytesIO()
+        template = get_invoice_template(company, self.profile)
+        c = canvas.Canvas(buffer, pagesize=PAGE_SIZE, pageCompression=int(self.profile.compress))
+
+        self._template = template
+        self._canvas = c
+        self._progress = progress
+        self._top = self.page_height - template.top_margin
+        self._bottom = template.bottom_margin
+        self._start_page()
+
+        self._draw_title()
+        self._draw_invoice_details(invoice, client)
+        self._draw_items(invoice)
+        self._draw_summary(invoice)
+
+        if invoice.payment_terms or invoice.notes:
+            self._draw_terms_and_notes(invoice)
+
+        c.showPage()
+        c.save()
+        self._canvas = None
+        self._progress = None
+        buffer.seek(0)
+        return buffer
+
+    def _start_page(self):
+        self._template.draw_page(self._canvas)
+        self._y = self._top
+
+    def _new_page(self):
+        self._canvas.showPage()
+        self._start_page()
+
+    def _ensure_space(self, height: float) -> bool:
+        """Start a new page if the height does not fit; returns True if a page was started"""
+        if self._y - height < self._bottom:
+            self._new_page()
+            return True
+        return False
+
+    def _draw_title(self):
+        c = self._canvas
+        c.setFont(self.font, 24)
+        c.setFillColor(colors.darkblue)
+        self._y -= 24
+        c.drawCentredString(self.frame_left + self.frame_width / 2, self._y + 5, "INVOICE")
+        c.setFillColor(colors.black)
+        self._y -= 12 + SECTION_GAP
+
+    def _draw_invoice_details(self, invoice: Invoice, client: Client):
+        """Draw the bill-to block and invoice details side by side"""
+        rows = [
+            ("Bill To:", ""),
+            (f"{client.name}", f"Invoice #: {invoice.invoice_number}"),
+            (f"{client.contact_person}", f"Date: {invoice.issue_date}"),
+            (f"{client.address}", f"Due Date: {invoice.due_date}"),
+            (f"{client.city}, {client.county}", f"Terms: {invoice.payment_terms}"),
+            (f"{client.postal_code}", ""),
+        ]
+        if client.vat_number:
+            rows.append((f"VAT: {client.vat_number}", ""))
+
+        c = self._canvas
+        left_x = self.details_edges[0] + 6
+        right_x = self.details_edges[2] - 6
+        for i, (left, right) in enumerate(rows):
+            self._ensure_space(DETAILS_ROW_HEIGHT)
+            baseline = self._y - DETAILS_ROW_HEIGHT + 5
+            c.setFont(self.bold_font if i == 0 else self.font, 10)
+            c.drawString(left_x, baseline, left)
+            if right:
+                c.setFont(self.bold_font if 1 <= i <= 4 else self.font, 10)
+                c.drawRightString(right_x, baseline, right)
+            self._y -= DETAILS_ROW_HEIGHT
+        self._y -= SECTION_GAP
+
+    def _item_cells(self, item: InvoiceItem):
+        cutting_cost = item.cuts_required * item.cutting_charge_per_cut
+        discount_text = ""
+        if item.discount_percentage > 0:
+            discount_text += f"{item.discount_percentage}%"
+        if item.discount_amount > 0:
+            if discount_text:
+                discount_text += f" + €{item.discount_amount:.2f}"
+            else:
+                discount_text = f"€{item.discount_amount:.2f}"
+
+        return [
+            f"{item.quantity:.2f}",
+            f"€{item.unit_price:.2f}",
+            str(item.cuts_required) if item.cuts_required > 0 else "-",
+            f"€{cutting_cost:.2f}" if cutting_cost > 0 else "-",
+            discount_text if discount_text else "-",
+            f"€{item.line_total:.2f}",
+        ]
+
+    def _draw_items_header(self):
+        c = self._canvas
+        edges = self.item_edges
+        top = self._y
+        c.setFillColor(colors.darkblue)
+        c.rect(edges[0], top - HEADER_ROW_HEIGHT, ITEM_TABLE_WIDTH, HEADER_ROW_HEIGHT, stroke=0, fill=1)
+        c.setFillColor(colors.whitesmoke)
+        c.setFont(self.bold_font, HEADER_FONT_SIZE)
+        baseline = top - 3 - HEADER_FONT_SIZE
+        for i, label in enumerate(ITEM_HEADERS):
+            c.drawCentredString((edges[i] + edges[i + 1]) / 2, baseline, label)
+        c.setFillColor(colors.black)
+        self._y -= HEADER_ROW_HEIGHT
+
+    def _draw_grid(self, top: float, row_lines, spans):
+        """Stroke the table grid for one page segment of the items table.
+
+        ``spans`` are (top, bottom) ranges of subtotal rows whose label spans
+        the description columns, so inner column lines skip them.
+        """
+        c = self._canvas
+        edges = self.item_edges
+        bottom = self._y
+        c.setLineWidth(1)
+        c.setStrokeColor(colors.black)
+        for x in (edges[0], edges[-2], edges[-1]):
+            c.line(x, top, x, bottom)
+
+        gaps = sorted(spans, reverse=True)
+        for x in edges[1:-2]:
+            segment_top = top
+            for span_top, span_bottom in gaps:
+                c.line(x, segment_top, x, span_top)
+                segment_top = span_bottom
+            c.line(x, segment_top, x, bottom)
+
+        for y in row_lines:
+            c.line(edges[0], y, edges[-1], y)
+        c.line(edges[0], bottom, edges[-1], bottom)
+
+    def _draw_subtotal_row(self, label: str, amount: float, row_lines, spans):
+        """Draw a brought/carried forward row spanning the description columns"""
+        c = self._canvas
+        edges = self.item_edges
+        top = self._y
+        row_lines.append(top)
+        spans.append((top, top - SUBTOTAL_ROW_HEIGHT))
+
+        baseline = top - SUBTOTAL_ROW_HEIGHT / 2 - ITEM_FONT_SIZE / 2 + 2
+        c.setFont(self.bold_font, ITEM_FONT_SIZE)
+        c.drawString(edges[0] + CELL_PADDING, baseline, label)
+        c.drawCentredString((edges[-2] + edges[-1]) / 2, baseline, f"€{amount:.2f}")
+        self._y -= SUBTOTAL_ROW_HEIGHT
+
+    def _draw_items(self, invoice: Invoice):
+        c = self._canvas
+        edges = self.item_edges
+        centres = [(edges[i] + edges[i + 1]) / 2 for i in range(len(ITEM_COL_WIDTHS))]
+
+        self._ensure_space(HEADER_ROW_HEIGHT + ITEM_LEADING + CELL_PADDING + SUBTOTAL_ROW_HEIGHT)
+        segment_top = self._y
+        row_lines = [segment_top]
+        spans = []
+        self._draw_items_header()
+        running_total = 0.0
+
+        for index, item in enumerate(invoice.items, start=1):
+            lines = _description_lines(item.product_name, item.description, self.font)
+            row_height = len(lines) * ITEM_LEADING + CELL_PADDING
+
+            # Always keep room for the carried forward row at the page foot
+            if self._y - row_height - SUBTOTAL_ROW_HEIGHT < self._bottom:
+                self._draw_subtotal_row("Carried forward", running_total, row_lines, spans)
+                self._draw_grid(segment_top, row_lines, spans)
+                self._new_page()
+                segment_top = self._y
+                row_lines = [segment_top]
+                spans = []
+                self._draw_items_header()
+                self._draw_subtotal_row("Brought forward", running_total, row_lines, spans)
+
+            top = self._y
+            row_lines.append(top)
+            if index % 2 == 0:
+                c.setFillColor(colors.lightgrey)
+                c.rect(edges[0], top - row_height, ITEM_TABLE_WIDTH, row_height, stroke=0, fill=1)
+                c.setFillColor(colors.black)
+
+            # One text object per row: description lines, then each centred cell
+            text = c.beginText(edges[0] + CELL_PADDING, top - 3 - ITEM_FONT_SIZE)
+            text.setFont(self.font, ITEM_FONT_SIZE, ITEM_LEADING)
+            text.textLines(lines)
+
+            baseline = top - row_height / 2 - ITEM_FONT_SIZE / 2 + 2
+            for col, value in enumerate(self._item_cells(item), start=1):
+                text.setTextOrigin(centres[col] - _item_text_width(value, self.font) / 2, baseline)
+                text.textOut(value)
+            c.drawText(text)
+
+            self._y -= row_height
+            running_total += item.line_total
+
+            if self._progress and index % PROGRESS_EVERY_ROWS == 0:
+                self._progress(index / len(invoice.items))
+
+        self._draw_grid(segment_top, row_lines, spans)
+        self._y -= SECTION_GAP
+
+    def _draw_summary(self, invoice: Invoice):
+        rows = [('Subtotal:', f"€{invoice.subtotal:.2f}")]
+
+        # Additional charges
+        if invoice.shipping_cost > 0:
+            rows.append(('Shipping Cost:', f"€{invoice.shipping_cost:.2f}"))
+        if invoice.handling_cost > 0:
+            rows.append(('Handling Cost:', f"€{invoice.handling_cost:.2f}"))
+        if invoice.other_charges > 0:
+            desc = invoice.other_charges_description or "Other Charges"
+            rows.append((f'{desc}:', f"€{invoice.other_charges:.2f}"))
+
+        # Global discounts
+        if invoice.global_discount_percentage > 0 or invoice.global_discount_amount > 0:
+            rows.append(('Discount:', f"-€{invoice.global_discount_total:.2f}"))
+
+        rows.extend([
+            ('Total Before VAT:', f"€{invoice.total_before_vat:.2f}"),
+            (f'VAT ({invoice.vat_rate}%):', f"€{invoice.vat_amount:.2f}"),
+        ])
+
+        height = len(rows) * SUMMARY_ROW_HEIGHT + SUMMARY_TOTAL_ROW_HEIGHT
+        self._ensure_space(height)
+
+        c = self._canvas
+        edges = self.summary_edges
+        top = self._y
+        bottom = top - height
+
+        c.setFillColor(colors.lightblue)
+        c.rect(edges[0], bottom, edges[-1] - edges[0], SUMMARY_TOTAL_ROW_HEIGHT, stroke=0, fill=1)
+        c.setFillColor(colors.black)
+
+        c.setFont(self.font, 10)
+        y = top
+        for label, value in rows:
+            baseline = y - SUMMARY_ROW_HEIGHT / 2 - 3
+            c.drawRightString(edges[1] - 6, baseline, label)
+            c.drawRightString(edges[2] - 6, baseline, value)
+            y -= SUMMARY_ROW_HEIGHT
+
+        c.setFont(self.bold_font, 12)
+        baseline = bottom + SUMMARY_TOTAL_ROW_HEIGHT / 2 - 4
+        c.drawRightString(edges[1] - 6, baseline, 'Total Amount:')
+        c.drawRightString(edges[2] - 6, baseline, f"€{invoice.total_amount:.2f}")
+
+        c.setLineWidth(1)
+        c.setStrokeColor(colors.black)
+        c.rect(edges[0], bottom, edges[-1] - edges[0], height, stroke=1, fill=0)
+        c.line(edges[1], top, edges[1], bottom)
+        for i in range(1, len(rows) + 1):
+            row_y = top - i * SUMMARY_ROW_HEIGHT
+            c.line(edges[0], row_y, edges[-1], row_y)
+
+        self._y = bottom - SECTION_GAP
+
+    def _draw_terms_and_notes(self, invoice: Invoice):
+        c = self._canvas
+        leading = 12
+
+        if invoice.payment_terms:
+            self._ensure_space(leading + 3)
+            self._y -= leading
+            c.setFont(self.bold_font, 10)
+            label = "Payment Terms:"
+            c.drawString(self.frame_left, self._y + 2, label)
+            c.setFont(self.font, 10)
+            c.drawString(self.frame_left + c.stringWidth(label + " ", self.bold_font, 10),
+                         self._y + 2, invoice.payment_terms)
+            self._y -= 3
+
+        if not invoice.notes:
+            return
+
+        self._y -= 10
+        label = "Notes:"
+        label_width = c.stringWidth(label + " ", self.bold_font, 10)
+        lines = simpleSplit(invoice.notes, self.font, 10, self.frame_width - label_width)
+
+        if len(lines) > MAX_FAST_NOTES_LINES or "\n" in invoice.notes:
+            self._draw_long_notes(invoice.notes)
+            return
+
+        self._ensure_space(len(lines) * leading)
+        c.setFont(self.bold_font, 10)
+        c.drawString(self.frame_left, self._y - leading + 2, label)
+        c.setFont(self.font, 10)
+        for line in lines:
+            self._y -= leading
+            c.drawString(self.frame_left + label_width, self._y + 2, line)
+
+    def _draw_long_notes(self, notes: str):
+        """Lay out long notes with platypus, splitting them across pages"""
+        paragraph = Paragraph(f"<b>Notes:</b> {notes}", self.styles['InvoiceDetails'])
+        pending = [paragraph]
+        while pending:
+            flowable = pending.pop(0)
+            available = self._y - self._bottom
+            _, height = flowable.wrap(self.frame_width, available)
+            if height <= available:
+                flowable.drawOn(self._canvas, self.frame_left, self._y - height)
+                self._y -= height
+                continue
+
+            parts = flowable.split(self.frame_width, available)
+            if len(parts) > 1:
+                first = parts[0]
+                _, height = first.wrap(self.frame_width, available)
+                first.drawOn(self._canvas, self.frame_left, self._y - height)
+                pending = parts[1:] + pending
+            elif self._y == self._top:
+                # Does not fit on an empty page and cannot be split: draw it anyway
+                flowable.drawOn(self._canvas, self.frame_left, self._y - height)
+                self._y -= height
+                continue
+            else:
+                pending.insert(0, flowable)
+            self._new_page()
@@ -1,77 +1,46 @@
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib.units import mm, inch
-from reportlab.pdfgen import canvas
-from reportlab.lib.enums import TA_LEFT, TA_RIGHT, TA_CENTER
 from io import BytesIO
 from datetime import datetime
 from models.company import Company
-from models.invoice import Invoice
+from models.invoice import Invoice, InvoiceItem
 from models.client import Client
-import os
+from services.pdf_output import OutputProfile, get_output_profile
+from services.pdf_template import PAGE_MARGIN, get_invoice_template, get_styles
+
+ITEM_COL_WIDTHS = [2.5*inch, 0.5*inch, 0.8*inch, 0.4*inch, 0.8*inch, 0.8*inch, 0.8*inch]
+ITEM_LEADING = 12  # Table default leading for plain-text cells
+ITEM_ROW_PADDING = 6
+ITEM_HEADER_HEIGHT = ITEM_LEADING + 3 + 12
+ITEM_CARRY_ROW_HEIGHT = ITEM_LEADING + ITEM_ROW_PADDING
+FRAME_PADDING = 6  # SimpleDocTemplate frame padding on each side
+PAGE_FIT_SLACK = 4  # Safety margin so a chunk never spills onto an extra page
 
 class PDFGenerator:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
-    
-    def setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Normal'],
-            fontSize=24,
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CompanyHeader',
-            parent=self.styles['Normal'],
-            fontSize=14,
-            spaceAfter=6,
-            alignment=TA_LEFT,
-            textColor=colors.black
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='InvoiceDetails',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            spaceAfter=3,
-            alignment=TA_LEFT
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='TableHeader',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            alignment=TA_CENTER,
-            textColor=colors.white
-        ))
+    def __init__(self, profile: OutputProfile = None):
+        self.profile = profile or get_output_profile()
+        self.font, self.bold_font = self.profile.fonts
+        self.styles = get_styles(self.font)
     
     def generate_invoice_pdf(self, invoice: Invoice, company: Company, client: Client) -> BytesIO:
         """Generate a professional invoice PDF"""
+        template = get_invoice_template(company, self.profile)
         buffer = BytesIO()
         doc = SimpleDocTemplate(
             buffer,
             pagesize=A4,
-            rightMargin=20*mm,
-            leftMargin=20*mm,
-            topMargin=20*mm,
-            bottomMargin=20*mm
+            rightMargin=PAGE_MARGIN,
+            leftMargin=PAGE_MARGIN,
+            topMargin=template.top_margin,
+            bottomMargin=template.bottom_margin,
+            pageCompression=int(self.profile.compress)
         )
         
         story = []
         
-        # Company Header
-        story.append(self._create_company_header(company))
-        story.append(Spacer(1, 20))
-        
-        # Invoice Title and Details
+        # Invoice Title and Details (company header and footer are stamped by the template)
         story.append(Paragraph("INVOICE", self.styles['CustomTitle']))
         story.append(Spacer(1, 20))
         
@@ -79,8 +48,10 @@ class PDFGenerator:
         story.append(self._create_invoice_details_table(invoice, client))
         story.append(Spacer(1, 20))
         
-        # Items Table
-        story.append(self._create_items_table(invoice))
+        # Items Table, split into page-sized chunks
+        frame_height = template.body_height - 2 * FRAME_PADDING
+        used_height = sum(self._flowable_height(flowable, doc.width) for flowable in story)
+        story.extend(self._create_items_tables(invoice, frame_height - used_height, frame_height))
         story.append(Spacer(1, 20))
         
         # Summary Table
@@ -89,35 +60,16 @@ class PDFGenerator:
         
         # Payment Terms and Notes
         if invoice.payment_terms or invoice.notes:
-            story.append(self._create_terms_and_notes(invoice))
-        
-        # Footer
-        story.append(Spacer(1, 30))
-        story.append(self._create_footer(company))
+            story.extend(self._create_terms_and_notes(invoice))
         
-        doc.build(story)
+        doc.build(story, onFirstPage=template.draw_page, onLaterPages=template.draw_page)
         buffer.seek(0)
         return buffer
     
-    def _create_company_header(self, company: Company):
-        """Create company header section"""
-        data = [
-            [Paragraph(f"<b>{company.name}</b>", self.styles['CompanyHeader'])],
-            [Paragraph(company.address, self.styles['InvoiceDetails'])],
-            [Paragraph(f"{company.city}, {company.county} {company.postal_code}", self.styles['InvoiceDetails'])],
-            [Paragraph(f"Phone: {company.phone} | Email: {company.email}", self.styles['InvoiceDetails'])],
-        ]
-        
-        if company.vat_number:
-            data.append([Paragraph(f"VAT Number: {company.vat_number}", self.styles['InvoiceDetails'])])
-        
-        table = Table(data, colWidths=[6*inch])
-        table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
-        
-        return table
+    @staticmethod
+    def _flowable_height(flowable, width: float) -> float:
+        _, height = flowable.wrap(width - 2 * FRAME_PADDING, A4[1])
+        return height + flowable.getSpaceBefore() + flowable.getSpaceAfter()
     
     def _create_invoice_details_table(self, invoice: Invoice, client: Client):
         """Create invoice and client details table"""
@@ -139,20 +91,68 @@ class PDFGenerator:
             ('ALIGN', (0, 0), (0, -1), 'LEFT'),
             ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
             ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 1), (1, 4), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 0), (-1, -1), self.font),
+            ('FONTNAME', (0, 0), (0, 0), self.bold_font),
+            ('FONTNAME', (1, 1), (1, 4), self.bold_font),
         ]))
         
         return table
     
-    def _create_items_table(self, invoice: Invoice):
-        """Create items table"""
+    def _create_items_tables(self, invoice: Invoice, first_page_height: float, page_height: float):
+        """Create the items table as page-sized chunks.
+
+        Each chunk repeats the header row and carries the running subtotal
+        forward to the next page, so platypus never has to split one huge
+        table and every chunk uses the same fixed-size style list.
+        """
+        flowables = []
+        budget = first_page_height
+        if budget < ITEM_HEADER_HEIGHT + ITEM_CARRY_ROW_HEIGHT * 2:
+            # Not even one row fits under the invoice details: start on the next page
+            flowables.append(PageBreak())
+            budget = page_height
+
+        chunk = []
+        chunk_height = ITEM_HEADER_HEIGHT
+        first_index = 1
+        brought_forward = None
+        running_total = 0.0
+
+        for index, item in enumerate(invoice.items, start=1):
+            row_height = self._item_row_height(item)
+            if chunk and chunk_height + row_height + ITEM_CARRY_ROW_HEIGHT > budget - PAGE_FIT_SLACK:
+                flowables.append(self._create_items_table(chunk, first_index, brought_forward, running_total))
+                flowables.append(PageBreak())
+                brought_forward = running_total
+                chunk = []
+                chunk_height = ITEM_HEADER_HEIGHT + ITEM_CARRY_ROW_HEIGHT
+                first_index = index
+                budget = page_height
+
+            chunk.append(item)
+            chunk_height += row_height
+            running_total += item.line_total
+
+        flowables.append(self._create_items_table(chunk, first_index, brought_forward, None))
+        return flowables
+    
+    @staticmethod
+    def _item_row_height(item: InvoiceItem) -> float:
+        """Height platypus gives a plain-text item row"""
+        lines = item.product_name.count("\n") + item.description.count("\n") + 2
+        return lines * ITEM_LEADING + ITEM_ROW_PADDING
+    
+    def _create_items_table(self, items, first_index: int = 1, brought_forward=None, carried_forward=None):
+        """Create one page of the items table"""
         # Headers
         headers = ['Description', 'Qty', 'Unit Price', 'Cuts', 'Cutting Cost', 'Discount', 'Total']
         
         data = [headers]
+        if brought_forward is not None:
+            data.append(['Brought forward', '', '', '', '', '', f"€{brought_forward:.2f}"])
+        first_item_row = len(data)
         
-        for item in invoice.items:
+        for item in items:
             cutting_cost = item.cuts_required * item.cutting_charge_per_cut
             discount_text = ""
             if item.discount_percentage > 0:
@@ -173,15 +173,20 @@ class PDFGenerator:
                 f"€{item.line_total:.2f}"
             ]
             data.append(row)
+        last_item_row = len(data) - 1
         
-        table = Table(data, colWidths=[2.5*inch, 0.5*inch, 0.8*inch, 0.4*inch, 0.8*inch, 0.8*inch, 0.8*inch])
+        if carried_forward is not None:
+            data.append(['Carried forward', '', '', '', '', '', f"€{carried_forward:.2f}"])
+        
+        table = Table(data, colWidths=ITEM_COL_WIDTHS, repeatRows=1)
         
         style = [
             ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Description left-aligned
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 0), (-1, -1), self.font),
+            ('FONTNAME', (0, 0), (-1, 0), self.bold_font),
             ('FONTSIZE', (0, 0), (-1, 0), 10),
             ('FONTSIZE', (0, 1), (-1, -1), 9),
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
@@ -189,10 +194,15 @@ class PDFGenerator:
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
         ]
         
-        # Alternate row colors
-        for i in range(1, len(data)):
-            if i % 2 == 0:
-                style.append(('BACKGROUND', (0, i), (-1, i), colors.lightgrey))
+        # Alternate row colors, continuing the banding from the previous page
+        if items:
+            banding = [None, colors.lightgrey] if first_index % 2 == 1 else [colors.lightgrey, None]
+            style.append(('ROWBACKGROUNDS', (0, first_item_row), (-1, last_item_row), banding))
+        
+        # Subtotal rows span the description columns
+        for row in ([1] if brought_forward is not None else []) + ([-1] if carried_forward is not None else []):
+            style.append(('SPAN', (0, row), (5, row)))
+            style.append(('FONTNAME', (0, row), (-1, row), self.bold_font))
         
         table.setStyle(TableStyle(style))
         return table
@@ -225,7 +235,8 @@ class PDFGenerator:
         table = Table(data, colWidths=[4*inch, 2*inch])
         table.setStyle(TableStyle([
             ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 0), (-1, -1), self.font),
+            ('FONTNAME', (0, -1), (-1, -1), self.bold_font),
             ('FONTSIZE', (0, -1), (-1, -1), 12),
             ('BACKGROUND', (0, -1), (-1, -1), colors.lightblue),
             ('GRID', (0, 0), (-1, -1), 1, colors.black),
@@ -246,18 +257,3 @@ class PDFGenerator:
             elements.append(Paragraph(f"<b>Notes:</b> {invoice.notes}", self.styles['InvoiceDetails']))
         
         return elements
-    
-    def _create_footer(self, company: Company):
-        """Create footer with bank details"""
-        footer_text = "Thank you for your business!"
-        
-        if company.bank_name or company.iban:
-            footer_text += "<br/><br/><b>Payment Details:</b><br/>"
-            if company.bank_name:
-                footer_text += f"Bank: {company.bank_name}<br/>"
-            if company.iban:
-                footer_text += f"IBAN: {company.iban}<br/>"
-            if company.bank_sort_code:
-                footer_text += f"Sort Code: {company.bank_sort_code}<br/>"
-        
-        return Paragraph(footer_text, self.styles['InvoiceDetails'])
@@ -0,0 +1,130 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+from models.company import Company
+from models.invoice import Invoice
+from models.client import Client
+from services.download_store import DownloadStore, get_download_store
+from services.pdf_cache import PDFCache, get_pdf_cache
+from services.pdf_output import get_output_profile
+
+
+def render_variant(company: Company) -> str:
+    """PDF cache variant for invoices rendered with the company's output profile"""
+    return f"canvas:{get_output_profile(company.pdf_profile).name}"
+
+
+@dataclass
+class PDFJob:
+    id: str  # PDF cache key of the inputs, so identical requests share a job
+    filename: str
+    status: str = "Queued"  # Queued, Running, Done, Failed
+    progress: float = 0.0
+    error: str = ""
+    download_token: str = ""
+    submitted_at: float = 0.0
+    finished_at: float = 0.0
+
+    @property
+    def pending(self) -> bool:
+        return self.status in ("Queued", "Running")
+
+
+class PDFJobQueue:
+    """In-process queue that renders invoice PDFs on worker threads.
+
+    Pages submit a job and keep only its id; on later reruns they poll the
+    job and pick up the spooled PDF once it is done, so a slow render never
+    blocks the script run or other sessions.
+    """
+
+    def __init__(self, max_workers=2, cache: PDFCache = None, store: DownloadStore = None,
+                 job_ttl=3600):
+        self.cache = cache or get_pdf_cache()
+        self.store = store or get_download_store()
+        self.job_ttl = job_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-render")
+        self._jobs: Dict[str, PDFJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, invoice: Invoice, company: Company, client: Client, filename: str) -> PDFJob:
+        """Queue a render, reusing a pending or finished job for identical inputs"""
+        key = PDFCache.make_key(invoice, company, client, render_variant(company))
+
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(key)
+            if job is not None and (job.pending or self._is_downloadable(job)):
+                return job
+
+            job = PDFJob(id=key, filename=filename, submitted_at=time.time())
+            self._jobs[key] = job
+
+        # Cached renders are spooled right away without touching the worker pool
+        data = self.cache.get(key)
+        if data is not None:
+            self._finish(job, data)
+            return job
+
+        # Snapshot the inputs: the page keeps mutating its session invoice
+        snapshot = (
+            Invoice.from_dict(invoice.to_dict()),
+            Company.from_dict(company.to_dict()),
+            Client.from_dict(client.to_dict()),
+        )
+        self._executor.submit(self._run, job, *snapshot)
+        return job
+
+    def get(self, job_id: str) -> Optional[PDFJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: PDFJob, invoice: Invoice, company: Company, client: Client):
+        job.status = "Running"
+
+        def report(fraction: float):
+            job.progress = min(fraction, 1.0) * 0.95
+
+        try:
+            from services.pdf_canvas_renderer import CanvasPDFGenerator  # Loads reportlab on first render
+            renderer = CanvasPDFGenerator(get_output_profile(company.pdf_profile))
+            data = renderer.generate_invoice_pdf(invoice, company, client, progress=report).getvalue()
+            self.cache.put(job.id, data)
+            self._finish(job, data)
+        except Exception as e:
+            job.error = str(e)
+            job.status = "Failed"
+            job.finished_at = time.time()
+
+    def _finish(self, job: PDFJob, data: bytes):
+        spooled = self.store.spool(data, job.filename, "application/pdf")
+        job.download_token = spooled.token
+        job.progress = 1.0
+        job.finished_at = time.time()
+        job.status = "Done"
+
+    def _is_downloadable(self, job: PDFJob) -> bool:
+        return job.status == "Done" and self.store.get(job.download_token) is not None
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL"""
+        cutoff = time.time() - self.job_ttl
+        stale = [key for key, job in self._jobs.items()
+                 if not job.pending and job.finished_at < cutoff]
+        for key in stale:
+            del self._jobs[key]
+
+
+_shared_queue = None
+_shared_queue_lock = threading.Lock()
+
+
+def get_pdf_job_queue() -> PDFJobQueue:
+    """Process-wide render queue shared by every page and session"""
+    global _shared_queue
+    with _shared_queue_lock:
+        if _shared_queue is None:
+            _shared_queue = PDFJobQueue()
+        return _shared_queue
@@ -0,0 +1,147 @@
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+# reportlab and PIL are imported by the functions that use them, so pages
+# can name profiles and cache keys without loading the PDF layer
+
+BASE_FONTS = ("Helvetica", "Helvetica-Bold")
+EMBEDDED_FAMILY = "InvoiceSans"
+
+# First existing pair wins; reportlab always ships the Vera fonts
+TTF_CANDIDATES = [
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/truetype/DejaVuSans.ttf", "/usr/share/fonts/truetype/DejaVuSans-Bold.ttf"),
+    ("Vera.ttf", "VeraBd.ttf"),
+]
+
+# Largest rendered logo box on the page, in points (the header column is 1.5 inch wide)
+LOGO_BOX = (108, 54)
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    """How an invoice PDF is written: stream compression, fonts and logo quality"""
+    name: str
+    compress: bool = True
+    embed_fonts: bool = False  # Subset-embed a TrueType family instead of the base-14 Helvetica
+    logo_max_px: int = 600     # Longest side of the re-encoded logo
+    logo_quality: int = 85     # JPEG quality for logos without transparency
+    description: str = ""      # Shown where the profile is chosen
+
+    @property
+    def fonts(self) -> Tuple[str, str]:
+        """Regular and bold font names for this profile"""
+        if self.embed_fonts:
+            return register_fonts()
+        return BASE_FONTS
+
+
+PROFILES = {
+    # Base-14 fonts are never embedded, so this is the smallest text output
+    "standard": OutputProfile("standard", description="Standard: small files, good logo quality"),
+    "compact": OutputProfile("compact", logo_max_px=300, logo_quality=70,
+                             description="Compact: smallest files, lower logo quality, for email"),
+    # Self-contained files for long-term storage: fonts travel with the PDF
+    "archive": OutputProfile("archive", embed_fonts=True, logo_max_px=1200, logo_quality=90,
+                             description="Archive: embedded fonts and a sharp logo, for long-term storage"),
+}
+DEFAULT_PROFILE = "standard"
+
+_configured = False
+_fonts = None
+_setup_lock = threading.Lock()
+
+
+def get_output_profile(name: Optional[str] = None) -> OutputProfile:
+    """Look up a profile by name"""
+    try:
+        return PROFILES[name or DEFAULT_PROFILE]
+    except KeyError:
+        raise ValueError(f"Unknown PDF output profile: {name}")
+
+
+def configure_reportlab():
+    """Process-wide reportlab settings, applied once.
+
+    Compressed streams are written as raw binary instead of ASCII85 text,
+    which otherwise adds a quarter to every page, font and image stream.
+    """
+    global _configured
+    with _setup_lock:
+        if not _configured:
+            from reportlab import rl_config
+            rl_config.useA85 = 0
+            _configured = True
+
+
+
+def register_fonts() -> Tuple[str, str]:
+    """Register the embedded TrueType family once per process.
+
+    reportlab subsets TrueType fonts when writing, so only the glyphs that
+    appear on the invoice end up in the file.
+    """
+    global _fonts
+    with _setup_lock:
+        if _fonts is None:
+            _fonts = _register_ttf_family()
+        return _fonts
+
+
+def _register_ttf_family() -> Tuple[str, str]:
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    regular, bold = EMBEDDED_FAMILY, f"{EMBEDDED_FAMILY}-Bold"
+    for regular_path, bold_path in TTF_CANDIDATES:
+        try:
+            pdfmetrics.registerFont(TTFont(regular, regular_path))
+            pdfmetrics.registerFont(TTFont(bold, bold_path))
+        except Exception:
+            continue
+        pdfmetrics.registerFontFamily(EMBEDDED_FAMILY, normal=regular, bold=bold,
+                                      italic=regular, boldItalic=bold)
+        return regular, bold
+    return BASE_FONTS
+
+
+def get_logo(path: str, profile: OutputProfile):
+    """Downscaled logo as ``(ImageReader, width, height)`` in points, or None.
+
+    The image is re-encoded once per file version and profile and the reader
+    is reused by every render.
+    """
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    return _load_logo(str(Path(path).resolve()), mtime, profile.logo_max_px, profile.logo_quality)
+
+
+@lru_cache(maxsize=8)
+def _load_logo(path: str, mtime: int, max_px: int, quality: int):
+    from PIL import Image as PILImage
+    from reportlab.lib.utils import ImageReader
+    try:
+        with PILImage.open(path) as image:
+            image.load()
+            image.thumbnail((max_px, max_px))
+            data = BytesIO()
+            if image.mode in ("RGBA", "LA", "P"):
+                # Keep transparency; PNG is Flate-compressed like the rest of the file
+                image.save(data, format="PNG", optimize=True)
+            else:
+                image.convert("RGB").save(data, format="JPEG", quality=quality, optimize=True)
+            width, height = image.size
+    except (OSError, ValueError):
+        return None
+
+    data.seek(0)
+    scale = min(LOGO_BOX[0] / width, LOGO_BOX[1] / height)
+    return ImageReader(data), width * scale, height * scale
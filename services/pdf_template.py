@@ -0,0 +1,217 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import Table, TableStyle, Paragraph
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm, inch
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from models.company import Company
+from services.pdf_output import LOGO_BOX, OutputProfile, configure_reportlab, get_logo, get_output_profile
+
+configure_reportlab()
+
+PAGE_SIZE = A4
+PAGE_MARGIN = 20*mm
+HEADER_GAP = 20  # Space between the stamped header and the page body
+FOOTER_GAP = 10  # Space between the page body and the stamped footer
+LOGO_GAP = 10  # Space between the company details and the logo
+
+# Number of company templates kept alive (normally only the current one is used)
+MAX_TEMPLATES = 4
+
+_styles = {}
+_styles_lock = threading.Lock()
+
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def get_styles(font: str = "Helvetica"):
+    """Invoice paragraph styles, built once per process and font"""
+    with _styles_lock:
+        if font not in _styles:
+            _styles[font] = _build_styles(font)
+        return _styles[font]
+
+
+def _build_styles(font: str):
+    """Setup custom paragraph styles"""
+    styles = getSampleStyleSheet()
+    styles['Normal'].fontName = font
+
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Normal'],
+        fontSize=24,
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    ))
+
+    styles.add(ParagraphStyle(
+        name='CompanyHeader',
+        parent=styles['Normal'],
+        fontSize=14,
+        spaceAfter=6,
+        alignment=TA_LEFT,
+        textColor=colors.black
+    ))
+
+    styles.add(ParagraphStyle(
+        name='InvoiceDetails',
+        parent=styles['Normal'],
+        fontSize=10,
+        spaceAfter=3,
+        alignment=TA_LEFT
+    ))
+
+    styles.add(ParagraphStyle(
+        name='TableHeader',
+        parent=styles['Normal'],
+        fontSize=10,
+        alignment=TA_CENTER,
+        textColor=colors.white
+    ))
+
+    return styles
+
+
+def company_fingerprint(company: Company) -> str:
+    """Hash of the company fields that appear on the page furniture"""
+    payload = json.dumps(company.to_dict(), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_invoice_template(company: Company, profile: OutputProfile = None) -> "InvoiceTemplate":
+    """Return the laid-out template for this company, rebuilding it only when the company changes"""
+    profile = profile or get_output_profile()
+    fingerprint = company_fingerprint(company)
+    key = (fingerprint, profile.name)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+
+    template = InvoiceTemplate(company, fingerprint, profile)
+
+    with _templates_lock:
+        _templates[key] = template
+        while len(_templates) > MAX_TEMPLATES:
+            _templates.popitem(last=False)
+    return template
+
+
+class InvoiceTemplate:
+    """Company header and bank-details footer, laid out once and stamped on every page.
+
+    The header and footer flowables are wrapped when the template is built.
+    Each PDF document then draws them once into form XObjects and every page
+    references those forms instead of re-drawing the content.
+    """
+
+    def __init__(self, company: Company, fingerprint: str = "", profile: OutputProfile = None):
+        self.company = company
+        self.fingerprint = fingerprint or company_fingerprint(company)
+        self.profile = profile or get_output_profile()
+        self.font, self.bold_font = self.profile.fonts
+        self.styles = get_styles(self.font)
+        self.page_width, self.page_height = PAGE_SIZE
+        self.frame_width = self.page_width - 2 * PAGE_MARGIN
+
+        # The logo reader is shared by every template of this profile; it is
+        # only drawn inside ensure_forms, under the draw lock
+        self.logo = get_logo(company.logo_path, self.profile)
+        header_width = self.frame_width - LOGO_BOX[0] - LOGO_GAP if self.logo else 6*inch
+
+        self.header = self._create_company_header(company, header_width)
+        _, self.header_height = self.header.wrap(self.frame_width, self.page_height)
+        if self.logo:
+            self.header_height = max(self.header_height, self.logo[2])
+
+        self.footer = self._create_footer(company)
+        _, self.footer_height = self.footer.wrap(self.frame_width, self.page_height)
+
+        form_suffix = f"{self.fingerprint[:12]}_{self.profile.name}"
+        self.header_form = f"InvoiceHeader_{form_suffix}"
+        self.footer_form = f"InvoiceFooter_{form_suffix}"
+
+        # Flowable.drawOn keeps per-call state on the flowable itself
+        self._draw_lock = threading.Lock()
+
+    @property
+    def top_margin(self) -> float:
+        return PAGE_MARGIN + self.header_height + HEADER_GAP
+
+    @property
+    def bottom_margin(self) -> float:
+        return PAGE_MARGIN + self.footer_height + FOOTER_GAP
+
+    @property
+    def body_height(self) -> float:
+        """Height available for page content between header and footer"""
+        return self.page_height - self.top_margin - self.bottom_margin
+
+    def draw_page(self, canvas, doc=None):
+        """Page callback: stamp the header and footer forms onto the current page"""
+        self.ensure_forms(canvas)
+        canvas.doForm(self.header_form)
+        canvas.doForm(self.footer_form)
+
+    def ensure_forms(self, canvas):
+        """Define the header and footer forms once per document"""
+        if canvas.hasForm(self.header_form):
+            return
+
+        with self._draw_lock:
+            canvas.beginForm(self.header_form)
+            header_top = self.page_height - PAGE_MARGIN
+            _, table_height = self.header.wrap(self.frame_width, self.page_height)
+            self.header.drawOn(canvas, PAGE_MARGIN, header_top - table_height)
+            if self.logo:
+                reader, width, height = self.logo
+                canvas.drawImage(reader, self.page_width - PAGE_MARGIN - width, header_top - height,
+                                 width, height, mask='auto')
+            canvas.endForm()
+
+            canvas.beginForm(self.footer_form)
+            self.footer.drawOn(canvas, PAGE_MARGIN, PAGE_MARGIN)
+            canvas.endForm()
+
+    def _create_company_header(self, company: Company, width: float):
+        """Create company header section"""
+        data = [
+            [Paragraph(f"<b>{company.name}</b>", self.styles['CompanyHeader'])],
+            [Paragraph(company.address, self.styles['InvoiceDetails'])],
+            [Paragraph(f"{company.city}, {company.county} {company.postal_code}", self.styles['InvoiceDetails'])],
+            [Paragraph(f"Phone: {company.phone} | Email: {company.email}", self.styles['InvoiceDetails'])],
+        ]
+
+        if company.vat_number:
+            data.append([Paragraph(f"VAT Number: {company.vat_number}", self.styles['InvoiceDetails'])])
+
+        table = Table(data, colWidths=[width])
+        table.setStyle(TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ]))
+
+        return table
+
+    def _create_footer(self, company: Company):
+        """Create footer with bank details"""
+        footer_text = "Thank you for your business!"
+
+        if company.bank_name or company.iban:
+            footer_text += "<br/><br/><b>Payment Details:</b><br/>"
+            if company.bank_name:
+                footer_text += f"Bank: {company.bank_name}<br/>"
+            if company.iban:
+                footer_text += f"IBAN: {company.iban}<br/>"
+            if company.bank_sort_code:
+                footer_text += f"Sort Code: {company.bank_sort_code}<br/>"
+
+        return Paragraph(footer_text, self.styles['InvoiceDetails'])
@@ -0,0 +1,104 @@
+import os
+import threading
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Optional, Tuple
+from models.product import Product
+from models.tonnage_price import TonnagePrice, TonnagePriceManager
+
+KG_PER_TONNE = 1000.0
+
+
+@dataclass(frozen=True)
+class PriceQuote:
+    unit_price: float  # EUR per unit of measure
+    unit_weight_kg: float  # Weight of one unit of measure
+    price_per_tonne: float = 0.0  # 0 when the base price was used
+    source: str = "base"  # "tonnage" or "base"
+
+
+class PricingEngine:
+    """Resolves unit prices from the tonnage price table and product weights.
+
+    The table is turned into a dict keyed by (category, grade, finish) and
+    quotes are memoised per product. Both are rebuilt when the price table
+    file changes on disk, so an edit made from any page or process is picked
+    up on the next lookup.
+    """
+
+    def __init__(self, filepath="data/tonnage_prices.json"):
+        self.filepath = filepath
+        self._lookup: Dict[Tuple[str, str, str], TonnagePrice] = {}
+        self._quotes: Dict[tuple, PriceQuote] = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def quote(self, product: Product) -> PriceQuote:
+        """Unit price and weight for one unit of the product"""
+        self._refresh()
+        memo_key = (product.id, product.category, product.grade, product.finish,
+                    product.unit_of_measure, product.weight_per_unit, product.base_price)
+        quote = self._quotes.get(memo_key)
+        if quote is None:
+            quote = self._resolve(product)
+            with self._lock:
+                self._quotes[memo_key] = quote
+        return quote
+
+    def price_for(self, category: str, grade: str, finish: str) -> Optional[TonnagePrice]:
+        """Most specific table row for the key: exact, then any finish, then any grade"""
+        self._refresh()
+        lookup = self._lookup
+        return (lookup.get((category, grade, finish))
+                or lookup.get((category, grade, ""))
+                or lookup.get((category, "", finish))
+                or lookup.get((category, "", "")))
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def _resolve(self, product: Product) -> PriceQuote:
+        # Products sold by weight are quantified in kg
+        unit_weight = 1.0 if product.unit_of_measure == "weight" else product.weight_per_unit
+        price = self.price_for(product.category, product.grade, product.finish)
+        if price is None or unit_weight <= 0:
+            return PriceQuote(unit_price=product.base_price, unit_weight_kg=unit_weight)
+
+        unit_price = Decimal(str(price.price_per_tonne * unit_weight / KG_PER_TONNE))
+        return PriceQuote(
+            unit_price=float(unit_price.quantize(Decimal("0.01"), ROUND_HALF_UP)),
+            unit_weight_kg=unit_weight,
+            price_per_tonne=price.price_per_tonne,
+            source="tonnage",
+        )
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.filepath)
+            version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = (0, 0)
+        if version == self._version:
+            return
+
+        with self._lock:
+            if version == self._version:
+                return
+            prices = TonnagePriceManager(self.filepath).get_all_prices()
+            self._lookup = {price.key: price for price in prices}
+            self._quotes = {}
+            self._version = version
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def get_pricing_engine() -> PricingEngine:
+    """Process-wide pricing engine shared by every page and session"""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = PricingEngine()
+        return _shared_engine
@@ -0,0 +1,91 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+from models.invoice import Invoice, InvoiceManager
+
+RECENT_LIMIT = 10
+
+
+class RecentItems:
+    """Products each client bought most recently, and the clients invoiced most recently.
+
+    Built from the invoice file once and then updated as invoices are saved,
+    following the same refresh/mark_current protocol as the exposure index.
+    Lists are most recent first and hold at most ``limit`` ids.
+    """
+
+    def __init__(self, filepath="data/invoices.json", limit: int = RECENT_LIMIT):
+        self.filepath = filepath
+        self.limit = limit
+        self._products: Dict[str, "OrderedDict[str, None]"] = {}  # client id -> product ids, oldest first
+        self._clients: "OrderedDict[str, None]" = OrderedDict()
+        self._version = None
+        self._lock = threading.RLock()
+
+    def products_for(self, client_id: str) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return list(reversed(self._products.get(client_id, ())))
+
+    def clients(self) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return list(reversed(self._clients))
+
+    def record(self, invoice: Invoice):
+        if not invoice.client_id or invoice.status == "Cancelled":
+            return
+        with self._lock:
+            self._touch(self._clients, invoice.client_id)
+            products = self._products.setdefault(invoice.client_id, OrderedDict())
+            for item in invoice.items:
+                if item.product_id:
+                    self._touch(products, item.product_id)
+
+    def rebuild(self, invoices: List[Invoice]):
+        with self._lock:
+            self._products, self._clients = {}, OrderedDict()
+            for invoice in sorted(invoices, key=lambda invoice: (invoice.issue_date, invoice.created_date)):
+                self.record(invoice)
+
+    def mark_current(self):
+        with self._lock:
+            self._version = self._file_version()
+
+    def refresh(self):
+        """Rebuild from the invoice file if it changed since the lists last saw it"""
+        version = self._file_version()
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            self.rebuild(InvoiceManager(self.filepath).invoices)
+            self._version = version
+
+    def _touch(self, ids: "OrderedDict[str, None]", item_id: str):
+        ids[item_id] = None
+        ids.move_to_end(item_id)
+        while len(ids) > self.limit:
+            ids.popitem(last=False)
+
+    def _file_version(self):
+        try:
+            stat = os.stat(self.filepath)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return 0, 0
+
+
+_shared_recent = None
+_shared_recent_lock = threading.Lock()
+
+
+def get_recent_items() -> RecentItems:
+    """Process-wide recent items shared by every page and session"""
+    global _shared_recent
+    with _shared_recent_lock:
+        if _shared_recent is None:
+            _shared_recent = RecentItems()
+        return _shared_recent
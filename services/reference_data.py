@@ -0,0 +1,120 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from models.client import Client, ClientManager
+from models.company import Company
+from models.product import Product, ProductManager
+from services.cut_optimizer import parse_stock_length
+from services.search_index import SearchIndex
+
+DATA_FILES = {
+    "company": "data/company.json",
+    "clients": "data/clients.json",
+    "products": "data/products.json",
+}
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    try:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return 0, 0
+
+
+@dataclass
+class ReferenceData:
+    """Company, clients and active products, with the lookups pages build from them.
+
+    Loaded once per version of the data files and shared by every session,
+    so a rerun does not reload and re-index the JSON files. Treat it as
+    read-only.
+    """
+
+    version: tuple
+    company: Company
+    clients: List[Client]
+    products: List[Product]  # Active products only
+    client_index: SearchIndex = None
+    product_index: SearchIndex = None
+    cuttable_products: Dict[str, Product] = field(default_factory=dict)
+    clients_by_id: Dict[str, Client] = field(default_factory=dict)
+    products_by_id: Dict[str, Product] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # Lookups passed in were carried over from data whose file has not changed
+        if self.client_index is None:
+            self.client_index = SearchIndex(
+                self.clients, key=lambda client: client.id, label=client_label,
+                fields=[(lambda client: client.name, 3.0),
+                        (lambda client: client.vat_number.replace(" ", ""), 2.0),
+                        (lambda client: client.vat_number.replace(" ", "").upper().removeprefix("IE"), 2.0),
+                        (lambda client: client.city, 1.0)])
+            self.clients_by_id = {client.id: client for client in self.clients}
+        if self.product_index is None:
+            self.product_index = SearchIndex(
+                self.products, key=lambda product: product.id, label=product_label,
+                fields=[(lambda product: product.name, 3.0),
+                        (lambda product: product.grade, 2.0),
+                        (lambda product: product.dimensions, 2.0),
+                        (lambda product: product.category, 1.0)])
+            self.cuttable_products = {
+                f"{product.name} - {product.dimensions}": product
+                for product in self.products
+                if product.is_cuttable and parse_stock_length(product.dimensions)
+            }
+            self.products_by_id = {product.id: product for product in self.products}
+
+
+def client_label(client: Client) -> str:
+    return f"{client.name} - {client.city}" if client.city else client.name
+
+
+def product_label(product: Product) -> str:
+    details = " ".join(part for part in (product.grade, product.dimensions) if part)
+    return f"{product.name} - {product.category}" + (f" ({details})" if details else "")
+
+
+_shared_data: Optional[ReferenceData] = None
+_shared_data_lock = threading.Lock()
+
+
+def current_version() -> tuple:
+    return tuple(_file_version(path) for path in DATA_FILES.values())
+
+
+def load_reference_data(cached: Optional[ReferenceData] = None) -> ReferenceData:
+    """The cached data if no data file has changed since it was loaded, otherwise a fresh load"""
+    global _shared_data
+    version = current_version()
+    if cached is not None and cached.version == version:
+        return cached
+    with _shared_data_lock:
+        if _shared_data is None or _shared_data.version != version:
+            _shared_data = _reload(_shared_data, version)
+        return _shared_data
+
+
+def _reload(previous: Optional[ReferenceData], version: tuple) -> ReferenceData:
+    """Load the files that changed since ``previous``, keeping what was built from the others.
+
+    Saving an invoice rewrites the product file (stock levels), so this
+    keeps that from re-indexing every client.
+    """
+    def unchanged(name):
+        position = list(DATA_FILES).index(name)
+        return previous is not None and previous.version[position] == version[position]
+
+    company = previous.company if unchanged("company") else Company.load(DATA_FILES["company"])
+    if unchanged("clients"):
+        clients = dict(clients=previous.clients, client_index=previous.client_index,
+                       clients_by_id=previous.clients_by_id)
+    else:
+        clients = dict(clients=ClientManager(DATA_FILES["clients"]).get_all_clients())
+    if unchanged("products"):
+        products = dict(products=previous.products, product_index=previous.product_index,
+                        cuttable_products=previous.cuttable_products, products_by_id=previous.products_by_id)
+    else:
+        products = dict(products=ProductManager(DATA_FILES["products"]).get_active_products())
+    return ReferenceData(version=version, company=company, **clients, **products)
@@ -0,0 +1,82 @@
+import heapq
+import re
+from collections import defaultdict
+from typing import Callable, Dict, Generic, Iterable, List, Sequence, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+MAX_PREFIX = 8  # Longer query terms are looked up by this prefix, then checked against the full tokens
+
+_TOKEN_RE = re.compile(r"[\w.]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").casefold())
+
+
+class SearchIndex(Generic[T]):
+    """Type-ahead search over a few text fields of each record.
+
+    Every prefix of every token (up to MAX_PREFIX characters) maps to the
+    records containing it, so a query is a few dict lookups and a set
+    intersection however many records there are. Each query term must
+    prefix some token of a record; matches are ranked by the weight of the
+    fields they hit, whole-word matches first.
+    """
+
+    def __init__(self, records: Iterable[T], key: Callable[[T], str],
+                 fields: Sequence[Tuple[Callable[[T], str], float]], label: Callable[[T], str]):
+        self.records: Dict[str, T] = {}
+        self._tokens: Dict[str, Dict[str, float]] = {}  # record id -> token -> weight of its best field
+        self._prefixes: Dict[str, Set[str]] = defaultdict(set)
+        self._labels: Dict[str, str] = {}
+        for record in records:
+            record_id = key(record)
+            tokens: Dict[str, float] = {}
+            for getter, weight in fields:
+                for token in tokenize(getter(record)):
+                    tokens[token] = max(tokens.get(token, 0.0), weight)
+            self.records[record_id] = record
+            self._tokens[record_id] = tokens
+            self._labels[record_id] = label(record).casefold()
+            for token in tokens:
+                for length in range(1, min(len(token), MAX_PREFIX) + 1):
+                    self._prefixes[token[:length]].add(record_id)
+        self._alphabetical = sorted(self.records, key=self._labels.get)
+
+    def __len__(self):
+        return len(self.records)
+
+    def search(self, query: str, limit: int = 20) -> List[T]:
+        """Best ``limit`` records matching every term of the query"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        candidates = None
+        # Longest terms first: they match the fewest records
+        for term in sorted(set(terms), key=len, reverse=True):
+            matches = self._prefixes.get(term[:MAX_PREFIX], set())
+            if len(term) > MAX_PREFIX:
+                matches = {record_id for record_id in matches
+                           if any(token.startswith(term) for token in self._tokens[record_id])}
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+        ranked = heapq.nsmallest(limit, candidates,
+                                 key=lambda record_id: (-self._score(record_id, terms), self._labels[record_id]))
+        return [self.records[record_id] for record_id in ranked]
+
+    def first(self, limit: int = 20) -> List[T]:
+        """The first records in label order, for an empty query"""
+        return [self.records[record_id] for record_id in self._alphabetical[:limit]]
+
+    def _score(self, record_id: str, terms: List[str]) -> float:
+        tokens = self._tokens[record_id]
+        score = 0.0
+        for term in terms:
+            weight = tokens.get(term)
+            if weight is not None:
+                score += 2 * weight  # Whole word
+            else:
+                score += max((weight for token, weight in tokens.items() if token.startswith(term)), default=0.0)
+        return score
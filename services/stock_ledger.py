@@ -0,0 +1,375 @@
+import json
+import os
+import threading
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.invoice import Invoice, InvoiceManager
+from models.product import Product, ProductManager
+
+# Invoices in these statuses hold no stock: a draft takes stock only once it
+# is issued, and a cancelled invoice has returned its stock
+RELEASED_STATUSES = ("Draft", "Cancelled")
+
+
+@dataclass
+class StockMovement:
+    product_id: str
+    quantity: float  # Negative when stock goes out
+    reason: str  # opening, sale, reversal, adjustment
+    invoice_id: str = ""
+    invoice_number: str = ""
+    id: str = ""
+    timestamp: str = ""
+
+    def __post_init__(self):
+        if not self.id:
+            self.id = uuid.uuid4().hex
+        if not self.timestamp:
+            self.timestamp = datetime.now().isoformat()
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class InsufficientStock(Exception):
+    """Raised when an invoice needs more stock than is available"""
+
+    def __init__(self, shortages: List[Tuple[str, float, float]]):
+        self.shortages = shortages  # (product_id, requested, available)
+        super().__init__(f"Insufficient stock for {len(shortages)} product(s)")
+
+
+def stock_required(invoice: Invoice) -> Dict[str, float]:
+    """Quantity per product the invoice takes out of stock"""
+    required = defaultdict(float)
+    if invoice.status not in RELEASED_STATUSES:
+        for item in invoice.items:
+            if item.product_id:  # Free-text lines hold no stock
+                required[item.product_id] += item.quantity
+    return dict(required)
+
+
+class StockLedger:
+    """Append-only stock movement ledger with in-memory balances.
+
+    Every invoice line that takes stock is recorded as one movement in a
+    JSON-lines file. Balances per product and the quantities each invoice
+    holds are kept in memory and updated as movements are posted, so
+    availability is a dict lookup. The check and the append happen under one
+    lock, which stops two sessions from selling the same stock.
+
+    ``Product.stock_quantity`` mirrors the balance and is written back after
+    each posting, under the lock the catalog holds for product writes. Drafts
+    and cancelled invoices hold no stock. On first use, the ledger opens with
+    the current catalog stock and the lines of the invoices already saved.
+    """
+
+    def __init__(self, filepath="data/stock_movements.jsonl", products_path="data/products.json",
+                 invoices_path="data/invoices.json"):
+        self.filepath = filepath
+        self.products_path = products_path
+        self.invoices_path = invoices_path
+        self._balances: Dict[str, float] = {}
+        self._held: Dict[str, Dict[str, float]] = {}  # invoice id -> product id -> quantity
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._batch: Optional[List[StockMovement]] = None  # Movements held back by ``batch``
+
+    @property
+    def lock(self) -> threading.RLock:
+        """Held while stock is posted and balances are written to the product file"""
+        return self._lock
+
+    def available(self, product_id: str) -> float:
+        self._ensure_loaded()
+        return self._balances.get(product_id, 0.0)
+
+    def balances(self) -> Dict[str, float]:
+        self._ensure_loaded()
+        with self._lock:
+            return dict(self._balances)
+
+    def held_by(self, invoice_id: str) -> Dict[str, float]:
+        """Quantities currently taken out of stock by an invoice"""
+        self._ensure_loaded()
+        with self._lock:
+            return dict(self._held.get(invoice_id, {}))
+
+    def shortages(self, invoice: Invoice) -> List[Tuple[str, float, float]]:
+        """Products the invoice would oversell, as (product_id, requested, available).
+
+        Quantities the saved version of the invoice already holds count as
+        available to it.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            return self._shortages(invoice)
+
+    def post_invoice(self, invoice: Invoice, allow_oversell: bool = False) -> List[StockMovement]:
+        """Bring the stock held by an invoice in line with its lines and status.
+
+        A changed invoice has its previous lines reversed and its current
+        lines posted, one movement each. Cancelled invoices hold nothing.
+        Raises InsufficientStock, and records nothing, if the change would
+        take any product below zero.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            held = self._held.get(invoice.id, {})
+            required = stock_required(invoice)
+            if _same_quantities(held, required):
+                return []
+            if not allow_oversell:
+                shortages = self._shortages(invoice)
+                if shortages:
+                    raise InsufficientStock(shortages)
+
+            movements = [
+                StockMovement(product_id, quantity, "reversal", invoice.id, invoice.invoice_number)
+                for product_id, quantity in held.items()
+            ]
+            if required:
+                movements += [
+                    StockMovement(item.product_id, -item.quantity, "sale", invoice.id, invoice.invoice_number)
+                    for item in invoice.items if item.product_id
+                ]
+            self._record(movements)
+            return movements
+
+    @contextmanager
+    def batch(self):
+        """Post several invoices with one ledger append and one catalog write.
+
+        Balances change as each invoice is posted, so later postings in the
+        batch see the stock taken by earlier ones.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            if self._batch is not None:
+                yield self
+                return
+            self._batch = []
+            try:
+                yield self
+            finally:
+                movements, self._batch = self._batch, None
+                if movements:
+                    self._append(movements)
+                    self._sync_products({movement.product_id for movement in movements})
+
+    def release_invoice(self, invoice_id: str, invoice_number: str = "") -> List[StockMovement]:
+        """Return everything a deleted invoice held to stock"""
+        self._ensure_loaded()
+        with self._lock:
+            movements = [
+                StockMovement(product_id, quantity, "reversal", invoice_id, invoice_number)
+                for product_id, quantity in self._held.get(invoice_id, {}).items()
+            ]
+            self._record(movements)
+            return movements
+
+    def adjust(self, product_id: str, quantity: float) -> Optional[StockMovement]:
+        """Set a product's balance to a counted quantity with an adjustment movement"""
+        movements = self.adjust_many({product_id: quantity})
+        return movements[0] if movements else None
+
+    def adjust_many(self, quantities: Dict[str, float]) -> List[StockMovement]:
+        """Set several balances at once, with one write"""
+        self._ensure_loaded()
+        with self._lock:
+            movements = []
+            for product_id, quantity in quantities.items():
+                difference = quantity - self._balances.get(product_id, 0.0)
+                if abs(difference) >= 1e-9:
+                    movements.append(StockMovement(product_id, difference, "adjustment"))
+            self._record(movements)
+            return movements
+
+    def record_history(self, sales: Iterable[Tuple[str, str, Dict[str, float]]]) -> int:
+        """Record invoices that were fulfilled before they reached the ledger.
+
+        ``sales`` holds (invoice id, invoice number, quantity per product).
+        Each sale is booked against a matching opening movement, so balances
+        are unchanged but later edits, cancellations and deletes reverse the
+        right quantities. Returns the number of invoices recorded.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            movements, recorded = [], 0
+            for invoice_id, invoice_number, quantities in sales:
+                if invoice_id in self._held or not quantities:
+                    continue
+                for product_id, quantity in quantities.items():
+                    movements.append(StockMovement(product_id, quantity, "opening"))
+                    movements.append(StockMovement(product_id, -quantity, "sale", invoice_id, invoice_number))
+                recorded += 1
+            self._record(movements)
+            return recorded
+
+    def low_stock(self, products: List[Product], threshold: float) -> List[Tuple[Product, float]]:
+        """Products at or below the threshold, lowest balance first"""
+        self._ensure_loaded()
+        rows = [(product, self._balances.get(product.id, 0.0)) for product in products]
+        return sorted((row for row in rows if row[1] <= threshold), key=lambda row: (row[1], row[0].name))
+
+    def movements(self, product_id: Optional[str] = None) -> List[StockMovement]:
+        """Movement history, oldest first, optionally for one product"""
+        return [movement for movement in self._read()
+                if product_id is None or movement.product_id == product_id]
+
+    def rebuild(self) -> Dict[str, float]:
+        """Recompute balances from the movement history and resync the catalog"""
+        with self._lock:
+            self._balances, self._held = _replay(self._read())
+            self._loaded = True
+            self._sync_products(self._balances.keys())
+            return dict(self._balances)
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if not os.path.exists(self.filepath):
+                self._open_ledger()
+            self._balances, self._held = _replay(self._read())
+            if self._held:
+                self._release_unheld()
+            self._loaded = True
+
+    def _open_ledger(self):
+        products = ProductManager(self.products_path).products
+        invoices = InvoiceManager(self.invoices_path).invoices
+        sold = defaultdict(float)
+        for invoice in invoices:
+            for product_id, quantity in stock_required(invoice).items():
+                sold[product_id] += quantity
+
+        # Opening stock is what was on hand before the saved invoices, so
+        # posting them lands on the current catalog figures
+        movements = [StockMovement(product.id, product.stock_quantity + sold.pop(product.id, 0.0), "opening")
+                     for product in products]
+        movements += [StockMovement(product_id, quantity, "opening") for product_id, quantity in sold.items()]
+        for invoice in invoices:
+            if stock_required(invoice):
+                movements += [StockMovement(item.product_id, -item.quantity, "sale", invoice.id,
+                                            invoice.invoice_number) for item in invoice.items
+                              if item.product_id]
+        self._append(movements)
+
+    def _release_unheld(self):
+        """Return stock still held by saved invoices whose status holds none.
+
+        Checked when the ledger loads, which releases drafts saved before
+        drafts stopped taking stock.
+        """
+        movements = [
+            StockMovement(product_id, quantity, "reversal", invoice.id, invoice.invoice_number)
+            for invoice in InvoiceManager(self.invoices_path).invoices
+            if invoice.id in self._held and not stock_required(invoice)
+            for product_id, quantity in self._held[invoice.id].items()
+        ]
+        self._record(movements)
+
+    def _shortages(self, invoice: Invoice) -> List[Tuple[str, float, float]]:
+        held = self._held.get(invoice.id, {})
+        shortages = []
+        for product_id, quantity in stock_required(invoice).items():
+            available = self._balances.get(product_id, 0.0) + held.get(product_id, 0.0)
+            if quantity > held.get(product_id, 0.0) and quantity > available + 1e-9:
+                shortages.append((product_id, quantity, available))
+        return shortages
+
+    def _record(self, movements: List[StockMovement]):
+        if not movements:
+            return
+        if self._batch is not None:
+            self._batch.extend(movements)
+            for movement in movements:
+                _apply(self._balances, self._held, movement)
+            return
+        self._append(movements)
+        for movement in movements:
+            _apply(self._balances, self._held, movement)
+        self._sync_products({movement.product_id for movement in movements})
+
+    def _append(self, movements: List[StockMovement]):
+        with open(self.filepath, 'a') as f:
+            f.write("".join(json.dumps(vars(movement)) + "\n" for movement in movements))
+
+    def _read(self) -> List[StockMovement]:
+        movements = []
+        try:
+            with open(self.filepath, 'r') as f:
+                for line in f:
+                    try:
+                        movements.append(StockMovement.from_dict(json.loads(line)))
+                    except (json.JSONDecodeError, TypeError):
+                        continue  # Torn last line after a crash
+        except FileNotFoundError:
+            pass
+        return movements
+
+    def _sync_products(self, product_ids):
+        manager = ProductManager(self.products_path)
+        changed = False
+        for product in manager.products:
+            if product.id in product_ids:
+                balance = _as_stock(self._balances.get(product.id, 0.0))
+                if product.stock_quantity != balance:
+                    product.stock_quantity = balance
+                    changed = True
+        if changed:
+            manager.save_products()
+
+
+def _apply(balances: Dict[str, float], held: Dict[str, Dict[str, float]], movement: StockMovement):
+    balances[movement.product_id] = balances.get(movement.product_id, 0.0) + movement.quantity
+    if movement.invoice_id:
+        holding = held.setdefault(movement.invoice_id, {})
+        quantity = holding.get(movement.product_id, 0.0) - movement.quantity
+        if abs(quantity) < 1e-9:
+            holding.pop(movement.product_id, None)
+        else:
+            holding[movement.product_id] = quantity
+        if not holding:
+            del held[movement.invoice_id]
+
+
+def _replay(movements: List[StockMovement]):
+    balances, held = {}, {}
+    for movement in movements:
+        _apply(balances, held, movement)
+    return balances, held
+
+
+def _same_quantities(a: Dict[str, float], b: Dict[str, float]) -> bool:
+    return a.keys() == b.keys() and all(abs(a[key] - b[key]) < 1e-9 for key in a)
+
+
+def _as_stock(quantity: float):
+    """Whole quantities stay ints in the catalog file"""
+    rounded = round(quantity, 6)
+    return int(rounded) if rounded == int(rounded) else rounded
+
+
+_shared_ledger = None
+_shared_ledger_lock = threading.Lock()
+
+
+def get_stock_ledger() -> StockLedger:
+    """Process-wide ledger shared by every page and session"""
+    global _shared_ledger
+    with _shared_ledger_lock:
+        if _shared_ledger is None:
+            _shared_ledger = StockLedger()
+        return _shared_ledger
@@ -0,0 +1,37 @@
+import importlib
+import threading
+import time
+
+# Heavy modules that pages import only on the paths that use them
+WARM_MODULES = (
+    "pandas",
+    "pyarrow",
+    "services.pdf_canvas_renderer",
+)
+WARMUP_DELAY = 1.0  # Seconds to leave the first render alone
+
+_started = False
+_started_lock = threading.Lock()
+
+
+def _warm(modules, delay: float):
+    time.sleep(delay)
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue  # An optional module; the page that needs it will report it
+
+
+def start_warmup(modules=WARM_MODULES, delay: float = WARMUP_DELAY):
+    """Import the heavy modules in a background thread, once per process.
+
+    The first page renders without them; by the time someone opens a table
+    or renders a PDF they are usually already loaded.
+    """
+    global _started
+    with _started_lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_warm, args=(tuple(modules), delay), name="import-warmup", daemon=True).start()
@@ -0,0 +1,19 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ["BILLING_API"] = "0"  # Pages must not start the local API during tests
+
+
+@pytest.fixture(scope="session", autouse=True)
+def workspace(tmp_path_factory):
+    """A scratch working directory, since data paths are relative and the shared services are per process"""
+    path = tmp_path_factory.mktemp("workspace")
+    os.chdir(path)
+    (path / "data").mkdir()
+    yield path
+    os.chdir(ROOT)
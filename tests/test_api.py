@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+from models.client import Client
+from models.invoice import Invoice, InvoiceItem
+from models.product import Product
+from services import api
+from services.api import BillingAPI, Request
+from services.billing_service import get_billing_service
+from services.catalog import get_catalog
+
+
+def call(method, path, payload=None, token=""):
+    headers = {"authorization": f"Bearer {token}"} if token else {}
+    request = Request(method, path, {}, headers, json.dumps(payload).encode() if payload is not None else b"")
+    response = asyncio.run(BillingAPI(workers=1).handle(request))
+    return response.status, json.loads(response.body or b"null")
+
+
+def test_requests_need_the_token_when_one_is_set(monkeypatch):
+    monkeypatch.setattr(api, "API_TOKEN", "t0ken")
+    assert call("GET", "/api/products")[0] == 401
+    assert call("GET", "/api/products", token="wrong")[0] == 401
+    assert call("GET", "/api/products", token="t0ken")[0] == 200
+
+
+def test_status_change_reports_drafts_without_stock():
+    client_id = get_catalog().add_client(Client(id="", name="Status Api Ltd"))
+    product_id = get_catalog().add_product(Product(id="", name="Status Api Bar", base_price=3.0, stock_quantity=5))
+    drafts = []
+    for _ in range(2):
+        draft = Invoice(client_id=client_id, client_name="Status Api Ltd", status="Draft")
+        draft.add_item(InvoiceItem(product_id, "Status Api Bar", "", 4, 3.0))
+        drafts.append(get_billing_service().save_invoice(draft))
+
+    status, body = call("POST", "/api/invoices/status", {"ids": [draft.id for draft in drafts], "status": "Sent"})
+    assert status == 200
+    assert body["changed"] == 1
+    [refused] = body["refused"]
+    assert refused["id"] == drafts[1].id and refused["status"] == 409
+    assert refused["shortages"] == [{"product_id": product_id, "requested": 4, "available": 1}]
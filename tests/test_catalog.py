@@ -0,0 +1,65 @@
+import threading
+
+from models.client import Client, ClientManager
+from models.invoice import Invoice, InvoiceItem
+from models.product import Product, ProductManager
+from services.billing_service import get_billing_service
+from services.catalog import get_catalog
+from services.stock_ledger import get_stock_ledger
+
+
+def test_saving_a_client_loaded_earlier_keeps_clients_added_since():
+    catalog = get_catalog()
+    client_id = catalog.add_client(Client(id="", name="Edited On Page Ltd"))
+    page_copy = ClientManager()  # Loaded when the page rendered
+    catalog.add_client(Client(id="", name="Added By API Ltd"))
+
+    edited = page_copy.get_client(client_id)
+    edited.name = "Edited On Page Limited"
+    assert catalog.update_client(client_id, edited)
+    names = {client.name for client in ClientManager().clients}
+    assert {"Added By API Ltd", "Edited On Page Limited"} <= names
+
+
+def test_concurrent_client_adds_are_all_kept():
+    catalog = get_catalog()
+    before = len(ClientManager().clients)
+    threads = [threading.Thread(target=catalog.add_client, args=(Client(id="", name=f"Concurrent {i} Ltd"),))
+               for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(ClientManager().clients) == before + 20
+
+
+def test_editing_a_product_keeps_stock_taken_since_it_was_loaded():
+    catalog = get_catalog()
+    product_id = catalog.add_product(Product(id="", name="Flat Bar 50x5", base_price=9.0, stock_quantity=30))
+    form_copy = ProductManager().get_product(product_id)  # Loaded when the edit form rendered
+    client_id = catalog.add_client(Client(id="", name="Stock Taker Ltd"))
+    invoice = Invoice(client_id=client_id, client_name="Stock Taker Ltd", status="Sent")
+    invoice.add_item(InvoiceItem(product_id, "Flat Bar 50x5", "", 8, 9.0))
+    get_billing_service().save_invoice(invoice)
+
+    form_copy.base_price = 9.5
+    assert catalog.update_product(product_id, form_copy)
+    with catalog.products() as manager:
+        assert manager.get_product(product_id).stock_quantity == 22
+        assert manager.get_product(product_id).base_price == 9.5
+    assert get_stock_ledger().available(product_id) == 22
+
+    form_copy.stock_quantity = 40
+    assert catalog.update_product(product_id, form_copy, count_stock=True)
+    assert get_stock_ledger().available(product_id) == 40
+
+
+def test_batch_save_rejects_an_invoice_number_already_on_file():
+    client_id = get_catalog().add_client(Client(id="", name="Numbered Ltd"))
+    first = Invoice(client_id=client_id, client_name="Numbered Ltd", invoice_number="INV-TEST-1")
+    second = Invoice(client_id=client_id, client_name="Numbered Ltd", invoice_number="INV-TEST-1")
+    errors = get_billing_service().save_invoices([first, second])
+    assert errors[0] is None
+    assert "INV-TEST-1" in str(errors[1])
+    again = Invoice(client_id=client_id, client_name="Numbered Ltd", invoice_number="INV-TEST-1")
+    assert get_billing_service().save_invoices([again])[0] is not None
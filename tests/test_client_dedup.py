@@ -0,0 +1,17 @@
+from models.client import Client
+from services.client_dedup import DuplicateDetector
+
+
+def test_same_name_with_a_different_legal_suffix_is_found_at_the_default_threshold():
+    clients = [Client(id="a", name="Shannon Construction Ltd", city="Limerick"),
+               Client(id="b", name="Shannon Construction Limited", city="Ennis")]
+    candidates = DuplicateDetector(clients).find()
+    assert len(candidates) == 1
+    assert candidates[0].score >= 0.75
+    assert candidates[0].reasons[0] == "same name"
+
+
+def test_same_name_with_different_vat_numbers_is_not_a_duplicate():
+    clients = [Client(id="a", name="Shannon Construction Ltd", vat_number="IE1234567T"),
+               Client(id="b", name="Shannon Construction Limited", vat_number="IE7654321A")]
+    assert DuplicateDetector(clients).find() == []
@@ -0,0 +1,52 @@
+import io
+
+import pytest
+
+from models.client import Client, ClientManager
+from models.invoice import InvoiceManager
+from models.product import Product
+from services.billing_service import get_billing_service
+from services.catalog import get_catalog
+from services.csv_import import CSVEncodingError, CSVImporter
+from services.stock_ledger import get_stock_ledger
+
+CP1252_CLIENTS = "name,city\nCafé Stéel Ltd,Dún Laoghaire\nÓ Briain Fabrication €,Tralee\n".encode("cp1252")
+
+
+def test_windows_1252_file_is_detected_and_imported_intact():
+    report = CSVImporter().import_file("clients", io.BytesIO(CP1252_CLIENTS))
+    assert report.encoding == "cp1252"
+    assert report.imported == 2
+    names = {client.name: client.city for client in ClientManager().clients}
+    assert names["Café Stéel Ltd"] == "Dún Laoghaire"
+    assert "Ó Briain Fabrication €" in names
+
+
+def test_utf8_file_with_a_byte_order_mark_is_read_as_utf8():
+    data = "\ufeffname\nMícheál Welding Ltd\n".encode("utf-8")
+    report = CSVImporter().import_file("clients", io.BytesIO(data), dry_run=True)
+    assert report.encoding == "utf-8-sig"
+    assert report.imported == 1
+
+
+def test_text_that_does_not_decode_is_rejected_not_replaced():
+    before = len(ClientManager().clients)
+    with pytest.raises(CSVEncodingError, match="0x81"):
+        CSVImporter(encoding="cp1252").import_file("clients", io.BytesIO(b"name\nBad \x81 Ltd\n"))
+    with pytest.raises(CSVEncodingError):
+        CSVImporter(encoding="utf-8-sig").import_file("clients", io.BytesIO(CP1252_CLIENTS))
+    assert len(ClientManager().clients) == before
+
+
+def test_imported_draft_holds_no_stock():
+    get_catalog().add_client(Client(id="", name="Acme Draft Ltd"))
+    product_id = get_catalog().add_product(Product(id="", name="Draft Test Bar", base_price=5.0, stock_quantity=10))
+    data = b"invoice_number,client_name,status,product_name,quantity\nH-DRAFT-1,Acme Draft Ltd,Draft,Draft Test Bar,4\n"
+    report = CSVImporter().import_file("invoices", io.BytesIO(data))
+    assert report.imported == 1
+    ledger = get_stock_ledger()
+    draft = next(invoice for invoice in InvoiceManager().invoices if invoice.invoice_number == "H-DRAFT-1")
+    assert ledger.held_by(draft.id) == {}
+
+    get_billing_service().save_invoice(draft)
+    assert ledger.available(product_id) == 10
@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+from services.invoice_delivery import DeliveryLog, DeliveryRecord, SMTPSettings
+
+
+def test_latest_reads_only_new_lines_and_waits_for_a_torn_one(tmp_path):
+    log = DeliveryLog(str(tmp_path / "delivery_log.jsonl"))
+    assert log.latest() == {}
+    log.append(DeliveryRecord("inv-1", "INV-1", "a@example.ie", "Failed"))
+    log.append(DeliveryRecord("inv-2", "INV-2", "b@example.ie", "Sent"))
+    assert log.latest()["inv-1"].status == "Failed"
+
+    record = json.dumps(DeliveryRecord("inv-1", "INV-1", "a@example.ie", "Sent").to_dict())
+    with open(log.filepath, "a") as f:
+        f.write(record[:20])  # Still being written
+    assert log.latest()["inv-1"].status == "Failed"
+    with open(log.filepath, "a") as f:
+        f.write(record[20:] + "\n")
+    assert {key: value.status for key, value in log.latest().items()} == {"inv-1": "Sent", "inv-2": "Sent"}
+
+
+def test_saved_smtp_password_is_not_sent_to_the_browser_and_kept_when_left_empty():
+    SMTPSettings(host="smtp.example.ie", username="billing", password="s3cret").save()
+    app = AppTest.from_file(str(ROOT / "pages" / "1_Company_Setup.py"), default_timeout=60).run()
+    password = next(field for field in app.text_input if field.label == "Password")
+    assert password.value == ""
+
+    next(button for button in app.button if button.label == "Save Email Settings").click().run()
+    assert SMTPSettings.load().password == "s3cret"
+    assert Path("data/smtp.json").stat().st_mode & 0o077 == 0
+
+    next(box for box in app.checkbox if box.label == "Clear saved password").check()
+    next(button for button in app.button if button.label == "Save Email Settings").click().run()
+    assert SMTPSettings.load().password == ""
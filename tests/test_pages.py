@@ -0,0 +1,29 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+from models.product import Product, ProductManager
+from services.stock_ledger import get_stock_ledger
+
+CATALOG_PAGE = str(ROOT / "pages" / "3_Product_Catalog.py")
+CATALOG_ACTIONS = ["View Products", "Add New Product", "Edit Product", "Bulk Pricing", "Tonnage Prices",
+                   "Stock Levels"]
+
+
+@pytest.fixture(scope="module")
+def products():
+    manager = ProductManager()
+    manager.products = [
+        Product(id="bar-20", name="Round Bar 20mm", grade="S355", base_price=12.5, weight_per_unit=14.8),
+        Product(id="plate-10", name="Plate 10mm", category="Steel Plate", base_price=80.0, weight_per_unit=78.5),
+    ]
+    manager.save_products()
+    get_stock_ledger().adjust_many({"bar-20": 4, "plate-10": 50})  # One low, both with movements
+    return manager.products
+
+
+@pytest.mark.parametrize("action", CATALOG_ACTIONS)
+def test_catalog_action_renders(products, action):
+    app = AppTest.from_file(CATALOG_PAGE, default_timeout=60).run()
+    app.sidebar.radio[0].set_value(action).run()
+    assert not app.exception, [exception.value for exception in app.exception]
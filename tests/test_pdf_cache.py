@@ -0,0 +1,18 @@
+import threading
+
+from services.pdf_cache import PDFCache
+
+
+def test_concurrent_puts_of_one_key_leave_a_whole_file(tmp_path, capsys):
+    cache = PDFCache(cache_dir=tmp_path)
+    renders = [bytes([i]) * (100_000 + i) for i in range(16)]
+    threads = [threading.Thread(target=cache.put, args=("same-key", data)) for data in renders]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert "Error writing" not in capsys.readouterr().out
+    assert (tmp_path / "same-key.pdf").read_bytes() in renders
+    assert list(tmp_path.glob("*.tmp")) == []
+    assert cache._disk_bytes == (tmp_path / "same-key.pdf").stat().st_size
@@ -0,0 +1,27 @@
+import time
+
+from models.client import Client
+from models.company import Company
+from models.invoice import Invoice, InvoiceItem
+from services.download_store import DownloadStore
+from services.pdf_cache import PDFCache
+from services.pdf_jobs import PDFJobQueue
+
+
+def render(queue: PDFJobQueue, company: Company) -> bytes:
+    invoice = Invoice(id="inv", invoice_number="INV-1", client_id="c", client_name="Client Ltd")
+    invoice.add_item(InvoiceItem("bar", "Round Bar 20mm", "", 2, 12.5))
+    job = queue.submit(invoice, company, Client(id="c", name="Client Ltd"), "INV-1.pdf")
+    deadline = time.monotonic() + 60
+    while job.pending and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert job.status == "Done", job.error
+    return queue.store.get(job.download_token).path.read_bytes()
+
+
+def test_invoices_render_with_the_company_pdf_profile(tmp_path):
+    queue = PDFJobQueue(cache=PDFCache(cache_dir=tmp_path / "cache"), store=DownloadStore(tmp_path / "spool"))
+    standard = render(queue, Company(name="Steel Ltd"))
+    archive = render(queue, Company(name="Steel Ltd", pdf_profile="archive"))
+    assert b"/FontFile2" not in standard
+    assert b"/FontFile2" in archive  # Archive copies carry their fonts
@@ -0,0 +1,42 @@
+import json
+import threading
+
+from models.schema import SCHEMA_KEY, SCHEMA_VERSIONS, read_records, write_records
+from services import bootstrap as bootstrap_module
+
+
+def test_readers_never_see_a_partly_written_file(tmp_path):
+    path = str(tmp_path / "clients.json")
+    records = [{"id": str(i), "name": f"Client {i}"} for i in range(5000)]
+    write_records(path, "clients", records)
+    seen = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            seen.append(len(read_records(path, "clients")))
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for _ in range(20):
+        write_records(path, "clients", records)
+    done.set()
+    reader.join()
+    assert seen and set(seen) == {5000}
+    assert [p.name for p in tmp_path.iterdir()] == ["clients.json"]
+
+
+def test_bootstrap_reports_a_newer_file_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(bootstrap_module, "_done", False)
+    monkeypatch.setattr(bootstrap_module, "_errors", [])
+    (tmp_path / "data").mkdir()
+    newer = {SCHEMA_KEY: SCHEMA_VERSIONS["clients"] + 1, "records": []}
+    (tmp_path / "data" / "clients.json").write_text(json.dumps(newer))
+
+    assert bootstrap_module.bootstrap(progress=None) == []
+    assert bootstrap_module.bootstrap(progress=None) == []
+    errors = bootstrap_module.bootstrap_errors()
+    assert len(errors) == 1 and "data/clients.json" in errors[0]
+    assert not (tmp_path / "backups").exists()
+    assert json.loads((tmp_path / "data" / "clients.json").read_text()) == newer
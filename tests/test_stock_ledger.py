@@ -0,0 +1,62 @@
+from models.invoice import Invoice, InvoiceItem, InvoiceManager
+from models.product import Product, ProductManager
+from services.billing_service import BillingService
+from services.credit_exposure import ExposureIndex
+from services.recent_items import RecentItems
+from services.stock_ledger import StockLedger, StockMovement
+
+
+def make_ledger(tmp_path, invoices=()):
+    products = ProductManager(str(tmp_path / "products.json"))
+    products.products = [Product(id="bar", name="Round Bar", stock_quantity=10)]
+    products.save_products()
+    manager = InvoiceManager(str(tmp_path / "invoices.json"))
+    manager.invoices = list(invoices)
+    manager.save_invoices()
+    return StockLedger(str(tmp_path / "movements.jsonl"), products.filepath, manager.filepath)
+
+
+def invoice(status: str, number: int = 1) -> Invoice:
+    draft = Invoice(id=f"inv-{number}", invoice_number=f"INV-{number}", client_id="c", client_name="C",
+                    status=status)
+    draft.add_item(InvoiceItem("bar", "Round Bar", "", 4, 10.0))
+    return draft
+
+
+def test_drafts_take_stock_only_when_issued(tmp_path):
+    ledger = make_ledger(tmp_path)
+    assert ledger.post_invoice(invoice("Draft")) == []
+    assert ledger.available("bar") == 10
+    ledger.post_invoice(invoice("Sent"))
+    assert ledger.available("bar") == 6
+    ledger.post_invoice(invoice("Draft"))
+    assert ledger.available("bar") == 10
+    assert ProductManager(ledger.products_path).get_product("bar").stock_quantity == 10
+
+
+def test_stock_held_by_an_existing_draft_is_released_on_load(tmp_path):
+    ledger = make_ledger(tmp_path, [invoice("Draft")])
+    ledger._append([StockMovement("bar", 14, "opening"), StockMovement("bar", -4, "sale", "inv-1", "INV-1")])
+    assert ledger.available("bar") == 14
+    assert ledger.held_by("inv-1") == {}
+    assert ProductManager(ledger.products_path).get_product("bar").stock_quantity == 14
+
+
+
+def test_issuing_drafts_refuses_the_ones_stock_cannot_cover(tmp_path):
+    drafts = [invoice("Draft", number) for number in (1, 2, 3)]
+    ledger = make_ledger(tmp_path, drafts)
+    invoices_path = str(tmp_path / "invoices.json")
+    service = BillingService(invoices_path, ledger=ledger, exposure=ExposureIndex(invoices_path),
+                             recent=RecentItems(invoices_path))
+
+    change = service.set_status(["inv-1", "inv-2", "inv-3"], "Sent")
+    assert change.changed == 2
+    assert [(refused.id, error.shortages) for refused, error in change.refused] == [("inv-3", [("bar", 4, 2)])]
+    assert ledger.available("bar") == 2
+    assert ProductManager(ledger.products_path).get_product("bar").stock_quantity == 2
+    statuses = {saved.id: saved.status for saved in InvoiceManager(invoices_path).invoices}
+    assert statuses == {"inv-1": "Sent", "inv-2": "Sent", "inv-3": "Draft"}
+
+    assert service.set_status(["inv-1"], "Cancelled").changed == 1
+    assert ledger.available("bar") == 6
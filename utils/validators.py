@@ -1,5 +1,43 @@
 import re
-from typing import Optional, Tuple
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Compiled once at import
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_SEPARATORS_RE = re.compile(r'[\s\-\(\)]')
+PHONE_RE = re.compile(r'^(\+353|0353|353)?[0-9]{8,9}$')
+# Current format: 7 digits, check letter, optional second letter.
+# Pre-2013 format: digit, letter or + or *, 5 digits, check letter.
+VAT_RE = re.compile(r'^IE(?:([0-9]{7})([A-W])([A-IW]?)|([0-9])[A-Z+*]([0-9]{5})([A-W]))$')
+IBAN_RE = re.compile(r'^([A-Z]{2})([0-9]{2})([A-Z0-9]{11,30})$')
+IRISH_IBAN_RE = re.compile(r'^IE[0-9]{2}[A-Z]{4}[0-9]{14}$')
+EIRCODE_RE = re.compile(r'^[A-Z0-9]{3}\s?[A-Z0-9]{4}$')
+
+VAT_WEIGHTS = (8, 7, 6, 5, 4, 3, 2)
+VAT_CHECK_LETTERS = "WABCDEFGHIJKLMNOPQRSTUV"  # Remainder 0 is W, 1 is A ... 22 is V
+
+# IBAN lengths for the countries Irish suppliers usually deal with
+IBAN_LENGTHS = {
+    "IE": 22, "GB": 22, "DE": 22, "FR": 27, "NL": 18, "BE": 16, "ES": 24, "IT": 27, "PT": 25,
+    "AT": 20, "LU": 20, "DK": 18, "FI": 18, "SE": 24, "PL": 28, "CZ": 24, "CH": 21, "NO": 15,
+}
+_IBAN_DIGITS = str.maketrans({chr(code): str(code - 55) for code in range(ord("A"), ord("Z") + 1)})
+
+Check = Callable[[Any], Tuple[bool, Optional[str]]]
+
+
+def vat_check_letter(digits: str, extra: str = "") -> str:
+    """Check character for seven VAT digits and the optional second letter"""
+    total = sum(int(digit) * weight for digit, weight in zip(digits, VAT_WEIGHTS))
+    if extra and extra != "W":
+        total += (ord(extra) - ord("A") + 1) * 9
+    return VAT_CHECK_LETTERS[total % 23]
+
+
+def iban_checksum_ok(iban: str) -> bool:
+    """ISO 13616 mod-97 check: the rearranged number leaves remainder 1"""
+    return int((iban[4:] + iban[:4]).translate(_IBAN_DIGITS)) % 97 == 1
+
 
 class Validators:
     @staticmethod
@@ -7,63 +45,61 @@ class Validators:
         """Validate email format"""
         if not email:
             return True, None  # Empty email is okay
-        
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if re.match(pattern, email):
+
+        if EMAIL_RE.match(email):
             return True, None
         return False, "Invalid email format"
-    
+
     @staticmethod
     def validate_phone(phone: str) -> Tuple[bool, Optional[str]]:
         """Validate Irish phone number"""
         if not phone:
             return True, None  # Empty phone is okay
-        
+
         # Remove spaces and common separators
-        clean_phone = re.sub(r'[\s\-\(\)]', '', phone)
-        
-        # Irish phone patterns
-        patterns = [
-            r'^(\+353|0353|353)?[0-9]{8,9}$',  # Standard Irish format
-            r'^(\+353|0353|353)?[1-9][0-9]{7,8}$',  # More specific
-        ]
-        
-        for pattern in patterns:
-            if re.match(pattern, clean_phone):
-                return True, None
-        
+        clean_phone = PHONE_SEPARATORS_RE.sub('', phone)
+
+        if PHONE_RE.match(clean_phone):
+            return True, None
         return False, "Invalid Irish phone number format"
-    
+
     @staticmethod
     def validate_vat_number(vat: str) -> Tuple[bool, Optional[str]]:
-        """Validate Irish VAT number"""
+        """Validate Irish VAT number, including its check character"""
         if not vat:
             return True, None  # Empty VAT is okay
-        
-        # Irish VAT format: IE + 7 digits + 1 or 2 letters
-        # or IE + 1 digit + letter + 5 digits + letter
-        pattern = r'^IE[0-9]{7}[A-Z]{1,2}$|^IE[0-9][A-Z][0-9]{5}[A-Z]$'
-        
-        if re.match(pattern, vat.upper()):
-            return True, None
-        return False, "Invalid Irish VAT number format (e.g., IE1234567T)"
-    
+
+        match = VAT_RE.match(vat.replace(' ', '').upper())
+        if not match:
+            return False, "Invalid Irish VAT number format (e.g., IE1234567T)"
+
+        digits, check, extra, old_first, old_rest, old_check = match.groups()
+        if digits is None:
+            # Old numbers are checked as the new form: 0, the five digits, then the first digit
+            digits, check = "0" + old_rest + old_first, old_check
+        if vat_check_letter(digits, extra) != check:
+            return False, "Invalid Irish VAT number (check character does not match)"
+        return True, None
+
     @staticmethod
     def validate_iban(iban: str) -> Tuple[bool, Optional[str]]:
-        """Validate IBAN format"""
+        """Validate IBAN length, Irish layout and mod-97 check digits"""
         if not iban:
             return True, None
-        
+
         # Remove spaces
-        clean_iban = iban.replace(' ', '')
-        
-        # Irish IBAN: IE + 2 check digits + 4 bank code + 6 account number + 8 digits
-        if clean_iban.startswith('IE') and len(clean_iban) == 22:
-            if re.match(r'^IE[0-9]{20}$', clean_iban):
-                return True, None
-        
-        return False, "Invalid Irish IBAN format"
-    
+        clean_iban = iban.replace(' ', '').upper()
+
+        match = IBAN_RE.match(clean_iban)
+        if not match or IBAN_LENGTHS.get(match.group(1), len(clean_iban)) != len(clean_iban):
+            return False, "Invalid IBAN format"
+        if match.group(1) == "IE" and not IRISH_IBAN_RE.match(clean_iban):
+            # IE + 2 check digits + 4 letter bank code + 6 digit sort code + 8 digit account
+            return False, "Invalid Irish IBAN format"
+        if not iban_checksum_ok(clean_iban):
+            return False, "Invalid IBAN (check digits do not match)"
+        return True, None
+
     @staticmethod
     def validate_positive_number(value: str) -> Tuple[bool, Optional[str]]:
         """Validate positive number"""
@@ -72,25 +108,120 @@ class Validators:
             if num >= 0:
                 return True, None
             return False, "Value must be positive"
-        except ValueError:
+        except (TypeError, ValueError):
             return False, "Invalid number format"
-    
+
     @staticmethod
     def validate_required_field(value: str, field_name: str) -> Tuple[bool, Optional[str]]:
         """Validate required field"""
         if not value or not value.strip():
             return False, f"{field_name} is required"
         return True, None
-    
+
     @staticmethod
     def validate_postal_code(postal_code: str) -> Tuple[bool, Optional[str]]:
         """Validate Irish postal code (Eircode)"""
         if not postal_code:
             return True, None
-        
+
         # Eircode format: 7 characters (3 digits + 4 alphanumeric)
-        pattern = r'^[A-Z0-9]{3}\s?[A-Z0-9]{4}$'
-        
-        if re.match(pattern, postal_code.upper()):
+        if EIRCODE_RE.match(postal_code.upper()):
             return True, None
         return False, "Invalid Eircode format (e.g., D02 XY45)"
+
+
+@dataclass(frozen=True)
+class FieldError:
+    field: str
+    label: str
+    message: str
+    index: int = 0  # Position of the record in a batch
+    required: bool = False
+
+    def __str__(self):
+        return self.message if self.required else f"{self.label}: {self.message}"
+
+
+class RecordValidator:
+    """Validates whole records against a fixed set of field rules.
+
+    Rules are resolved once when the validator is built, so checking a
+    record is a loop over its fields. Records can be dicts or objects with
+    matching attributes; errors come back as FieldError values.
+    """
+
+    def __init__(self, rules: Dict[str, Sequence[Check]], required: Sequence[str] = (),
+                 labels: Optional[Dict[str, str]] = None):
+        labels = labels or {}
+        self.required = tuple((name, labels.get(name, _label(name))) for name in required)
+        self.rules = tuple((name, labels.get(name, _label(name)), tuple(checks)) for name, checks in rules.items())
+
+    def validate(self, record: Any, index: int = 0) -> List[FieldError]:
+        """Every problem with one record; empty when it is valid"""
+        get = record.get if isinstance(record, Mapping) else lambda name, default=None: getattr(record, name, default)
+        errors = []
+        missing = set()
+        for name, label in self.required:
+            value = get(name, "")
+            if value is None or (isinstance(value, str) and not value.strip()):
+                errors.append(FieldError(name, label, f"{label} is required", index, required=True))
+                missing.add(name)
+        for name, label, checks in self.rules:
+            if name in missing:
+                continue
+            value = get(name, None)
+            if value is None:
+                continue
+            for check in checks:
+                valid, message = check(value)
+                if not valid:
+                    errors.append(FieldError(name, label, message, index))
+                    break
+        return errors
+
+    def validate_batch(self, records: Iterable[Any]) -> List[FieldError]:
+        """Problems across many records, each tagged with the record's position"""
+        errors = []
+        for index, record in enumerate(records):
+            errors.extend(self.validate(record, index))
+        return errors
+
+    def is_valid(self, record: Any) -> bool:
+        return not self.validate(record)
+
+
+def _label(name: str) -> str:
+    return name.replace("_", " ").title()
+
+
+COMPANY_VALIDATOR = RecordValidator(
+    {
+        "email": [Validators.validate_email],
+        "phone": [Validators.validate_phone],
+        "vat_number": [Validators.validate_vat_number],
+        "iban": [Validators.validate_iban],
+        "postal_code": [Validators.validate_postal_code],
+    },
+    required=["name", "address", "city"],
+    labels={"name": "Company name", "vat_number": "VAT Number", "iban": "IBAN"},
+)
+
+CLIENT_VALIDATOR = RecordValidator(
+    {
+        "email": [Validators.validate_email],
+        "phone": [Validators.validate_phone],
+        "vat_number": [Validators.validate_vat_number],
+        "credit_limit": [Validators.validate_positive_number],
+    },
+    required=["name"],
+    labels={"name": "Company name", "vat_number": "VAT Number"},
+)
+
+PRODUCT_VALIDATOR = RecordValidator(
+    {
+        name: [Validators.validate_positive_number]
+        for name in ("weight_per_unit", "base_price", "cutting_charge", "stock_quantity", "min_order_quantity")
+    },
+    required=["name"],
+    labels={"name": "Product name"},
+)